@@ -1,18 +1,34 @@
+import asyncio
 import time
+from typing import Awaitable, Callable, Literal, Optional
 
-import redis
+import redis.asyncio as redis
 import uvicorn
 
-from fastapi import FastAPI, Depends
-from redis.cluster import RedisCluster
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from redis.asyncio.cluster import RedisCluster
 
 from src.utils.decorators import measure_time
-from src.infra.redis_client import get_redis
-from src.infra.redis_cluster import get_redis_cluster
+from src.utils.metrics import metrics
+from src.utils.key_codec import key_codec
+from src.infra.redis_client import get_async_redis
+from src.infra.redis_cluster import get_async_redis_cluster
+from src.infra.tracing import start_trace
+from src.infra.client_cache import ClientCache, get_client_cache
+from src.infra.cluster_scan import scan_primaries_batches
+from src.infra.bulk_delete import server_unlink, cluster_server_unlink
+from src.infra.scan_pages import DEFAULT_BUDGET_MS, InvalidCursor, cluster_scan_page, scan_page
+from src.infra.adaptive_scan import controllers, scan_batches
+from src.infra.memory_sampler import DEFAULT_BUDGET_MS as DEFAULT_MEMORY_BUDGET_MS, DEFAULT_RANDOM_SAMPLES, DEFAULT_SAMPLE_SIZE, cluster_estimate_memory, estimate_memory
+from src.infra.slot_skew import cluster_skew, slot_tracker
+from src.infra.server_stats import Snapshot, StatsRun, StatsRuns, cluster_snapshot, cluster_stats_runs, diff, snapshot, stats_runs
+from src.infra.jobs import Job, JobManager, cluster_ping_probe, get_jobs, ping_probe
 from src.keys_vs_scan import QueryRouter
 from src.list_vs_zset import QueueRouter
 from src.string_vs_hset import TimeScaleRouter
 from src.hash_tag_scan_vs_hierachy_scan import SearchRouter
+from src.async_vs_threadpool import ModeRouter
 
 app = FastAPI()
 
@@ -20,17 +36,39 @@ app.include_router(QueryRouter)
 app.include_router(QueueRouter)
 app.include_router(TimeScaleRouter)
 app.include_router(SearchRouter)
+app.include_router(ModeRouter)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor(request: Request, exc: InvalidCursor):
+    # 페이지 조회의 cursor 토큰이 잘못됐거나 만료(노드 구성 변경)된 경우. 처음부터 다시 조회해야 한다.
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.middleware("http")
+async def redis_trace(request: Request, call_next):
+    # 요청 단위로 Redis 명령 수/왕복/바이트/시간을 모아 응답 헤더와 메트릭에 붙인다.
+    # 스트리밍 응답은 헤더가 먼저 나가므로 첫 배치까지의 값만 담긴다.
+    trace = start_trace()
+    response = await call_next(request)
+    response.headers.update(trace.headers())
+
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    metrics.inc("redis_commands_total", trace.commands, route=route)
+    metrics.inc("redis_round_trips_total", trace.round_trips, route=route)
+    metrics.inc("redis_bytes_sent_total", trace.bytes_sent, route=route)
+    metrics.inc("redis_bytes_received_total", trace.bytes_received, route=route)
+    metrics.observe("redis_request_time_seconds", trace.redis_time, route=route)
+    return response
 
 @app.get("/redis/ping")
 @measure_time
-def redis_ping(r: redis.Redis = Depends(get_redis)):
-    r.ping()
+async def redis_ping(r: redis.Redis = Depends(get_async_redis)):
+    await r.ping()
     return {"status": "ok", "timestamp": time.time()}
 
 @app.get("/stats")
 @measure_time
-def redis_stats(r: redis.Redis = Depends(get_redis)):
-    info = r.info(section="commandstats")
+async def redis_stats(r: redis.Redis = Depends(get_async_redis)):
+    info = await r.info(section="commandstats")
     stat = info.get("cmdstat_scan") or {}
     if not isinstance(stat, dict):
         stat = {}
@@ -41,25 +79,118 @@ def redis_stats(r: redis.Redis = Depends(get_redis)):
         "usec_per_call": stat.get("usec_per_call", 0),
     }
 
+@app.get("/stats/memory")
+@measure_time
+async def redis_memory_stats(r: redis.Redis = Depends(get_async_redis)):
+    info = await r.info(section="memory")
+    keys = await r.dbsize()
+    return {
+        "status": "ok",
+        "keys": keys,
+        "used_memory": info.get("used_memory", 0),
+        "used_memory_human": info.get("used_memory_human", ""),
+        "bytes_per_key": round(info.get("used_memory", 0) / keys, 1) if keys else 0,
+        "key_codec": key_codec.name,
+    }
+
+@app.get("/memory")
+@measure_time
+async def redis_memory_estimate(
+    pattern: str = "test:*",
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_samples: int = DEFAULT_RANDOM_SAMPLES,
+    budget_ms: int = DEFAULT_MEMORY_BUDGET_MS,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    # 패턴별 메모리를 표본으로 추정한다. 키 수와 상관없이 budget_ms 근처에서 끝난다. (95% 구간)
+    res = await estimate_memory(r, key_codec.pattern(pattern), sample_size, random_samples, budget_ms)
+    return {"status": "ok", **res}
+
 @app.post("/stats/reset")
 @measure_time
-def redis_stats_reset(r: redis.Redis = Depends(get_redis)):
-    r.config_resetstat()
+async def redis_stats_reset(r: redis.Redis = Depends(get_async_redis)):
+    await r.config_resetstat()
     return {"status": "ok", "message": "commandstats reset"}
 
+@app.get("/stats/snapshot")
+@measure_time
+async def redis_stats_snapshot(r: redis.Redis = Depends(get_async_redis)):
+    # 모든 cmdstat_*, INFO memory/stats, LATENCY LATEST/HISTOGRAM 원본 스냅샷
+    return {"status": "ok", **await snapshot(r)}
+
+def _stats_run(runs: StatsRuns, name: str) -> StatsRun:
+    run = runs.get(name)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"stats run not found: {name}")
+    return run
+
+async def _stats_run_result(run: StatsRun, take: Callable[[], Awaitable[Snapshot]]):
+    # 끝나지 않은 구간은 지금까지의 차이를 보여준다.
+    delta = run.delta if run.after is not None else diff(run.before, await take())
+    return {"status": "ok", **run.state(), **delta}
+
+@app.get("/stats/runs")
+async def redis_stats_runs():
+    return {"status": "ok", "runs": [run.state() for run in stats_runs.list()]}
+
+@app.post("/stats/runs/{name}")
+@measure_time
+async def redis_stats_run_begin(name: str, r: redis.Redis = Depends(get_async_redis)):
+    # 이름 붙인 측정 구간을 시작한다. 전역 통계를 초기화하지 않으므로 다른 구간과 겹쳐도 된다.
+    run = stats_runs.begin(name, await snapshot(r))
+    return {"status": "ok", **run.state()}
+
+@app.post("/stats/runs/{name}/end")
+@measure_time
+async def redis_stats_run_end(name: str, r: redis.Redis = Depends(get_async_redis)):
+    run = _stats_run(stats_runs, name)
+    if run.after is None:
+        run.finish(await snapshot(r))
+    return await _stats_run_result(run, lambda: snapshot(r))
+
+@app.get("/stats/runs/{name}")
+@measure_time
+async def redis_stats_run(name: str, r: redis.Redis = Depends(get_async_redis)):
+    return await _stats_run_result(_stats_run(stats_runs, name), lambda: snapshot(r))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def app_metrics():
+    # Prometheus text exposition 형식
+    return metrics.prometheus()
+
+@app.get("/metrics/json")
+async def app_metrics_snapshot():
+    return {"status": "ok", **metrics.snapshot(), "scan_controllers": controllers()}
+
+@app.post("/metrics/reset")
+async def app_metrics_reset():
+    metrics.reset()
+    return {"status": "ok", "message": "app metrics reset"}
+
+@app.post("/cache/enable")
+async def client_cache_enable(cache: ClientCache = Depends(get_client_cache)):
+    await cache.enable()
+    return {"status": "ok", "message": "client cache enabled", "prefixes": cache.prefixes}
+
+@app.post("/cache/disable")
+async def client_cache_disable(cache: ClientCache = Depends(get_client_cache)):
+    await cache.disable()
+    return {"status": "ok", "message": "client cache disabled"}
+
 @app.get("/cluster/ping")
 @measure_time
-def redis_cluster_ping(rc: RedisCluster = Depends(get_redis_cluster)):
-    rc.ping()
+async def redis_cluster_ping(rc: RedisCluster = Depends(get_async_redis_cluster)):
+    await rc.ping()
     return {"status": "ok", "timestamp": time.time()}
 
 @app.get("/cluster/stats")
 @measure_time
-def redis_cluster_stats(rc: RedisCluster = Depends(get_redis_cluster)):
+async def redis_cluster_stats(rc: RedisCluster = Depends(get_async_redis_cluster)):
     res = dict()
-    for node in rc.get_primaries():
-        # 각 노드별 INFO를 직접 조회해야 노드별 SCAN 집계가 분리된다.
-        info = rc.info(section="commandstats", target_nodes=node)
+    nodes = rc.get_primaries()
+    # 각 노드별 INFO를 직접 조회해야 노드별 SCAN 집계가 분리된다. 노드들은 동시에 조회한다.
+    infos = await asyncio.gather(*(rc.info(section="commandstats", target_nodes=node) for node in nodes))
+    for node, info in zip(nodes, infos):
         stat = info.get("cmdstat_scan") or {}
         if not isinstance(stat, dict):
             stat = {}
@@ -71,58 +202,250 @@ def redis_cluster_stats(rc: RedisCluster = Depends(get_redis_cluster)):
     res["status"] = "ok"
     return res
 
+@app.get("/cluster/memory")
+@measure_time
+async def redis_cluster_memory_estimate(
+    pattern: str = "test:*",
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_samples: int = DEFAULT_RANDOM_SAMPLES,
+    budget_ms: int = DEFAULT_MEMORY_BUDGET_MS,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+):
+    # 프라이머리마다 동시에 추정하고 합친다. nodes에서 노드별 쏠림도 함께 본다.
+    res = await cluster_estimate_memory(rc, key_codec.pattern(pattern), sample_size, random_samples, budget_ms)
+    return {"status": "ok", **res}
+
+@app.get("/cluster/slots/skew")
+@measure_time
+async def redis_cluster_slot_skew(
+    top: int = 20,
+    sample_per_slot: int = 100,
+    tags: bool = True,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+):
+    # 노드/슬롯별 키 쏠림과 무거운 해시태그. 요청 추적이 켜져 있었다면 요청 쏠림도 함께 본다.
+    res = await cluster_skew(rc, top, sample_per_slot, tags)
+    return {"status": "ok", **res, "requests": slot_tracker.summary(top)}
+
+@app.get("/cluster/slots/load")
+async def redis_cluster_slot_load(top: int = 20):
+    return {"status": "ok", **slot_tracker.summary(top)}
+
+@app.post("/cluster/slots/track/enable")
+async def redis_cluster_slot_track_enable(reset: bool = True):
+    # 앱이 클러스터로 보내는 명령마다 첫 키의 슬롯을 센다. (redis_slot_requests_total{node,slot})
+    slot_tracker.enable(reset)
+    return {"status": "ok", "message": "slot request tracking enabled"}
+
+@app.post("/cluster/slots/track/disable")
+async def redis_cluster_slot_track_disable():
+    slot_tracker.disable()
+    return {"status": "ok", "message": "slot request tracking disabled"}
+
+@app.get("/cluster/stats/snapshot")
+@measure_time
+async def redis_cluster_stats_snapshot(rc: RedisCluster = Depends(get_async_redis_cluster)):
+    return {"status": "ok", **await cluster_snapshot(rc)}
+
+@app.get("/cluster/stats/runs")
+async def redis_cluster_stats_runs():
+    return {"status": "ok", "runs": [run.state() for run in cluster_stats_runs.list()]}
+
+@app.post("/cluster/stats/runs/{name}")
+@measure_time
+async def redis_cluster_stats_run_begin(name: str, rc: RedisCluster = Depends(get_async_redis_cluster)):
+    run = cluster_stats_runs.begin(name, await cluster_snapshot(rc))
+    return {"status": "ok", **run.state()}
+
+@app.post("/cluster/stats/runs/{name}/end")
+@measure_time
+async def redis_cluster_stats_run_end(name: str, rc: RedisCluster = Depends(get_async_redis_cluster)):
+    # total은 모든 프라이머리 합계, nodes는 노드별 차이
+    run = _stats_run(cluster_stats_runs, name)
+    if run.after is None:
+        run.finish(await cluster_snapshot(rc))
+    return await _stats_run_result(run, lambda: cluster_snapshot(rc))
+
+@app.get("/cluster/stats/runs/{name}")
+@measure_time
+async def redis_cluster_stats_run(name: str, rc: RedisCluster = Depends(get_async_redis_cluster)):
+    return await _stats_run_result(_stats_run(cluster_stats_runs, name), lambda: cluster_snapshot(rc))
+
 @app.post("/cluster/stats/reset")
 @measure_time
-def redis_cluster_stats_reset(rc: RedisCluster = Depends(get_redis_cluster)):
+async def redis_cluster_stats_reset(rc: RedisCluster = Depends(get_async_redis_cluster)):
     # 프라이머리 노드들의 commandstats를 일괄 초기화한다.
-    rc.config_resetstat(target_nodes=rc.PRIMARIES)
+    await rc.config_resetstat(target_nodes=rc.PRIMARIES)
     return {"status": "ok", "message": "cluster commandstats reset"}
 
 @app.get("/count")
 @measure_time
-def get_count(pattern: str, r: redis.Redis = Depends(get_redis)):
-    res = sum(1 for _ in r.scan_iter(match=pattern, count=1000))
+async def get_count(pattern: str, count: int | None = None, r: redis.Redis = Depends(get_async_redis)):
+    res = 0
+    async for batch in scan_batches(r, key_codec.pattern(pattern), count):
+        res += len(batch)
     return {
         "status": "ok",
         "count": res,
     }
 
-@app.delete("/clear")
+@app.get("/count/page")
 @measure_time
-def redis_clear(pattern: str = "test:*", r: redis.Redis = Depends(get_redis)):
+async def get_count_page(
+    pattern: str,
+    cursor: str | None = None,
+    count: int | None = None,
+    budget_ms: int | None = DEFAULT_BUDGET_MS,
+    max_keys: int | None = None,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    # 예산만큼만 훑고 돌아온다. 응답의 cursor를 다음 요청에 넘기고, done이 될 때까지 count를 더하면 /count와 같다.
+    res = await scan_page(r, key_codec.pattern(pattern), cursor, count=count, budget_ms=budget_ms, max_keys=max_keys)
+    return {"status": "ok", **res}
+
+@app.get("/cluster/count/page")
+@measure_time
+async def get_cluster_count_page(
+    pattern: str,
+    cursor: str | None = None,
+    count: int | None = None,
+    budget_ms: int | None = DEFAULT_BUDGET_MS,
+    max_keys: int | None = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+):
+    # cursor 토큰에 노드별 SCAN 커서가 들어 있다.
+    res = await cluster_scan_page(rc, key_codec.pattern(pattern), cursor, count=count, budget_ms=budget_ms, max_keys=max_keys)
+    return {"status": "ok", **res}
+
+@app.get("/cluster/count")
+@measure_time
+async def get_cluster_count(
+    pattern: str,
+    limit: int | None = None,
+    parallel: bool = True,
+    count: int | None = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+):
+    res = 0
+    pattern = key_codec.pattern(pattern)
+    if parallel:
+        # 프라이머리별 SCAN을 동시에 돌려 가장 느린 노드 시간만큼만 걸리게 한다.
+        async for batch in scan_primaries_batches(rc, match=pattern, count=count, limit=limit):
+            res += len(batch)
+    else:
+        # redis-py의 클러스터 scan_iter는 노드를 차례로 돈다. 비교용이라 고정 COUNT를 그대로 둔다.
+        async for _ in rc.scan_iter(match=pattern, count=count or 1000):
+            res += 1
+            if limit is not None and res >= limit:
+                break
+    return {
+        "status": "ok",
+        "count": res,
+        "parallel": parallel,
+    }
+
+async def _clear(r: redis.Redis, pattern: str, mode: Literal["client", "server"], job: Optional[Job] = None):
+    progress = job.tick if job is not None else None
+    if mode == "server":
+        # 키를 앱으로 가져오지 않고 서버 안에서 SCAN + UNLINK를 잘게 나눠 실행한다.
+        res = await server_unlink(r, pattern, progress=progress)
+        return {"status": "no content", "pattern": pattern, "mode": mode, **res}
+
     deleted = 0
     batch_size = 1000
     pipe = r.pipeline()
 
-    for key in r.scan_iter(match=pattern, count=batch_size):
-        pipe.unlink(key)
-        deleted += 1
-        if deleted % batch_size == 0:
-            pipe.execute()
+    async for batch in scan_batches(r, pattern):
+        for key in batch:
+            pipe.unlink(key)
+            deleted += 1
+            if deleted % batch_size == 0:
+                await pipe.execute()
+                if progress is not None:
+                    await progress(batch_size)
 
     if deleted % batch_size:
-        pipe.execute()
+        await pipe.execute()
+        if progress is not None:
+            await progress(deleted % batch_size)
 
     return {"status": "no content", "deleted": deleted, "pattern": pattern}
 
-@app.delete("/cluster/clear")
-@measure_time
-def redis_cluster_clear(pattern: str = "test:*", rc: RedisCluster = Depends(get_redis_cluster)):
+async def _cluster_clear(rc: RedisCluster, pattern: str, mode: Literal["client", "server"], job: Optional[Job] = None):
+    progress = job.tick if job is not None else None
+    if mode == "server":
+        res = await cluster_server_unlink(rc, pattern, progress=progress)
+        return {"status": "no content", "pattern": pattern, "mode": mode, **res}
+
     deleted = 0
-    batch_size = 1000
     pipe = rc.pipeline()
 
-    for key in rc.scan_iter(match=pattern, count=batch_size):
-        pipe.unlink(key)
-        deleted += 1
-        if deleted % batch_size == 0:
-            pipe.execute()
-
-    if deleted % batch_size:
-        pipe.execute()
+    # 노드별 SCAN 배치는 한 노드의 키들이므로 받은 즉시 UNLINK 파이프라인으로 흘려보낸다.
+    async for batch in scan_primaries_batches(rc, match=pattern):
+        for key in batch:
+            pipe.unlink(key)
+        deleted += len(batch)
+        await pipe.execute()
+        if progress is not None:
+            await progress(len(batch))
 
     return {"status": "no content", "deleted": deleted, "pattern": pattern}
 
+@app.delete("/clear")
+@measure_time
+async def redis_clear(
+    response: Response,
+    pattern: str = "test:*",
+    mode: Literal["client", "server"] = "client",
+    background: bool = False,
+    r: redis.Redis = Depends(get_async_redis),
+    jobs: JobManager = Depends(get_jobs),
+):
+    pattern = key_codec.pattern(pattern)
+    if background:
+        # 요청은 바로 돌려주고 작업은 PING 지연을 보며 속도를 조절해 돌린다. 진행 상황은 GET /jobs/{job_id}
+        job = jobs.submit("clear", lambda job: _clear(r, pattern, mode, job), {"pattern": pattern, "mode": mode}, ping_probe(r))
+        response.status_code = 202
+        return job.accepted()
+    return await _clear(r, pattern, mode)
+
+@app.delete("/cluster/clear")
+@measure_time
+async def redis_cluster_clear(
+    response: Response,
+    pattern: str = "test:*",
+    mode: Literal["client", "server"] = "client",
+    background: bool = False,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+    jobs: JobManager = Depends(get_jobs),
+):
+    pattern = key_codec.pattern(pattern)
+    if background:
+        job = jobs.submit("cluster_clear", lambda job: _cluster_clear(rc, pattern, mode, job), {"pattern": pattern, "mode": mode}, cluster_ping_probe(rc))
+        response.status_code = 202
+        return job.accepted()
+    return await _cluster_clear(rc, pattern, mode)
+
+@app.get("/jobs")
+async def list_jobs(jobs: JobManager = Depends(get_jobs)):
+    return {"status": "ok", "jobs": [job.snapshot() for job in jobs.list()]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, jobs: JobManager = Depends(get_jobs)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    return {"status": "ok", **job.snapshot()}
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, jobs: JobManager = Depends(get_jobs)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    # 이미 보낸 명령은 되돌리지 않는다. 지금 기다리는 명령/배치가 끝나는 지점에서 멈춘다.
+    cancelled = job.cancel()
+    return {"status": "ok", "job_id": job_id, "cancelled": cancelled}
+
 if __name__ == "__main__":
     uvicorn.run(
         "app:app",
@@ -0,0 +1,56 @@
+import time
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import APIRouter, Depends
+
+from src.utils.decorators import measure_time
+from src.infra.redis_client import get_redis, get_async_redis
+from src.utils.key_codec import key_codec
+
+ModeRouter = APIRouter(prefix="/mode")
+
+ThreadPoolRouter = APIRouter(prefix="/threadpool")
+AsyncRouter = APIRouter(prefix="/async")
+
+SCAN_PATTERN = key_codec.key(key_codec.ns("test", "keys_scan"), "*")
+
+'''
+=== THREADPOOL ===
+sync def 핸들러는 Starlette 스레드풀(기본 40개)에서 실행되어, Redis 왕복 동안 스레드 하나를 점유한다.
+'''
+
+@ThreadPoolRouter.get("/ping")
+@measure_time
+def threadpool_ping(r: redis.Redis = Depends(get_redis)):
+    r.ping()
+    return {"status": "ok", "mode": "threadpool", "timestamp": time.time()}
+
+@ThreadPoolRouter.get("/scan")
+@measure_time
+def threadpool_scan(r: redis.Redis = Depends(get_redis)):
+    counts = sum(1 for _ in r.scan_iter(match=SCAN_PATTERN, count=10000))
+    return {"status": "ok", "mode": "threadpool", "length": counts}
+
+'''
+=== ASYNC ===
+async def 핸들러는 이벤트 루프 위에서 실행되어, Redis 응답을 기다리는 동안 다른 요청을 처리한다.
+'''
+
+@AsyncRouter.get("/ping")
+@measure_time
+async def async_ping(r: aioredis.Redis = Depends(get_async_redis)):
+    await r.ping()
+    return {"status": "ok", "mode": "async", "timestamp": time.time()}
+
+@AsyncRouter.get("/scan")
+@measure_time
+async def async_scan(r: aioredis.Redis = Depends(get_async_redis)):
+    counts = 0
+    async for _ in r.scan_iter(match=SCAN_PATTERN, count=10000):
+        counts += 1
+    return {"status": "ok", "mode": "async", "length": counts}
+
+
+ModeRouter.include_router(ThreadPoolRouter)
+ModeRouter.include_router(AsyncRouter)
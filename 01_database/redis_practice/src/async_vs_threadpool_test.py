@@ -0,0 +1,64 @@
+"""
+조건:
+서버가 8000포트에서 실행중이고, 'POST /query/add' 를 통해 테스트 데이터를 생성했습니다.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.tests import call
+
+CONCURRENCY = 200
+SCAN_CONCURRENCY = 40
+
+
+def run_mode(mode: str):
+    print(f"\n=== {mode} ===")
+    start_evt = threading.Event()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY + SCAN_CONCURRENCY) as pool:
+        # 스레드풀(40개)을 가득 채울 만큼 scan을 먼저 걸어두고, 그 사이에 ping을 동시에 보낸다.
+        scans = [
+            pool.submit(call, f"{mode}-scan", "get", f"/mode/{mode}/scan", start_evt, None, False)
+            for _ in range(SCAN_CONCURRENCY)
+        ]
+        pings = [
+            pool.submit(call, f"{mode}-ping", "get", f"/mode/{mode}/ping", start_evt, None, False)
+            for _ in range(CONCURRENCY)
+        ]
+        t0 = time.perf_counter()
+        start_evt.set()
+        ping_times = sorted(f.result() for f in pings)
+        ping_elapsed = time.perf_counter() - t0
+        scan_times = [f.result() for f in scans]
+
+    result = {
+        "ping_rps": CONCURRENCY / ping_elapsed,
+        "ping_p50": ping_times[len(ping_times) // 2],
+        "ping_p99": ping_times[int(len(ping_times) * 0.99) - 1],
+        "scan_max": max(scan_times),
+    }
+    print(
+        f"{mode}: ping {result['ping_rps']:.1f} req/s, "
+        f"p50={result['ping_p50']:.3f}s, p99={result['ping_p99']:.3f}s, "
+        f"scan max={result['scan_max']:.3f}s"
+    )
+    return result
+
+if __name__ == "__main__":
+    threadpool_result = run_mode("threadpool")
+    time.sleep(0.5)
+    async_result = run_mode("async")
+
+    # 기대: 스레드풀이 scan에 점유된 동안 ping이 대기하므로, async 모드의 ping 꼬리 지연이 더 짧다.
+    assert async_result["ping_p99"] <= threadpool_result["ping_p99"]
+
+'''
+테스트 시나리오
+- 스레드풀 크기(40)만큼 /scan을 동시에 보내 워커를 점유시킨 상태에서 /ping 200개를 동시에 보낸다.
+- threadpool 모드는 sync def + redis.Redis, async 모드는 async def + redis.asyncio.Redis 를 사용한다.
+
+기대 결과
+- threadpool: scan이 스레드를 모두 잡고 있는 동안 ping이 스레드풀 대기열에서 기다려 p99가 scan 시간에 가까워진다.
+- async: scan이 Redis 응답을 기다리는 동안 이벤트 루프가 ping을 처리해 p99가 scan 시간과 무관하게 유지된다.
+'''
@@ -0,0 +1,178 @@
+"""
+프로젝트 루트(app.py가 있는 곳)에서 실행한다.
+
+# docker-compose로 떠 있는 환경 (앱은 8000, redis0는 6379로 노출)
+python -m src.benchmark run --target single --out base.json
+
+# docker 없이: redis-server와 앱을 직접 띄워서 실행
+python -m src.benchmark run --target single --local --start-app --out base.json
+python -m src.benchmark run --target cluster --local --start-app --size 10000 --out cluster.json
+
+# 두 결과 비교. 회귀가 있으면 종료 코드 1
+python -m src.benchmark compare base.json new.json --threshold 0.1
+
+# 열린 루프 부하: ping 200 req/s 를 보내는 동안 KEYS 를 2초에 한 번 섞는다.
+python -m src.benchmark load -w "ping=GET /redis/ping@200" -w "keys=GET /query/keys@0.5" --duration 30 --out load.json
+
+# 키 이름 형식 비교: 같은 케이스를 compact 키로 다시 돌려 키당 바이트(memory.bytes_per_key)와 처리량을 비교한다.
+python -m src.benchmark run --target single --local --start-app --out verbose.json
+python -m src.benchmark run --target single --local --start-app --key-codec compact --out compact.json
+python -m src.benchmark compare verbose.json compact.json --all
+
+# 부하 동안의 서버 쪽 차이(명령별 usec, LATENCY HISTOGRAM 백분위, INFO stats/memory)를 "keys-mix" 구간으로 함께 저장
+python -m src.benchmark load -w "keys=GET /query/keys@0.5" --duration 30 --stats-run keys-mix --out load.json
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import ExitStack
+
+import requests
+
+from src.benchmark.cases import CASES, select_cases
+from src.benchmark.compare import compare, load, print_rows
+from src.benchmark.loadgen import LoadGenerator, parse_workload, print_report
+from src.benchmark.local_redis import CLUSTER_PORTS, SINGLE_PORT, local_app, local_redis
+from src.benchmark.runner import TIMEOUT, Runner, write_json
+from src.utils.key_codec import CODECS, key_codec
+
+
+def run(args) -> int:
+    cases = select_cases(args.target, args.case, args.tag)
+    if not cases:
+        print("no cases selected", file=sys.stderr)
+        return 2
+    # direct 적재는 이 프로세스가 키를 만들고, 코덱은 import 시점의 KEY_CODEC으로 정해진다.
+    if args.direct and args.key_codec != key_codec.name:
+        print(f"--direct needs the same codec in this process: KEY_CODEC={args.key_codec} python -m src.benchmark ...", file=sys.stderr)
+        return 2
+
+    with ExitStack() as stack:
+        if args.local:
+            env = stack.enter_context(local_redis(args.target))
+            host = "127.0.0.1"
+            port = SINGLE_PORT if args.target == "single" else CLUSTER_PORTS[0]
+        else:
+            env = {}
+            host = args.redis_host or ("redis0" if args.target == "single" else "redis1")
+            port = args.redis_port or 6379
+        if args.start_app:
+            stack.enter_context(local_app(args.base_url, {**env, "KEY_CODEC": args.key_codec}))
+
+        runner = Runner(
+            args.base_url,
+            args.target,
+            host,
+            port,
+            seed=args.seed,
+            direct=args.direct,
+            size=args.size,
+            repeats=args.repeats,
+            warmup=args.warmup,
+            concurrency=args.concurrency,
+            key_codec=args.key_codec,
+        )
+        report = runner.run(cases)
+
+    write_json(report, args.out)
+    print(f"results: {args.out}")
+
+    if args.baseline:
+        rows = compare(load(args.baseline), report, args.threshold)
+        print_rows(rows, only_changed=True)
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+def load_run(args) -> int:
+    with ExitStack() as stack:
+        if args.local:
+            env = stack.enter_context(local_redis(args.target))
+            stack.enter_context(local_app(args.base_url, {**env, "KEY_CODEC": args.key_codec}))
+        generator = LoadGenerator(
+            args.base_url,
+            [parse_workload(spec) for spec in args.workload],
+            args.duration,
+            connections=args.connections,
+            arrival=args.arrival,
+            seed=args.seed,
+        )
+        # 앱의 이름 붙인 측정 구간으로 부하 동안의 서버 쪽 차이(명령별 시간/지연 분포, 클러스터 합계)를 함께 남긴다.
+        prefix = "/cluster/stats/runs" if args.target == "cluster" else "/stats/runs"
+        if args.stats_run:
+            requests.post(f"{args.base_url}{prefix}/{args.stats_run}", timeout=TIMEOUT).raise_for_status()
+        report = asyncio.run(generator.run())
+        if args.stats_run:
+            resp = requests.post(f"{args.base_url}{prefix}/{args.stats_run}/end", timeout=TIMEOUT)
+            resp.raise_for_status()
+            report["server"] = resp.json()
+
+    print_report(report)
+    write_json(report, args.out)
+    print(f"results: {args.out}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="케이스를 실행하고 JSON으로 저장")
+    p.add_argument("--target", choices=["single", "cluster"], default="single")
+    p.add_argument("--case", action="append", help="케이스 이름 prefix (여러 번 지정 가능)")
+    p.add_argument("--tag", action="append", help="keys_vs_scan, scan_count, queue, timescale, search")
+    p.add_argument("--size", type=int, help="케이스의 데이터 크기를 덮어쓴다")
+    p.add_argument("--repeats", type=int)
+    p.add_argument("--warmup", type=int)
+    p.add_argument("--concurrency", type=int)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--direct", action="store_true", help="큐/타임스케일 데이터를 HTTP 대신 Redis에 바로 적재")
+    p.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    p.add_argument("--redis-host")
+    p.add_argument("--redis-port", type=int)
+    p.add_argument("--local", action="store_true", help="redis-server를 직접 띄운다 (docker 불필요)")
+    p.add_argument("--start-app", action="store_true", help="uvicorn으로 app을 직접 띄운다")
+    p.add_argument("--key-codec", choices=list(CODECS), default=key_codec.name, help="키 이름 형식. 띄우는 앱에 KEY_CODEC으로 넘긴다")
+    p.add_argument("--out", default="benchmark.json")
+    p.add_argument("--baseline", help="실행 후 이 결과와 비교한다")
+    p.add_argument("--threshold", type=float, default=0.1)
+
+    p = sub.add_parser("compare", help="두 결과 JSON을 비교")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.1)
+    p.add_argument("--all", action="store_true", help="회귀가 아닌 지표도 출력")
+
+    p = sub.add_parser("load", help="목표 요청률로 열린 루프 부하를 보낸다")
+    p.add_argument("-w", "--workload", action="append", required=True, help='"[name=]METHOD /path@rate", 여러 번 지정해 섞는다')
+    p.add_argument("--duration", type=float, default=30)
+    p.add_argument("--connections", type=int, default=64, help="keep-alive 연결 수 상한")
+    p.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    p.add_argument("--target", choices=["single", "cluster"], default="single")
+    p.add_argument("--local", action="store_true", help="redis-server와 앱을 직접 띄운다")
+    p.add_argument("--key-codec", choices=list(CODECS), default=key_codec.name, help="키 이름 형식. 띄우는 앱에 KEY_CODEC으로 넘긴다")
+    p.add_argument("--stats-run", help="이 이름으로 앱의 /stats/runs 구간을 열고 닫아 서버 통계 차이를 결과에 넣는다")
+    p.add_argument("--out", default="load.json")
+
+    sub.add_parser("list", help="케이스 목록")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        return run(args)
+    if args.command == "load":
+        return load_run(args)
+    if args.command == "compare":
+        rows = compare(load(args.base), load(args.new), args.threshold)
+        print_rows(rows, only_changed=not args.all)
+        return 1 if any(row["regression"] for row in rows) else 0
+    for case in CASES:
+        print(f"{case.dataset.target:<8} {case.name:<32} sizes={case.sizes} concurrency={case.concurrency} {case.request.method.upper()} {case.request.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
+
+from src.benchmark.loader import queue_commands, timescale_commands
+from src.utils.datagen import hourly_timestamps, queue_ndjson, timescale_ndjson, user_ids
+
+Target = Literal["single", "cluster"]
+
+
+@dataclass(frozen=True)
+class Step:
+    method: Literal["get", "post", "delete"]
+    path: str
+    body: Any = None
+
+
+@dataclass(frozen=True)
+class Upload:
+    """NDJSON 청크를 parallel개씩 동시에 올린다. (src/utils/datagen.upload)"""
+    path: str
+    chunks: Iterable[bytes]
+    parallel: int = 4
+
+
+@dataclass(frozen=True)
+class Direct:
+    """HTTP를 거치지 않고 Redis에 명령을 바로 보낸다. (src/benchmark/loader.load_commands)"""
+    commands: Iterable[Tuple]
+
+
+SetupItem = Union[Step, Upload, Direct]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """케이스들이 공유하는 적재 단계. (name, size)가 같으면 한 번만 적재한다.
+
+    setup(size, seed, direct): direct=True면 가능한 부분은 Redis에 바로 적재한다.
+    """
+    name: str
+    target: Target
+    setup: Callable[[int, str, bool], Iterator[SetupItem]]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    dataset: Dataset
+    request: Step
+    sizes: Tuple[int, ...]
+    warmup: int = 3
+    repeats: int = 20
+    concurrency: Tuple[int, ...] = (1,)
+    # 측정하는 동안 다른 스레드에서 계속 보내는 요청 (예: KEYS 중의 ping 지연)
+    background: Optional[Step] = None
+    tags: Tuple[str, ...] = field(default_factory=tuple)
+
+
+'''
+=== DATASETS ===
+'''
+
+def _keys_scan_setup(size: int, seed: str, direct: bool) -> Iterator[SetupItem]:
+    yield Step("delete", "/clear?pattern=test:keys_scan:*&mode=server")
+    # direct면 HTTP 서버가 RESP를 바로 흘려보내는 mass insert 로더를 쓴다.
+    yield Step("post", f"/query/add?count={size}" + ("&loader=resp" if direct else ""))
+
+
+def _queue_setup(struct_type: str):
+    def setup(size: int, seed: str, direct: bool) -> Iterator[SetupItem]:
+        yield Step("delete", f"/clear?pattern=test:{struct_type}&mode=server")
+        users = ["user_first", *user_ids(size, seed), "user_last"]
+        if direct:
+            yield Direct(queue_commands(struct_type, users))
+        else:
+            # 큐는 순서가 결과(position)에 영향을 주므로 청크를 하나씩 순서대로 보낸다.
+            yield Upload(f"/queue/{struct_type}/ingest", queue_ndjson(users), parallel=1)
+    return setup
+
+
+def _timescale_setup(struct_type: str):
+    def setup(size: int, seed: str, direct: bool) -> Iterator[SetupItem]:
+        yield Step("delete", "/clear?pattern=test:timescale:*&mode=server")
+        users = user_ids(size, seed)
+        timestamps = hourly_timestamps(datetime(2025, 1, 1))
+        if direct:
+            yield Direct(timescale_commands(struct_type, users, timestamps))
+        else:
+            yield Upload(f"/time-scale/{struct_type}/ingest?rollup=false", timescale_ndjson(users, timestamps))
+        yield Step("post", f"/time-scale/{struct_type}", [("user_target", datetime(2025, 12, 18, 12).isoformat())])
+    return setup
+
+
+def _search_setup(layout: str):
+    def setup(size: int, seed: str, direct: bool) -> Iterator[SetupItem]:
+        yield Step("delete", "/cluster/clear?mode=server")
+        # size는 유저 한 명당 키 수. 유저는 기존 테스트처럼 100명.
+        loader = "&loader=resp" if direct else ""
+        yield Step("post", f"/search/{layout}/add?per_user={size}{loader}", list(range(100)))
+    return setup
+
+
+KEYS_SCAN = Dataset("keys_scan", "single", _keys_scan_setup)
+QUEUE_LIST = Dataset("queue_list", "single", _queue_setup("list"))
+QUEUE_ZSET = Dataset("queue_zset", "single", _queue_setup("zset"))
+TIMESCALE_HSET = Dataset("timescale_hset", "single", _timescale_setup("hset"))
+TIMESCALE_STRING = Dataset("timescale_string", "single", _timescale_setup("string"))
+TIMESCALE_BITFIELD = Dataset("timescale_bitfield", "single", _timescale_setup("bitfield"))
+SEARCH_HASH_TAG = Dataset("search_hash_tag", "cluster", _search_setup("hash-tag"))
+SEARCH_HIERACHY = Dataset("search_hierachy", "cluster", _search_setup("hierachy"))
+
+
+'''
+=== CASES ===
+기존 *_test.py 시나리오를 그대로 옮겼다. 크기는 기존 값(100만~1000만)보다 작게 잡고 --size 로 덮어쓴다.
+'''
+
+def _queue_cases(dataset: Dataset, struct_type: str) -> List[Case]:
+    sizes = (100000, 1000000)
+    return [
+        Case(f"{struct_type}.top100", dataset, Step("get", f"/queue/{struct_type}/top100"), sizes, tags=("queue",)),
+        Case(f"{struct_type}.bottom100", dataset, Step("get", f"/queue/{struct_type}/bottom100"), sizes, tags=("queue",)),
+        Case(f"{struct_type}.position_first", dataset, Step("get", f"/queue/{struct_type}/position?user_id=user_first"), sizes, tags=("queue",)),
+        Case(f"{struct_type}.position_last", dataset, Step("get", f"/queue/{struct_type}/position?user_id=user_last"), sizes, tags=("queue",)),
+    ]
+
+
+def _timescale_cases(dataset: Dataset, struct_type: str) -> List[Case]:
+    sizes = (10000, 100000)
+    return [
+        Case(f"{struct_type}.find_scan", dataset, Step("get", f"/time-scale/{struct_type}?user_id=user_target"), sizes, repeats=5, tags=("timescale",)),
+        Case(
+            f"{struct_type}.range_day",
+            dataset,
+            Step("get", f"/time-scale/{struct_type}/range?user_id=user_target&from=2025-12-01T00:00:00&to=2025-12-31T23:00:00"),
+            sizes,
+            tags=("timescale",),
+        ),
+        Case(
+            f"{struct_type}.range_month",
+            dataset,
+            Step("get", f"/time-scale/{struct_type}/range?user_id=user_target&from=2025-01-01T00:00:00&to=2025-12-31T23:00:00&resolution=month"),
+            sizes,
+            tags=("timescale",),
+        ),
+    ]
+
+
+def _search_cases(dataset: Dataset, layout: str) -> List[Case]:
+    sizes = (10000, 100000)
+    return [
+        Case(f"{layout}.count_scan", dataset, Step("get", f"/search/{layout}?user_id=1&mode=scan"), sizes, repeats=5, tags=("search",)),
+        Case(f"{layout}.count_index", dataset, Step("get", f"/search/{layout}?user_id=1&mode=index"), sizes, tags=("search",)),
+        Case(f"{layout}.list_index", dataset, Step("get", f"/search/{layout}/keys?user_id=1&limit=100"), sizes, tags=("search",)),
+    ]
+
+
+def _scan_count_cases() -> List[Case]:
+    # 고정 COUNT(1000, 10000)와 지연 목표로 조절하는 COUNT(None)를 같은 데이터에서 비교한다.
+    # 처리량은 /query/scan/count 지연으로, 다른 클라이언트에 주는 영향은 그동안의 ping 꼬리 지연으로 본다.
+    sizes = (1000000,)
+    cases = []
+    for label, query in (("fixed1000", "?count=1000"), ("fixed10000", "?count=10000"), ("adaptive", "")):
+        cases += [
+            Case(f"scan_count.{label}", KEYS_SCAN, Step("get", f"/query/scan/count{query}"), sizes, repeats=5, tags=("scan_count",)),
+            Case(
+                f"scan_count.{label}.ping_under_load",
+                KEYS_SCAN,
+                Step("get", "/redis/ping"),
+                sizes,
+                repeats=500,
+                background=Step("get", f"/query/scan/count{query}"),
+                tags=("scan_count",),
+            ),
+        ]
+    return cases
+
+
+CASES: List[Case] = [
+    Case("keys.query", KEYS_SCAN, Step("get", "/query/keys"), (100000, 1000000), repeats=5, tags=("keys_vs_scan",)),
+    Case("scan.query", KEYS_SCAN, Step("get", "/query/scan"), (100000, 1000000), repeats=5, tags=("keys_vs_scan",)),
+    Case(
+        "keys.ping_under_load",
+        KEYS_SCAN,
+        Step("get", "/redis/ping"),
+        (100000, 1000000),
+        repeats=200,
+        background=Step("get", "/query/keys"),
+        tags=("keys_vs_scan",),
+    ),
+    Case(
+        "scan.ping_under_load",
+        KEYS_SCAN,
+        Step("get", "/redis/ping"),
+        (100000, 1000000),
+        repeats=200,
+        background=Step("get", "/query/scan"),
+        tags=("keys_vs_scan",),
+    ),
+    Case("redis.ping", KEYS_SCAN, Step("get", "/redis/ping"), (100000,), repeats=1000, concurrency=(1, 8, 32), tags=("keys_vs_scan",)),
+    *_scan_count_cases(),
+    *_queue_cases(QUEUE_LIST, "list"),
+    *_queue_cases(QUEUE_ZSET, "zset"),
+    *_timescale_cases(TIMESCALE_HSET, "hset"),
+    *_timescale_cases(TIMESCALE_STRING, "string"),
+    *_timescale_cases(TIMESCALE_BITFIELD, "bitfield"),
+    *_search_cases(SEARCH_HASH_TAG, "hash-tag"),
+    *_search_cases(SEARCH_HIERACHY, "hierachy"),
+]
+
+
+def select_cases(target: Target, names: List[str] | None = None, tags: List[str] | None = None) -> List[Case]:
+    cases = [case for case in CASES if case.dataset.target == target]
+    if names:
+        cases = [case for case in cases if any(case.name.startswith(name) for name in names)]
+    if tags:
+        cases = [case for case in cases if set(tags) & set(case.tags)]
+    return cases
+
+
+def case_key(result: Dict[str, Any]) -> str:
+    return f"{result['case']}[size={result['size']},c={result['concurrency']}]"
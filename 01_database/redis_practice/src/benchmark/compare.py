@@ -0,0 +1,65 @@
+import json
+from typing import Any, Dict, List
+
+from src.benchmark.cases import case_key
+
+# (결과 경로, 클수록 나쁜지)
+METRICS = (
+    ("latency.p50", True),
+    ("latency.p99", True),
+    ("throughput", False),
+    ("redis_per_request.commands", True),
+    ("redis_per_request.round_trips", True),
+    ("memory.bytes_per_key", True),
+)
+
+
+def _get(result: Dict[str, Any], path: str) -> float:
+    value: Any = result
+    for part in path.split("."):
+        value = value.get(part, 0) if isinstance(value, dict) else 0
+    return float(value or 0)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.1, min_latency: float = 0.001) -> List[Dict[str, Any]]:
+    """두 실행 결과를 케이스별로 맞춰 threshold 이상 나빠진 지표를 표시한다.
+
+    min_latency 보다 짧은 지연은 잡음이 커서 절대 차이가 그보다 작으면 회귀로 보지 않는다.
+    """
+    base_results = {case_key(result): result for result in base["results"]}
+    rows = []
+    for result in new["results"]:
+        key = case_key(result)
+        prev = base_results.get(key)
+        if prev is None:
+            continue
+        for path, higher_is_worse in METRICS:
+            old, cur = _get(prev, path), _get(result, path)
+            if old == 0:
+                continue
+            change = (cur - old) / old
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if worse and path.startswith("latency.") and abs(cur - old) < min_latency:
+                worse = False
+            rows.append({
+                "case": key,
+                "metric": path,
+                "base": old,
+                "new": cur,
+                "change": round(change, 4),
+                "regression": worse,
+            })
+    return rows
+
+
+def print_rows(rows: List[Dict[str, Any]], only_changed: bool = False):
+    for row in rows:
+        if only_changed and not row["regression"]:
+            continue
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<60} {row['metric']:<32} {row['base']:>12.4f} -> {row['new']:>12.4f} ({row['change'] * 100:+.1f}%) {flag}")
@@ -0,0 +1,59 @@
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+import redis
+
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE
+from src.list_vs_zset import LIST_KEY, ZSET_KEY
+from src.string_vs_hset import Backend, hour_key, increment_command, unrolled_command
+
+'''
+HTTP를 거치지 않고 Redis에 바로 적재한다. 조회 성능만 볼 때 적재 시간을 줄이는 용도.
+키/명령 형식은 라우터 모듈의 것을 그대로 써서 HTTP 적재와 같은 데이터가 만들어진다.
+'''
+
+
+def timescale_commands(backend: Backend, users: Sequence[str], timestamps: Sequence[str]) -> Iterator[Tuple]:
+    for ts in timestamps:
+        hour = datetime.fromisoformat(ts)
+        for user_id in users:
+            key, field = hour_key(user_id, backend, hour)
+            yield increment_command(backend, key, field)
+    # rollup=false 적재와 같게, 롤업 없이 넣은 일/월을 표시해 둔다. (범위 조회가 이 구간을 시간 버킷으로 읽는다)
+    if timestamps:
+        yield unrolled_command(backend, (datetime.fromisoformat(ts) for ts in timestamps))
+
+
+def queue_commands(struct_type: str, users: Sequence[str]) -> Iterator[Tuple]:
+    if struct_type == "list":
+        for user_id in users:
+            yield ("RPUSH", LIST_KEY, user_id)
+    else:
+        # ZSET은 넣는 순서대로 score가 커지기만 하면 되므로 시각 대신 순번을 쓴다.
+        for i, user_id in enumerate(users):
+            yield ("ZADD", ZSET_KEY, i, user_id)
+
+
+def load_commands(client: redis.Redis, commands: Iterable[Tuple], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """명령을 chunk_size개씩 파이프라인(transaction 없이)으로 보낸다. RedisCluster면 노드별로 나뉘어 간다."""
+    t0 = time.perf_counter()
+    total = 0
+    pipe = client.pipeline(transaction=False)
+    pending = 0
+    for command in commands:
+        pipe.execute_command(*command)
+        pending += 1
+        if pending >= chunk_size:
+            pipe.execute()
+            total += pending
+            pending = 0
+    if pending:
+        pipe.execute()
+        total += pending
+    elapsed = time.perf_counter() - t0
+    return {
+        "commands": total,
+        "elapsed": round(elapsed, 3),
+        "items_per_sec": round(total / elapsed, 1) if elapsed else 0,
+    }
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.benchmark.cases import Step
+from src.benchmark.runner import TIMEOUT, summarize
+
+'''
+열린 루프(open-loop) 부하 생성기.
+스레드마다 요청 하나를 보내고 응답을 기다리는 방식(closed-loop)은 서버가 멈추면 보내는 쪽도 같이 멈춰서,
+그 사이에 보냈어야 할 요청들의 대기 시간이 결과에 잡히지 않는다. (coordinated omission)
+여기서는 요청마다 "보내기로 한 시각"을 미리 정해두고, 응답 시각 - 예정 시각을 지연으로 기록한다.
+'''
+
+Arrival = Literal["uniform", "poisson"]
+
+
+class _StaleConnection(ConnectionError):
+    """응답을 한 바이트도 받기 전에 끊긴 연결. 서버가 유휴 keep-alive 연결을 먼저 닫은 경우다."""
+
+
+class _Connection:
+    """keep-alive HTTP/1.1 연결 하나. 응답 본문은 읽어서 버리고 크기만 센다."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, head: bytes, body: bytes) -> Tuple[int, int, bool]:
+        try:
+            self.writer.write(head + body)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        except OSError as e:
+            raise _StaleConnection(str(e)) from e
+        if not status_line:
+            raise _StaleConnection("connection closed by server")
+        status = int(status_line.split()[1])
+
+        length: Optional[int] = None
+        chunked = False
+        close = False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value
+            elif name == b"connection":
+                close = value == b"close"
+
+        size = 0
+        if chunked:
+            # StreamingResponse(NDJSON)는 chunked로 온다.
+            while True:
+                n = int((await self.reader.readline()).split(b";")[0], 16)
+                if n == 0:
+                    while (await self.reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    break
+                await self.reader.readexactly(n + 2)
+                size += n
+        elif length is not None:
+            await self.reader.readexactly(length)
+            size = length
+        else:
+            size = len(await self.reader.read())
+            close = True
+        return status, size, close
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpPool:
+    """최대 size개의 keep-alive 연결을 재사용한다. 연결이 모두 사용 중이면 비워질 때까지 기다린다."""
+
+    def __init__(self, base_url: str, size: int):
+        url = urlsplit(base_url)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[_Connection] = []
+        self.opened = 0
+        self.retried = 0
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    def _head(self, step: Step, body: bytes) -> bytes:
+        head = f"{step.method.upper()} {step.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if body:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        return (head + "\r\n").encode()
+
+    async def request(self, step: Step, on_send=None) -> Tuple[int, int]:
+        body = json.dumps(step.body).encode() if step.body is not None else b""
+        async with self._slots:
+            if on_send is not None:
+                on_send()
+            head = self._head(step, body)
+            conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            if conn is None:
+                conn = await self._open()
+            try:
+                status, size, close = await conn.request(head, body)
+            except _StaleConnection:
+                conn.close()
+                # uvicorn은 유휴 연결을 5초 뒤 닫는다. 재사용한 연결이 응답 전에 끊겼으면 새 연결로 한 번만 다시 보낸다.
+                if not reused:
+                    raise
+                self.retried += 1
+                conn = await self._open()
+                try:
+                    status, size, close = await conn.request(head, body)
+                except BaseException:
+                    conn.close()
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+            if close:
+                conn.close()
+            else:
+                self._idle.append(conn)
+            return status, size
+
+    def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+
+
+@dataclass(frozen=True)
+class Workload:
+    name: str
+    step: Step
+    rate: float
+
+
+def parse_workload(spec: str) -> Workload:
+    """"[name=]METHOD /path@rate" 형식. 예: "ping=GET /redis/ping@200", "GET /query/keys@0.5" """
+    name, _, rest = spec.partition("=") if "=" in spec.split(" ", 1)[0] else ("", "", spec)
+    request, _, rate = rest.rpartition("@")
+    method, _, path = request.strip().partition(" ")
+    step = Step(method.lower(), path.strip())
+    return Workload(name or f"{method.upper()} {step.path}", step, float(rate))
+
+
+class _Recorder:
+    def __init__(self, workload: Workload):
+        self.workload = workload
+        self.latencies: List[float] = []
+        self.service: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+        self.sent = 0
+        self.bytes_received = 0
+        self.max_lag = 0.0
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        base_url: str,
+        workloads: List[Workload],
+        duration: float,
+        connections: int = 64,
+        arrival: Arrival = "uniform",
+        seed: int = 0,
+    ):
+        self.base_url = base_url
+        self.workloads = workloads
+        self.duration = duration
+        self.connections = connections
+        self.arrival = arrival
+        self.seed = seed
+
+    async def _fire(self, pool: HttpPool, rec: _Recorder, intended: float):
+        loop = asyncio.get_running_loop()
+        sent_at = intended
+
+        def on_send():
+            nonlocal sent_at
+            sent_at = loop.time()
+
+        try:
+            status, size = await asyncio.wait_for(pool.request(rec.workload.step, on_send), TIMEOUT)
+            rec.statuses[status] = rec.statuses.get(status, 0) + 1
+            rec.bytes_received += size
+            if status >= 400:
+                rec.errors += 1
+        # 서버가 본문 중간에 연결을 끊으면 readexactly가 IncompleteReadError(EOFError)를 낸다.
+        except (OSError, EOFError, asyncio.TimeoutError, ValueError):
+            rec.errors += 1
+        done = loop.time()
+        # 예정 시각 기준 지연(서버 대기 + 연결 대기 포함)과 실제 전송 후 응답까지의 시간을 따로 남긴다.
+        rec.latencies.append(done - intended)
+        rec.service.append(done - sent_at)
+
+    async def _schedule(self, pool: HttpPool, rec: _Recorder, start: float, tasks: set):
+        loop = asyncio.get_running_loop()
+        rng = random.Random(f"{self.seed}:{rec.workload.name}")
+        interval = 1 / rec.workload.rate
+        end = start + self.duration
+        intended = start
+        while intended < end:
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # 이벤트 루프가 밀려 예정보다 늦게 깨어난 정도. 크면 부하 생성기 자체가 병목이다.
+            rec.max_lag = max(rec.max_lag, loop.time() - intended)
+            task = asyncio.create_task(self._fire(pool, rec, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            rec.sent += 1
+            intended += rng.expovariate(rec.workload.rate) if self.arrival == "poisson" else interval
+
+    async def run(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        pool = HttpPool(self.base_url, self.connections)
+        recorders = [_Recorder(workload) for workload in self.workloads]
+        tasks: set = set()
+        start = loop.time() + 0.1
+        try:
+            await asyncio.gather(*(self._schedule(pool, rec, start, tasks) for rec in recorders))
+            while tasks:
+                await asyncio.gather(*list(tasks))
+        finally:
+            pool.close()
+        wall = loop.time() - start
+        return {
+            "meta": {
+                "mode": "open-loop",
+                "base_url": self.base_url,
+                "duration": self.duration,
+                "connections": self.connections,
+                "connections_opened": pool.opened,
+                "stale_retries": pool.retried,
+                "arrival": self.arrival,
+                "seed": self.seed,
+            },
+            "results": [self._report(rec, wall) for rec in recorders],
+        }
+
+    def _report(self, rec: _Recorder, wall: float) -> Dict[str, Any]:
+        # compare 모드와 키 형식을 맞춘다. (size는 의미가 없어 0)
+        return {
+            "case": rec.workload.name,
+            "request": f"{rec.workload.step.method.upper()} {rec.workload.step.path}",
+            "size": 0,
+            "concurrency": self.connections,
+            "target_rate": rec.workload.rate,
+            "sent": rec.sent,
+            "completed": len(rec.latencies),
+            "errors": rec.errors,
+            "statuses": rec.statuses,
+            "throughput": round(len(rec.latencies) / wall, 1) if wall else 0,
+            "bytes_received": rec.bytes_received,
+            "max_schedule_lag": round(rec.max_lag, 6),
+            "latency": summarize(rec.latencies),
+            "service_time": summarize(rec.service),
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    for result in report["results"]:
+        latency, service = result["latency"], result["service_time"]
+        print(
+            f"{result['case']}: {result['throughput']:.1f}/{result['target_rate']:g} req/s, errors={result['errors']}, "
+            f"latency p50={latency['p50'] * 1000:.2f}ms p99={latency['p99'] * 1000:.2f}ms p999={latency['p999'] * 1000:.2f}ms max={latency['max'] * 1000:.2f}ms "
+            f"(service p99={service['p99'] * 1000:.2f}ms)"
+        )
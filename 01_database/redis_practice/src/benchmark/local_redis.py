@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence
+
+import redis
+import requests
+
+from src.benchmark.cases import Target
+
+CLUSTER_SLOTS = 16384
+SINGLE_PORT = 6379
+CLUSTER_PORTS = (7001, 7002, 7003)
+
+
+def _wait(check, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if check():
+                return
+        except (redis.ConnectionError, requests.ConnectionError):
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{what} did not come up in {timeout}s")
+        time.sleep(0.1)
+
+
+def _start_server(workdir: str, port: int, cluster: bool) -> subprocess.Popen:
+    binary = shutil.which("redis-server")
+    if binary is None:
+        raise RuntimeError("redis-server not found in PATH")
+    args = [
+        binary,
+        "--port", str(port),
+        "--bind", "127.0.0.1",
+        "--dir", workdir,
+        "--save", "",
+        "--appendonly", "no",
+    ]
+    if cluster:
+        args += [
+            "--cluster-enabled", "yes",
+            "--cluster-config-file", f"nodes-{port}.conf",
+            "--cluster-node-timeout", "5000",
+        ]
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    _wait(lambda: redis.Redis(port=port).ping(), 10, f"redis-server:{port}")
+    return proc
+
+
+def _create_cluster(ports: Sequence[int]):
+    # redis-cli --cluster create 와 같은 일을 한다: 슬롯을 균등 분배하고 서로 MEET 시킨다.
+    clients = [redis.Redis(port=port) for port in ports]
+    per_node = CLUSTER_SLOTS // len(ports)
+    for i, client in enumerate(clients):
+        start = i * per_node
+        end = CLUSTER_SLOTS - 1 if i == len(ports) - 1 else start + per_node - 1
+        client.execute_command("CLUSTER", "ADDSLOTSRANGE", start, end)
+    for port in ports[1:]:
+        clients[0].execute_command("CLUSTER", "MEET", "127.0.0.1", port)
+    _wait(
+        lambda: all(client.cluster("info")["cluster_state"] == "ok" for client in clients),
+        30,
+        "cluster",
+    )
+
+
+@contextmanager
+def local_redis(target: Target) -> Iterator[Dict[str, str]]:
+    """docker 없이 redis-server를 띄운다. 앱에 넘길 환경변수를 돌려준다."""
+    workdir = tempfile.mkdtemp(prefix="redis-bench-")
+    procs: List[subprocess.Popen] = []
+    try:
+        if target == "single":
+            procs.append(_start_server(workdir, SINGLE_PORT, cluster=False))
+            env = {"REDIS_HOST": "127.0.0.1", "REDIS_PORT": str(SINGLE_PORT)}
+        else:
+            for port in CLUSTER_PORTS:
+                procs.append(_start_server(workdir, port, cluster=True))
+            _create_cluster(CLUSTER_PORTS)
+            env = {"REDIS_CLUSTER_HOST": "127.0.0.1", "REDIS_CLUSTER_PORT": str(CLUSTER_PORTS[0])}
+        yield env
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@contextmanager
+def local_app(base_url: str, env: Dict[str, str]) -> Iterator[None]:
+    """app.py를 같은 환경변수로 띄운다. 프로젝트 루트(app.py가 있는 곳)에서 실행해야 한다."""
+    port = base_url.rsplit(":", 1)[-1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", port, "--log-level", "warning"],
+        env={**os.environ, **env},
+    )
+    try:
+        _wait(lambda: requests.get(f"{base_url}/metrics/json", timeout=1).ok, 30, "app")
+        yield
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
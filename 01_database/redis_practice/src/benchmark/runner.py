@@ -0,0 +1,270 @@
+import json
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+import requests
+from redis.cluster import RedisCluster
+
+from src.benchmark.cases import Case, Direct, SetupItem, Step, Target, Upload, case_key
+from src.benchmark.loader import load_commands
+from src.infra.adaptive_scan import node_name
+from src.infra.server_stats import Snapshot, diff, parse_node
+from src.utils.datagen import upload
+
+TIMEOUT = 600
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    res = {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 6) if values else 0.0,
+        "min": round(values[0], 6) if values else 0.0,
+        "max": round(values[-1], 6) if values else 0.0,
+    }
+    for p in PERCENTILES:
+        res[f"p{p:g}".replace(".", "")] = round(percentile(values, p), 6)
+    return res
+
+
+class RedisProbe:
+    """벤치마크 대상 Redis(클러스터면 모든 프라이머리)에서 INFO를 직접 읽는다."""
+
+    def __init__(self, target: Target, host: str, port: int):
+        if target == "single":
+            self.client = redis.Redis(host=host, port=port, decode_responses=True)
+            self.nodes = [self.client]
+        else:
+            self.client = RedisCluster(host=host, port=port, decode_responses=True)
+            self.nodes = [
+                redis.Redis(host=node.host, port=node.port, decode_responses=True)
+                for node in self.client.get_primaries()
+            ]
+
+    def snapshot(self) -> Snapshot:
+        """모든 노드의 commandstats/INFO/LATENCY 스냅샷. 노드들을 동시에 읽는다."""
+        def read(node: redis.Redis):
+            info = node.info("commandstats", "memory", "stats")
+            return parse_node(info, node.execute_command("LATENCY LATEST"), node.execute_command("LATENCY HISTOGRAM"))
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=len(self.nodes)) as pool:
+            results = list(pool.map(read, self.nodes))
+        return {"at": started, "nodes": {node_name(node): result for node, result in zip(self.nodes, results)}}
+
+    def memory(self) -> Dict[str, Any]:
+        used = sum(int(node.info(section="memory").get("used_memory", 0)) for node in self.nodes)
+        keys = sum(node.dbsize() for node in self.nodes)
+        return {
+            "used_memory": used,
+            "keys": keys,
+            "bytes_per_key": round(used / keys, 1) if keys else 0,
+        }
+
+    def version(self) -> str:
+        return self.nodes[0].info(section="server").get("redis_version", "")
+
+
+def commandstats_delta(server: Dict[str, Any], requests_sent: int) -> Dict[str, Dict[str, float]]:
+    """구간 차이(server_stats.diff의 total)에서 명령별 호출 수/시간을 요청 하나 기준으로 본다."""
+    res = {}
+    for name, stat in server["commands"].items():
+        res[name] = {
+            "calls": stat["calls"],
+            "usec": stat["usec"],
+            "usec_per_call": stat["usec_per_call"],
+            "calls_per_request": round(stat["calls"] / requests_sent, 2) if requests_sent else 0,
+        }
+    return res
+
+
+class Runner:
+    def __init__(
+        self,
+        base_url: str,
+        target: Target,
+        redis_host: str,
+        redis_port: int,
+        seed: int = 0,
+        direct: bool = False,
+        size: Optional[int] = None,
+        repeats: Optional[int] = None,
+        warmup: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        key_codec: str = "verbose",
+    ):
+        self.base_url = base_url
+        self.target = target
+        self.seed = seed
+        self.direct = direct
+        self.size = size
+        self.repeats = repeats
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.key_codec = key_codec
+        self.probe = RedisProbe(target, redis_host, redis_port)
+        self.session = requests.Session()
+        self._loaded: Optional[Tuple[str, int]] = None
+        self._memory: Dict[str, Any] = {}
+
+    def send(self, step: Step, session: Optional[requests.Session] = None) -> Tuple[float, requests.Response]:
+        session = session or self.session
+        t0 = time.perf_counter()
+        resp = session.request(step.method.upper(), f"{self.base_url}{step.path}", json=step.body, timeout=TIMEOUT)
+        return time.perf_counter() - t0, resp
+
+    def setup(self, item: SetupItem) -> Dict[str, Any]:
+        if isinstance(item, Upload):
+            return upload(self.base_url, item.path, item.chunks, item.parallel)
+        if isinstance(item, Direct):
+            return load_commands(self.probe.client, item.commands)
+        _, resp = self.send(item)
+        resp.raise_for_status()
+        return {}
+
+    def load(self, case: Case, size: int):
+        if self._loaded == (case.dataset.name, size):
+            return
+        print(f"=== {case.dataset.name} size={size} 적재 중 ===")
+        # 같은 시드 + 같은 크기면 항상 같은 데이터가 만들어진다.
+        seed = f"{self.seed}:{case.dataset.name}:{size}"
+        t0 = time.perf_counter()
+        loads = [self.setup(item) for item in case.dataset.setup(size, seed, self.direct)]
+        self._memory = {
+            **self.probe.memory(),
+            "load_seconds": round(time.perf_counter() - t0, 3),
+            "load_items_per_sec": max((res.get("items_per_sec", 0) for res in loads), default=0),
+        }
+        self._loaded = (case.dataset.name, size)
+
+    def _measure(self, case: Case, concurrency: int, repeats: int) -> Tuple[List[float], Dict[str, List[float]], int, float]:
+        latencies: List[float] = []
+        trace: Dict[str, List[float]] = {"commands": [], "round_trips": [], "redis_time_ms": []}
+        errors = 0
+        lock = threading.Lock()
+        local = threading.local()
+
+        def one(_):
+            nonlocal errors
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            dt, resp = self.send(case.request, local.session)
+            with lock:
+                latencies.append(dt)
+                if not resp.ok:
+                    errors += 1
+                trace["commands"].append(float(resp.headers.get("X-Redis-Commands", 0)))
+                trace["round_trips"].append(float(resp.headers.get("X-Redis-Round-Trips", 0)))
+                trace["redis_time_ms"].append(float(resp.headers.get("X-Redis-Time-Ms", 0)))
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(repeats)))
+        return latencies, trace, errors, time.perf_counter() - t0
+
+    def run_case(self, case: Case, size: int, concurrency: int) -> Dict[str, Any]:
+        self.load(case, size)
+        warmup = case.warmup if self.warmup is None else self.warmup
+        repeats = case.repeats if self.repeats is None else self.repeats
+
+        for _ in range(warmup):
+            self.send(case.request)
+
+        stop = threading.Event()
+        background = None
+        if case.background is not None:
+            def loop():
+                session = requests.Session()
+                while not stop.is_set():
+                    self.send(case.background, session)
+            background = threading.Thread(target=loop, daemon=True)
+            background.start()
+            # 백그라운드 요청이 서버에 도착할 시간을 준다.
+            time.sleep(0.05)
+
+        before = self.probe.snapshot()
+        try:
+            latencies, trace, errors, wall = self._measure(case, concurrency, repeats)
+        finally:
+            stop.set()
+        after = self.probe.snapshot()
+        if background is not None:
+            background.join()
+        server = diff(before, after)["total"]
+
+        result = {
+            "case": case.name,
+            "dataset": case.dataset.name,
+            "request": f"{case.request.method.upper()} {case.request.path}",
+            "background": f"{case.background.method.upper()} {case.background.path}" if case.background else None,
+            "size": size,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "repeats": repeats,
+            "errors": errors,
+            "wall_seconds": round(wall, 3),
+            "throughput": round(repeats / wall, 1) if wall else 0,
+            "latency": summarize(latencies),
+            "redis_per_request": {name: round(sum(values) / len(values), 2) if values else 0 for name, values in trace.items()},
+            "commandstats": commandstats_delta(server, repeats),
+            # 명령별 서버 지연 백분위(LATENCY HISTOGRAM), INFO stats/memory 변화, 지연 이벤트
+            "server": server,
+            "memory": self._memory,
+        }
+        latency = result["latency"]
+        print(
+            f"{case_key(result)}: p50={latency['p50'] * 1000:.2f}ms p99={latency['p99'] * 1000:.2f}ms "
+            f"max={latency['max'] * 1000:.2f}ms {result['throughput']:.0f} req/s errors={errors}"
+        )
+        return result
+
+    def run(self, cases: List[Case]) -> Dict[str, Any]:
+        # 같은 데이터셋/크기를 쓰는 케이스를 붙여 적재를 한 번만 한다.
+        plan = []
+        for case in cases:
+            sizes = (self.size,) if self.size else case.sizes
+            levels = (self.concurrency,) if self.concurrency else case.concurrency
+            plan += [(case, size, c) for size in sizes for c in levels]
+        plan.sort(key=lambda item: (item[0].dataset.name, item[1]))
+
+        started = datetime.now(timezone.utc).isoformat()
+        results = [self.run_case(case, size, c) for case, size, c in plan]
+        return {"meta": self.meta(started), "results": results}
+
+    def meta(self, started: str) -> Dict[str, Any]:
+        try:
+            rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+        except OSError:
+            rev = ""
+        return {
+            "started_at": started,
+            "git_rev": rev,
+            "target": self.target,
+            "seed": self.seed,
+            "direct": self.direct,
+            "key_codec": self.key_codec,
+            "base_url": self.base_url,
+            "redis_version": self.probe.version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+
+
+def write_json(report: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,55 @@
+"""
+조건:
+서버가 8000포트에서 실행중입니다.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.tests import call
+
+PING_COUNT = 50
+# 서버 삭제 중 /redis/ping 최대 지연 허용치 (HTTP 왕복 포함)
+PING_MAX_SECONDS = 0.1
+
+
+def ping_loop(stop_evt: threading.Event):
+    times = []
+    while not stop_evt.is_set() and len(times) < PING_COUNT:
+        times.append(call("ping", "get", "/redis/ping", debug=False))
+        time.sleep(0.05)
+    return times
+
+def test_clear(mode: str):
+    print(f"\n=== {mode} ===")
+    print("=== 테스트 데이터 생성 중 ===")
+    for _ in range(10):
+        call("create_sample_data", "post", "/query/add", debug=False)
+    print("=== 테스트 데이터 생성 완료 ===")
+
+    stop_evt = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ping_fut = pool.submit(ping_loop, stop_evt)
+        clear_time = call(f"clear-{mode}", "delete", f"/clear?pattern=test:keys_scan:*&mode={mode}")
+        stop_evt.set()
+        ping_times = sorted(ping_fut.result())
+
+    print(f"{mode}: clear {clear_time:.3f}s, ping max={ping_times[-1]:.3f}s")
+    return clear_time, ping_times[-1]
+
+if __name__ == "__main__":
+    client_clear, client_ping = test_clear("client")
+    server_clear, server_ping = test_clear("server")
+
+    # 기대: 키가 네트워크를 두 번 건너지 않으므로 서버 삭제가 더 빠르고, 잘게 나눠 실행되어 ping도 늘어지지 않는다.
+    assert server_clear < client_clear
+    # 요청의 목표: 삭제가 도는 동안에도 ping이 늘어지지 않아야 한다.
+    assert server_ping <= max(client_ping, PING_MAX_SECONDS), server_ping
+
+'''
+테스트 시나리오
+- /query/add 로 1000만개의 키를 만든 뒤, 주기적으로 /redis/ping 을 보내면서 /clear 를 실행한다.
+- client: SCAN으로 키를 앱까지 가져와 UNLINK 파이프라인으로 되돌려 보낸다.
+- server: FCALL bulk_unlink 한 번이 SCAN(COUNT 1000) + UNLINK를 서버 안에서 처리하고 커서만 돌려준다.
+'''
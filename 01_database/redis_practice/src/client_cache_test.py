@@ -0,0 +1,60 @@
+"""
+조건:
+서버가 8000포트에서 실행중이고, list_vs_zset_test.py 로 대기열 데이터를 생성했습니다.
+"""
+
+import time
+
+import requests
+
+BASE_URL = "http://127.0.0.1:8000"
+TIMEOUT = 600
+REPEAT = 2000
+
+PATHS = [
+    "/queue/list/top100",
+    "/queue/zset/top100",
+    "/queue/zset/position?user_id=user_last",
+]
+
+
+def run_repeated(session: requests.Session, path: str):
+    times = []
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        session.get(f"{BASE_URL}{path}", timeout=TIMEOUT)
+        times.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - t0
+    times.sort()
+    return {
+        "qps": REPEAT / elapsed,
+        "p50": times[len(times) // 2],
+        "p99": times[int(len(times) * 0.99) - 1],
+    }
+
+def test_cache(enabled: bool):
+    label = "cache on" if enabled else "cache off"
+    print(f"\n=== {label} ===")
+    with requests.Session() as session:
+        session.post(f"{BASE_URL}/cache/{'enable' if enabled else 'disable'}", timeout=TIMEOUT)
+        results = {}
+        for path in PATHS:
+            res = results[path] = run_repeated(session, path)
+            print(f"{path}: {res['qps']:.0f} req/s, p50={res['p50'] * 1000:.2f}ms, p99={res['p99'] * 1000:.2f}ms")
+        session.post(f"{BASE_URL}/cache/disable", timeout=TIMEOUT)
+    return results
+
+if __name__ == "__main__":
+    off = test_cache(False)
+    on = test_cache(True)
+
+    # 기대: 키가 바뀌지 않는 동안 반복 조회는 캐시에서 응답해 QPS가 높아진다.
+    for path in PATHS:
+        assert on[path]["qps"] >= off[path]["qps"]
+
+'''
+테스트 시나리오
+- 같은 top100/position 조회를 2000번씩 반복하며 캐시 on/off의 QPS와 지연을 비교한다.
+- hit/miss/무효화 횟수는 /metrics 의 client_cache_* 항목에서 확인한다.
+'''
@@ -1,87 +1,320 @@
 import time
 
-from typing import List
+from typing import Dict, Iterator, List, Literal, Optional
 
-from fastapi import APIRouter, Depends
-from redis.cluster import RedisCluster
+from fastapi import APIRouter, Depends, Response
+from redis.asyncio.cluster import ClusterNode, RedisCluster
 
 from src.utils.decorators import measure_time
-from src.infra.redis_cluster import get_redis_cluster
+from src.utils.key_codec import key_codec
+from src.infra.redis_cluster import get_async_redis_cluster
+from src.infra.cluster_scan import scan_primaries_batches
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE, PipelineWriter
+from src.infra.cluster_writer import ClusterWriter
+from src.infra.jobs import Job, JobManager, cluster_ping_probe, get_jobs
+from src.infra.scan_pages import DEFAULT_BUDGET_MS, cluster_scan_page
+from src.infra.mass_insert import Loader, RespTemplate, cluster_mass_insert, command_args
 
 SearchRouter = APIRouter(prefix="/search")
 
 HashTagRouter = APIRouter(prefix="/hash-tag")
 HierachyRouter = APIRouter(prefix="/hierachy")
 
+Layout = Literal["hash-tag", "hierachy"]
+
+# 유저별 보조 인덱스 (ZSET, member=데이터 키, score=생성 시각)
+# `test:user:*` 패턴에 걸리지 않도록 prefix를 분리하고, 유저 ID를 해시태그로 감싼다.
+# hash-tag 레이아웃은 데이터 키와 같은 슬롯에 놓이고, hierachy 레이아웃은 데이터가 이미 여러 슬롯에 흩어져 있어 같은 슬롯일 수 없다.
+USER_KEY = key_codec.ns("test", "user")
+INDEX_KEY = key_codec.ns("test", "user_idx")
+# 인덱스 ZADD 한 번에 담는 멤버 수
+INDEX_BATCH = 1000
+
+INCR_TEMPLATE = RespTemplate("INCRBY", None, 1)
+
+def _data_prefix(layout: Layout, user_id) -> str:
+    user = key_codec.user(user_id)
+    return key_codec.key(USER_KEY, key_codec.tag(user) if layout == "hash-tag" else user)
+
+def _index_key(layout: Layout, user_id) -> str:
+    return key_codec.key(INDEX_KEY, key_codec.word(layout), key_codec.tag(key_codec.user(user_id)))
+
+def _scan_nodes(rc: RedisCluster, layout: Layout, user_id) -> Optional[List[ClusterNode]]:
+    # 해시태그로 슬롯을 고정한 키가 모여 있는 노드를 지정해 단일 노드만 스캔한다.
+    if layout == "hash-tag":
+        return [rc.get_node_from_key(f"{_data_prefix(layout, user_id)}:0")]
+    return None
+
+async def _count_with_scan(rc: RedisCluster, layout: Layout, user_id, count: Optional[int]) -> int:
+    counts = 0
+    async for batch in scan_primaries_batches(
+        rc,
+        match=f"{_data_prefix(layout, user_id)}:*",
+        count=count,
+        nodes=_scan_nodes(rc, layout, user_id),
+    ):
+        counts += len(batch)
+    return counts
+
+def _bulk_add_commands(layout: Layout, user_ids: List[int], per_user: int) -> Iterator[tuple]:
+    prefixes = {user_id: _data_prefix(layout, user_id) for user_id in user_ids}
+    members: Dict[int, list] = {user_id: [] for user_id in user_ids}
+    # 유저를 번갈아 가며 만든다. hash-tag 레이아웃에서 유저 한 명씩 만들면 그동안 한 노드로만 쓰게 된다.
+    for _ in range(per_user):
+        for user_id in user_ids:
+            ts = time.time()
+            key = f"{prefixes[user_id]}:{key_codec.stamp(ts)}"
+            yield (INCR_TEMPLATE, key)
+            batch = members[user_id]
+            batch += (ts, key)
+            if len(batch) >= INDEX_BATCH * 2:
+                yield ("ZADD", _index_key(layout, user_id), *batch)
+                members[user_id] = []
+    for user_id, batch in members.items():
+        if batch:
+            yield ("ZADD", _index_key(layout, user_id), *batch)
+
+async def _bulk_add(rc: RedisCluster, layout: Layout, user_ids: List[int], per_user: int, chunk_size: int, loader: Loader, job: Optional[Job] = None) -> Dict:
+    commands = _bulk_add_commands(layout, user_ids, per_user)
+    if job is not None:
+        # 백그라운드 작업이면 청크마다 진행률을 올리고, 클러스터가 느려졌으면 여기서 쉬어 간다.
+        commands = job.track(commands, every=chunk_size)
+    if loader == "resp":
+        # 슬롯별로 노드 버퍼에 나눠 RESP 바이트를 바로 보낸다. 응답은 개수와 에러만 센다.
+        return {"mass_insert": await cluster_mass_insert(rc, commands)}
+    # 노드별 배치를 따로 끊어 동시에 보낸다. stats()["nodes"]에 노드별 처리량이 나온다.
+    async with ClusterWriter(rc, chunk_size=chunk_size) as writer:
+        if job is None:
+            for command in commands:
+                await writer.add(*command_args(command))
+        else:
+            async for command in commands:
+                await writer.add(*command_args(command))
+    return {"pipeline": writer.stats()}
+
+async def _count_page(rc: RedisCluster, layout: Layout, user_id, cursor: Optional[str], count: Optional[int], budget_ms: Optional[int], max_keys: Optional[int]):
+    res = await cluster_scan_page(
+        rc,
+        f"{_data_prefix(layout, user_id)}:*",
+        cursor,
+        count=count,
+        budget_ms=budget_ms,
+        max_keys=max_keys,
+        nodes=_scan_nodes(rc, layout, user_id),
+    )
+    return {"status": "ok", "type": layout, **res}
+
+async def _list_with_index(rc: RedisCluster, layout: Layout, user_id: str, offset: int, limit: int):
+    index_key = _index_key(layout, user_id)
+    total = await rc.zcard(index_key)
+    keys = await rc.zrange(index_key, offset, offset + limit - 1)
+    return {
+        "status": "ok",
+        "type": layout,
+        "total": total,
+        "keys": keys,
+    }
+
+async def _reindex(rc: RedisCluster, layout: Layout, user_id: str):
+    """SCAN으로 실제 키를 모아 임시 인덱스를 만들고 RENAME으로 교체한다. (임시 키는 해시태그로 같은 슬롯)"""
+    index_key = _index_key(layout, user_id)
+    tmp_key = f"{index_key}:tmp"
+    before = await rc.zcard(index_key)
+
+    await rc.delete(tmp_key)
+    scanned = 0
+    async with PipelineWriter(rc) as writer:
+        async for batch in scan_primaries_batches(
+            rc,
+            match=f"{_data_prefix(layout, user_id)}:*",
+            nodes=_scan_nodes(rc, layout, user_id),
+        ):
+            scanned += len(batch)
+            await writer.add("zadd", tmp_key, {key: key_codec.parse_stamp(key.rsplit(":", 1)[-1]) for key in batch})
+
+    if scanned:
+        await rc.rename(tmp_key, index_key)
+    else:
+        await rc.delete(index_key)
+    return {
+        "status": "ok",
+        "type": layout,
+        "before": before,
+        "after": scanned,
+        "repaired": before != scanned,
+    }
+
+'''
+=== HASH TAG ===
+'''
+
 @HashTagRouter.get("")
-def get_data_with_tag(
+@measure_time
+async def get_data_with_tag(
     user_id: str,
-    rc: RedisCluster = Depends(get_redis_cluster)
+    mode: Literal["scan", "index"] = "scan",
+    count: Optional[int] = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
     ):
-    pattern = f"test:user:{{{user_id}}}:*"
-    # 해시태그로 슬롯을 고정한 키가 모여 있는 노드를 지정해 단일 노드만 스캔한다.
-    target_node = rc.get_node_from_key(f"test:user:{{{user_id}}}:0")
-    counts = sum(
-        1
-        for _ in rc.scan_iter(
-            match=pattern,
-            count=1000,
-            target_nodes=target_node,
-        )
-    )
+    if mode == "index":
+        counts = await rc.zcard(_index_key("hash-tag", user_id))
+    else:
+        counts = await _count_with_scan(rc, "hash-tag", user_id, count)
     return {
         "status": "ok",
         "type": "hash-tag",
+        "mode": mode,
         "count": counts
     }
 
+@HashTagRouter.get("/page")
+@measure_time
+async def get_data_page_with_tag(
+    user_id: str,
+    cursor: Optional[str] = None,
+    count: Optional[int] = None,
+    budget_ms: Optional[int] = DEFAULT_BUDGET_MS,
+    max_keys: Optional[int] = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _count_page(rc, "hash-tag", user_id, cursor, count, budget_ms, max_keys)
+
+@HashTagRouter.get("/keys")
+@measure_time
+async def list_data_with_tag(
+    user_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _list_with_index(rc, "hash-tag", user_id, offset, limit)
+
+@HashTagRouter.post("/reindex")
+@measure_time
+async def reindex_data_with_tag(
+    user_id: str,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _reindex(rc, "hash-tag", user_id)
+
 @HashTagRouter.post("/add")
 @measure_time
-def bulk_add_data_with_tag(
+async def bulk_add_data_with_tag(
     user_ids: List[int],
-    rc: RedisCluster = Depends(get_redis_cluster),
+    response: Response,
+    per_user: int = 100000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    loader: Loader = "pipeline",
+    background: bool = False,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+    jobs: JobManager = Depends(get_jobs),
     ):
-    pipe = rc.pipeline()
-    for user_id in user_ids:
-        for _ in range(100000):
-            pipe.incrby(f"test:user:{{{user_id}}}:{time.time()}")
-    pipe.execute()
-
+    if background:
+        job = jobs.submit(
+            "search_add",
+            lambda job: _bulk_add(rc, "hash-tag", user_ids, per_user, chunk_size, loader, job),
+            {"type": "hash-tag", "users": len(user_ids), "per_user": per_user, "loader": loader},
+            cluster_ping_probe(rc),
+        )
+        response.status_code = 202
+        return job.accepted()
+    res = await _bulk_add(rc, "hash-tag", user_ids, per_user, chunk_size, loader)
     return {
         "status": "created", 
         "type": "hash-tag",
-        "length": len(user_ids) * 100000
+        "length": len(user_ids) * per_user,
+        **res,
     }
 
+'''
+=== HIERACHY ===
+'''
+
 @HierachyRouter.get("")
 @measure_time
-def get_data_with_hierachy(
+async def get_data_with_hierachy(
     user_id: str,
-    rc: RedisCluster = Depends(get_redis_cluster)
+    parallel: bool = True,
+    mode: Literal["scan", "index"] = "scan",
+    count: Optional[int] = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
     ):
-    counts = sum(1 for _ in rc.scan_iter(match=f"test:user:{user_id}:*", count=1000))
+    pattern = f"{_data_prefix('hierachy', user_id)}:*"
+    counts = 0
+    if mode == "index":
+        counts = await rc.zcard(_index_key("hierachy", user_id))
+    elif parallel:
+        # 계층형 키는 모든 노드에 흩어져 있으므로 프라이머리별 SCAN을 동시에 돌린다.
+        async for batch in scan_primaries_batches(rc, match=pattern, count=count):
+            counts += len(batch)
+    else:
+        async for _ in rc.scan_iter(match=pattern, count=count or 1000):
+            counts += 1
     return {
         "status": "ok",
         "type": "hierachy",
+        "mode": mode,
+        "parallel": parallel,
         "count": counts
     }
 
+@HierachyRouter.get("/page")
+@measure_time
+async def get_data_page_with_hierachy(
+    user_id: str,
+    cursor: Optional[str] = None,
+    count: Optional[int] = None,
+    budget_ms: Optional[int] = DEFAULT_BUDGET_MS,
+    max_keys: Optional[int] = None,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _count_page(rc, "hierachy", user_id, cursor, count, budget_ms, max_keys)
+
+@HierachyRouter.get("/keys")
+@measure_time
+async def list_data_with_hierachy(
+    user_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _list_with_index(rc, "hierachy", user_id, offset, limit)
+
+@HierachyRouter.post("/reindex")
+@measure_time
+async def reindex_data_with_hierachy(
+    user_id: str,
+    rc: RedisCluster = Depends(get_async_redis_cluster)
+    ):
+    return await _reindex(rc, "hierachy", user_id)
+
 @HierachyRouter.post("/add")
 @measure_time
-def bulk_add_data_with_hierachy(
+async def bulk_add_data_with_hierachy(
     user_ids: List[int],
-    rc: RedisCluster = Depends(get_redis_cluster),
+    response: Response,
+    per_user: int = 100000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    loader: Loader = "pipeline",
+    background: bool = False,
+    rc: RedisCluster = Depends(get_async_redis_cluster),
+    jobs: JobManager = Depends(get_jobs),
     ):
-    pipe = rc.pipeline()
-    for user_id in user_ids:
-        for _ in range(100000):
-            pipe.incrby(f"test:user:{user_id}:{time.time()}")
-    pipe.execute()
-
+    if background:
+        job = jobs.submit(
+            "search_add",
+            lambda job: _bulk_add(rc, "hierachy", user_ids, per_user, chunk_size, loader, job),
+            {"type": "hierachy", "users": len(user_ids), "per_user": per_user, "loader": loader},
+            cluster_ping_probe(rc),
+        )
+        response.status_code = 202
+        return job.accepted()
+    res = await _bulk_add(rc, "hierachy", user_ids, per_user, chunk_size, loader)
     return {
         "status": "created", 
         "type": "hierachy",
-        "length": len(user_ids) * 100000
+        "length": len(user_ids) * per_user,
+        **res,
     }
 
 SearchRouter.include_router(HierachyRouter)
@@ -13,9 +13,43 @@ def test_hash_tag(struct_type: str):
 
     call(name="get_cluster_stats", method="get", path="/cluster/stats")
 
+def test_parallel_scan():
+    # test_hash_tag("hierachy") 로 적재된 데이터를 그대로 사용한다.
+    sequential = call(name="search_sequential", method="get", path="/search/hierachy?user_id=1&parallel=false")
+    parallel = call(name="search_parallel", method="get", path="/search/hierachy?user_id=1&parallel=true")
+    call(name="count_sequential", method="get", path="/cluster/count?pattern=test:*&parallel=false")
+    call(name="count_parallel", method="get", path="/cluster/count?pattern=test:*&parallel=true")
+    call(name="count_parallel_limit", method="get", path="/cluster/count?pattern=test:*&limit=100000")
+
+    # 기대: 노드별 SCAN을 동시에 돌리면 노드 수(3)에 가까운 배수만큼 빨라진다.
+    assert parallel < sequential
+
+def test_skew(struct_type: str):
+    # test_hash_tag 로 적재된 데이터를 그대로 사용한다.
+    # 해시태그는 유저 100명이 슬롯 100개에만 몰리고, 계층형은 키가 16384개 슬롯에 고르게 흩어진다.
+    call(name="enable_slot_tracking", method="post", path="/cluster/slots/track/enable", debug=False)
+    call(name=f"search_with_{struct_type}", method="get", path=f"/search/{struct_type}?user_id=1&mode=index", debug=False)
+    call(name=f"slot_skew_{struct_type}", method="get", path="/cluster/slots/skew?top=5")
+    call(name="disable_slot_tracking", method="post", path="/cluster/slots/track/disable", debug=False)
+
+def test_index(struct_type: str):
+    # test_hash_tag 로 적재된 데이터를 그대로 사용한다.
+    scan = call(name=f"count_scan_{struct_type}", method="get", path=f"/search/{struct_type}?user_id=1&mode=scan")
+    index = call(name=f"count_index_{struct_type}", method="get", path=f"/search/{struct_type}?user_id=1&mode=index")
+    call(name=f"list_index_{struct_type}", method="get", path=f"/search/{struct_type}/keys?user_id=1&limit=10", debug=False)
+    call(name=f"reindex_{struct_type}", method="post", path=f"/search/{struct_type}/reindex?user_id=1")
+
+    # 기대: 인덱스 조회는 키스페이스 크기와 무관하게 ZCARD 한 번이라 SCAN보다 훨씬 빠르다.
+    assert index < scan
+
 if __name__ == "__main__":
     test_hash_tag("hash-tag")
+    test_index("hash-tag")
+    test_skew("hash-tag")
     test_hash_tag("hierachy")
+    test_index("hierachy")
+    test_skew("hierachy")
+    test_parallel_scan()
 
 '''
 === HASH TAG ===
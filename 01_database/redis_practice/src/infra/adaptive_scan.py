@@ -0,0 +1,130 @@
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode
+
+from src.utils.metrics import metrics
+
+'''
+SCAN COUNT를 호출 지연에 맞춰 조절한다.
+COUNT가 크면 왕복은 줄지만 한 호출이 서버를 오래 잡고, 그동안 다른 클라이언트의 짧은 명령이 기다린다.
+고정값 대신 "한 호출이 서버에서 SCAN_TARGET_MS 안에 끝나는 가장 큰 COUNT"를 노드마다 찾아 쓴다.
+
+서버 시간은 따로 알 수 없으므로 왕복 시간에서 네트워크 바닥값(지금까지 본 가장 짧은 왕복)을 뺀 값으로 본다.
+COUNT 1당 비용을 EWMA로 추정하고, 다음 COUNT = 목표 시간 / 비용 (한 번에 MAX_STEP배 이상은 움직이지 않는다).
+'''
+
+SCAN_TARGET_MS = float(os.getenv("SCAN_TARGET_MS", "1"))
+MIN_COUNT = 100
+MAX_COUNT = 100000
+# 처음에는 작게 시작해 네트워크 바닥값을 먼저 잡는다. (TCP slow start 처럼 호출마다 최대 MAX_STEP배씩 키운다)
+INITIAL_COUNT = MIN_COUNT
+MAX_STEP = 2.0
+SMOOTHING = 0.3
+
+
+class CountController:
+    """노드 하나의 SCAN COUNT 조절기. 같은 노드를 훑는 요청들이 학습한 값을 함께 쓴다."""
+
+    def __init__(
+        self,
+        node: str,
+        target_ms: float = SCAN_TARGET_MS,
+        min_count: int = MIN_COUNT,
+        max_count: int = MAX_COUNT,
+        initial: int = INITIAL_COUNT,
+    ):
+        self.node = node
+        self.target = target_ms / 1000
+        self.min_count = min_count
+        self.max_count = max_count
+        self.count = initial
+        # COUNT 1당 서버 시간(초) 추정치와 네트워크 바닥값
+        self.cost: Optional[float] = None
+        self.floor: Optional[float] = None
+        self.calls = 0
+
+    def record(self, count: int, seconds: float):
+        self.calls += 1
+        # 큰 COUNT 호출만 이어지면 바닥값을 다시 잴 기회가 없으므로 올리지 않고 최솟값만 유지한다.
+        if self.floor is None or seconds < self.floor:
+            self.floor = seconds
+        sample = max(seconds - self.floor, 0.0) / count
+        self.cost = sample if self.cost is None else self.cost + SMOOTHING * (sample - self.cost)
+
+        ideal = self.target / self.cost if self.cost > 0 else self.max_count
+        ideal = min(max(ideal, count / MAX_STEP), count * MAX_STEP)
+        self.count = int(min(max(ideal, self.min_count), self.max_count))
+
+        metrics.observe("scan_call_seconds", seconds, node=self.node)
+        metrics.set_gauge("scan_count", self.count, node=self.node)
+        metrics.set_gauge("scan_cost_us_per_1k", round(self.cost * 1e9, 3), node=self.node)
+        metrics.set_gauge("scan_floor_ms", round(self.floor * 1000, 3), node=self.node)
+
+    def state(self) -> Dict:
+        return {
+            "count": self.count,
+            "target_ms": self.target * 1000,
+            "cost_us_per_1k": round(self.cost * 1e9, 3) if self.cost is not None else None,
+            "floor_ms": round(self.floor * 1000, 3) if self.floor is not None else None,
+            "calls": self.calls,
+        }
+
+
+_controllers: Dict[str, CountController] = {}
+
+
+def scan_controller(node: str) -> CountController:
+    controller = _controllers.get(node)
+    if controller is None:
+        controller = _controllers[node] = CountController(node)
+    return controller
+
+
+def controllers() -> Dict[str, Dict]:
+    return {node: controller.state() for node, controller in _controllers.items()}
+
+
+def node_name(r: redis.Redis) -> str:
+    kwargs = r.connection_pool.connection_kwargs
+    return f"{kwargs.get('host', 'localhost')}:{kwargs.get('port', 6379)}"
+
+
+async def scan_call(
+    r,
+    cursor: int,
+    match: str,
+    count: Optional[int] = None,
+    node: Optional[ClusterNode] = None,
+) -> Tuple[int, List[str]]:
+    """
+    SCAN 한 번. count를 주면 그 값 그대로(고정 COUNT), None이면 노드 조절기가 정한 COUNT로 보내고 지연을 기록한다.
+    node를 주면 r은 RedisCluster이고 그 노드만 훑는다.
+    """
+    controller = None
+    if count is None:
+        controller = scan_controller(node.name if node is not None else node_name(r))
+        count = controller.count
+    t0 = time.perf_counter()
+    if node is None:
+        cursor, batch = await r.scan(cursor=cursor, match=match, count=count)
+    else:
+        # target_nodes를 하나로 지정하면 ({node.name: cursor}, keys) 형태로 돌아온다.
+        cursors, batch = await r.scan(cursor=cursor, match=match, count=count, target_nodes=node)
+        cursor = cursors[node.name]
+    if controller is not None:
+        controller.record(count, time.perf_counter() - t0)
+    return cursor, batch
+
+
+async def scan_batches(r: redis.Redis, match: str, count: Optional[int] = None) -> AsyncIterator[List[str]]:
+    """단일 노드 전체 SCAN을 배치 단위로. count=None이면 COUNT를 조절한다."""
+    cursor = 0
+    while True:
+        cursor, batch = await scan_call(r, cursor, match, count)
+        if batch:
+            yield batch
+        if cursor == 0:
+            break
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+
+from src.infra.adaptive_scan import node_name
+from src.utils.metrics import metrics
+
+# SCAN 한 번 + UNLINK를 서버 안에서 처리하는 함수.
+# 한 호출이 COUNT 만큼만 훑고 돌아오므로 호출 사이사이에 다른 명령(PING 등)이 끼어들 수 있다.
+# 키를 미리 선언하지 않고 SCAN 결과를 지우므로 클러스터에서는 allow-cross-slot-keys 가 필요하다.
+# 이 플래그는 스크립트 안의 서로 다른 명령이 다른 슬롯을 건드리는 것만 허용한다.
+# 명령 하나의 키들은 여전히 한 슬롯이어야 하므로 SCAN 결과(여러 슬롯)를 UNLINK 한 번에 넘기지 않고 키마다 부른다.
+LIBRARY_NAME = "redis_practice"
+FUNCTION_NAME = "bulk_unlink"
+LIBRARY_CODE = f"""#!lua name={LIBRARY_NAME}
+
+local function bulk_unlink(keys, args)
+    local res = redis.call('SCAN', args[1], 'MATCH', args[2], 'COUNT', args[3])
+    local batch = res[2]
+    for i = 1, #batch do
+        redis.call('UNLINK', batch[i])
+    end
+    return {{res[1], #batch}}
+end
+
+redis.register_function{{
+    function_name='{FUNCTION_NAME}',
+    callback=bulk_unlink,
+    flags={{'allow-cross-slot-keys'}}
+}}
+"""
+
+_loaded = set()
+
+# 호출마다 지운 키 수를 받는 콜백. 백그라운드 작업의 진행률/속도 제한(job.tick)에 쓴다.
+Progress = Callable[[int], Awaitable[None]]
+
+
+async def _fcall(call: Callable[[], Awaitable], load: Callable[[], Awaitable]):
+    """
+    FCALL 한 번. _loaded는 프로세스 안의 기록일 뿐이라,
+    Redis 재시작/FUNCTION FLUSH/페일오버로 함수가 사라졌으면 다시 올리고 한 번만 더 부른다.
+    """
+    try:
+        return await call()
+    except ResponseError as e:
+        if "Function not found" not in str(e):
+            raise
+    await load()
+    return await call()
+
+
+async def _ensure_loaded(client, name: str):
+    if name in _loaded:
+        return
+    # 클러스터 클라이언트는 FUNCTION LOAD를 모든 프라이머리로 보낸다.
+    await client.function_load(LIBRARY_CODE, replace=True)
+    _loaded.add(name)
+
+
+def _record(node: str, n: int, deleted: int, start: float):
+    # 진행 상황은 /metrics 로 본다. 백그라운드 작업이면 progress 콜백으로 /jobs/{id} 에도 나온다.
+    elapsed = time.perf_counter() - start
+    metrics.inc("bulk_unlink_keys_total", n, node=node)
+    metrics.set_gauge("bulk_unlink_keys_per_sec", round(deleted / elapsed, 1) if elapsed else 0, node=node)
+
+
+def _report(deleted: int, calls: int, elapsed: float) -> Dict:
+    return {
+        "deleted": deleted,
+        "calls": calls,
+        "elapsed": round(elapsed, 3),
+        "keys_per_sec": round(deleted / elapsed, 1) if elapsed else 0,
+    }
+
+
+async def server_unlink(r: redis.Redis, pattern: str, count: int = 1000, progress: Optional[Progress] = None) -> Dict:
+    """단일 노드에서 SCAN + UNLINK를 서버 쪽에서 count 단위로 나눠 실행한다."""
+    await _ensure_loaded(r, "standalone")
+    name = node_name(r)
+    cursor, deleted, calls = "0", 0, 0
+    start = time.perf_counter()
+    while True:
+        cursor, n = await _fcall(
+            lambda: r.fcall(FUNCTION_NAME, 0, cursor, pattern, count),
+            lambda: r.function_load(LIBRARY_CODE, replace=True),
+        )
+        deleted += n
+        calls += 1
+        if progress is not None:
+            await progress(n)
+        _record(name, n, deleted, start)
+        if str(cursor) == "0":
+            break
+    return _report(deleted, calls, time.perf_counter() - start)
+
+
+async def _server_unlink_node(rc: RedisCluster, node: ClusterNode, pattern: str, count: int, progress: Optional[Progress]) -> Dict:
+    cursor, deleted, calls = "0", 0, 0
+    start = time.perf_counter()
+    while True:
+        cursor, n = await _fcall(
+            lambda: rc.execute_command("FCALL", FUNCTION_NAME, 0, cursor, pattern, count, target_nodes=node),
+            # 함수가 없는 노드(새 프라이머리 등)에만 다시 올린다.
+            lambda: rc.execute_command("FUNCTION LOAD", "REPLACE", LIBRARY_CODE, target_nodes=node),
+        )
+        deleted += n
+        calls += 1
+        if progress is not None:
+            await progress(n)
+        _record(node.name, n, deleted, start)
+        if str(cursor) == "0":
+            break
+    return _report(deleted, calls, time.perf_counter() - start)
+
+
+async def cluster_server_unlink(rc: RedisCluster, pattern: str, count: int = 1000, progress: Optional[Progress] = None) -> Dict:
+    """프라이머리마다 서버 쪽 SCAN + UNLINK 루프를 동시에 돌린다."""
+    await _ensure_loaded(rc, "cluster")
+    nodes = rc.get_primaries()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_server_unlink_node(rc, node, pattern, count, progress) for node in nodes))
+    elapsed = time.perf_counter() - start
+
+    total = _report(sum(res["deleted"] for res in results), sum(res["calls"] for res in results), elapsed)
+    total["nodes"] = {node.name: res for node, res in zip(nodes, results)}
+    return total
@@ -0,0 +1,233 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+
+from src.infra.redis_client import get_async_redis
+from src.utils.key_codec import key_codec
+from src.utils.metrics import metrics
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 60.0
+# BCAST 추적 대상. 이 prefix에 쓰기가 일어날 때마다 무효화 메시지가 오므로, 대량 적재 중에는 캐시를 꺼두는 편이 낫다.
+DEFAULT_PREFIXES = (key_codec.ns("test", "list"), key_codec.ns("test", "zset"), key_codec.ns("test", "timescale") + ":")
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+CacheKey = Tuple[str, str, Tuple[Any, ...]]
+
+
+class ClientCache:
+    """
+    CLIENT TRACKING(BCAST + REDIRECT)으로 무효화를 받는 클라이언트 측 캐시.
+    - 전용 연결 하나가 __redis__:invalidate 를 구독하고, 다른 전용 연결이 그 연결로 무효화를 리다이렉트하도록 추적을 켠다.
+    - 항목은 LRU(max_entries) + TTL로 제한한다.
+    - 조회 중에 무효화가 도착하면 그 결과는 캐시에 넣지 않는다. (키별 버전 비교)
+    - 구독 연결이 끊기면 캐시를 비우고 재연결될 때까지 캐시를 쓰지 않는다.
+    """
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        prefixes: Sequence[str] = DEFAULT_PREFIXES,
+    ):
+        self.r = r
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prefixes = tuple(prefixes)
+
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._by_key: Dict[str, set] = {}
+        # 조회 중인 키의 (버전, 진행 중인 조회 수). 조회 도중 무효화가 오면 버전이 올라가 결과를 저장하지 않는다.
+        self._inflight: Dict[str, List[int]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self.enabled = False
+
+    # === 수명 주기 ===
+
+    async def enable(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        self.enabled = True
+        await asyncio.wait_for(self._ready.wait(), timeout=5)
+
+    async def disable(self):
+        self.enabled = False
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        self.clear()
+
+    async def _listen(self):
+        pool = self.r.connection_pool
+        while True:
+            listener = pool.make_connection()
+            tracker = pool.make_connection()
+            try:
+                await listener.connect()
+                await listener.send_command("CLIENT", "ID")
+                client_id = await listener.read_response()
+                await listener.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+                await listener.read_response()
+
+                await tracker.connect()
+                args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+                for prefix in self.prefixes:
+                    args += ["PREFIX", prefix]
+                await tracker.send_command(*args)
+                await tracker.read_response()
+
+                self._ready.set()
+                while True:
+                    message = await listener.read_response(timeout=None)
+                    if message and message[0] == "message":
+                        self._invalidate(message[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"client cache 무효화 연결 오류, 재연결: {e}")
+                await asyncio.sleep(1)
+            finally:
+                # 무효화를 놓쳤을 수 있으므로 연결이 끊기면 전부 버린다.
+                # 끊기기 전에 시작한 조회가 재연결 뒤에 끝나도 저장되지 않도록 진행 중인 조회의 버전도 올린다.
+                self._ready.clear()
+                self._reset()
+                await listener.disconnect()
+                await tracker.disconnect()
+
+    # === 저장/무효화 ===
+
+    def clear(self):
+        self._entries.clear()
+        self._by_key.clear()
+        metrics.set_gauge("client_cache_entries", 0)
+
+    def _reset(self):
+        """캐시를 비우고 진행 중인 조회의 결과도 저장하지 않게 한다."""
+        for state in self._inflight.values():
+            state[0] += 1
+        self.clear()
+
+    def _invalidate(self, keys: Optional[List[str]]):
+        # keys가 None이면 FLUSHDB/FLUSHALL 이다.
+        if keys is None:
+            self._reset()
+            metrics.inc("client_cache_invalidations_total")
+            return
+        for key in keys:
+            if key in self._inflight:
+                self._inflight[key][0] += 1
+            for cache_key in self._by_key.pop(key, ()):
+                self._entries.pop(cache_key, None)
+            metrics.inc("client_cache_invalidations_total")
+        metrics.set_gauge("client_cache_entries", len(self._entries))
+
+    def _lookup(self, cache_key: CacheKey) -> Tuple[bool, Any]:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._drop(cache_key)
+            return False, None
+        self._entries.move_to_end(cache_key)
+        return True, value
+
+    def _drop(self, cache_key: CacheKey):
+        self._entries.pop(cache_key, None)
+        keys = self._by_key.get(cache_key[1])
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._by_key[cache_key[1]]
+
+    def _begin(self, key: str) -> int:
+        state = self._inflight.setdefault(key, [0, 0])
+        state[1] += 1
+        return state[0]
+
+    def _end(self, key: str) -> int:
+        state = self._inflight[key]
+        state[1] -= 1
+        if not state[1]:
+            del self._inflight[key]
+        return state[0]
+
+    def _store(self, cache_key: CacheKey, value: Any, version: int):
+        if self._end(cache_key[1]) != version or not self._ready.is_set():
+            return
+        self._entries[cache_key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(cache_key)
+        self._by_key.setdefault(cache_key[1], set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        metrics.set_gauge("client_cache_entries", len(self._entries))
+
+    def _cacheable(self, key: str) -> bool:
+        return self.enabled and self._ready.is_set() and key.startswith(self.prefixes)
+
+    # === 조회 ===
+
+    async def get(self, command: str, key: str, *args: Any) -> Any:
+        """getattr(r, command)(key, *args) 결과를 캐시해서 돌려준다."""
+        if not self._cacheable(key):
+            return await getattr(self.r, command)(key, *args)
+
+        cache_key = (command, key, args)
+        hit, value = self._lookup(cache_key)
+        if hit:
+            metrics.inc("client_cache_hits_total", command=command)
+            return value
+
+        metrics.inc("client_cache_misses_total", command=command)
+        version = self._begin(key)
+        try:
+            value = await getattr(self.r, command)(key, *args)
+        except BaseException:
+            self._end(key)
+            raise
+        self._store(cache_key, value, version)
+        return value
+
+    async def get_many(self, command: str, keys: Sequence[str]) -> List[Any]:
+        """여러 키에 같은 명령을 실행한다. 캐시에 없는 키만 파이프라인으로 묶어 조회한다."""
+        results: List[Any] = [None] * len(keys)
+        misses = []
+        for i, key in enumerate(keys):
+            if self._cacheable(key):
+                hit, value = self._lookup((command, key, ()))
+                if hit:
+                    metrics.inc("client_cache_hits_total", command=command)
+                    results[i] = value
+                    continue
+            misses.append(i)
+
+        if misses:
+            metrics.inc("client_cache_misses_total", len(misses), command=command)
+            versions = [self._begin(keys[i]) for i in misses]
+            pipe = self.r.pipeline()
+            for i in misses:
+                getattr(pipe, command)(keys[i])
+            try:
+                values = await pipe.execute()
+            except BaseException:
+                for i in misses:
+                    self._end(keys[i])
+                raise
+            for i, version, value in zip(misses, versions, values):
+                results[i] = value
+                self._store((command, keys[i], ()), value, version)
+        return results
+
+
+_cache = ClientCache(get_async_redis())
+
+
+def get_client_cache() -> ClientCache:
+    return _cache
@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+
+from src.infra.adaptive_scan import scan_call
+
+# 노드별 SCAN 태스크가 consumer보다 너무 앞서가지 않도록 큐에 쌓아둘 배치 수 (노드당)
+QUEUE_BATCHES_PER_NODE = 2
+
+
+async def _scan_node(
+    rc: RedisCluster,
+    node: ClusterNode,
+    match: str,
+    count: Optional[int],
+    queue: asyncio.Queue,
+):
+    cursor = 0
+    try:
+        while True:
+            # count=None이면 노드마다 따로 학습한 COUNT를 쓴다.
+            cursor, batch = await scan_call(rc, cursor, match, count, node=node)
+            if batch:
+                await queue.put(batch)
+            if cursor == 0:
+                break
+    except Exception as e:
+        await queue.put(e)
+    await queue.put(None)
+
+
+async def scan_primaries_batches(
+    rc: RedisCluster,
+    match: str,
+    count: Optional[int] = None,
+    limit: Optional[int] = None,
+    nodes: Optional[List[ClusterNode]] = None,
+) -> AsyncIterator[List[str]]:
+    """
+    프라이머리마다 독립된 SCAN 커서를 동시에 돌리고, 도착하는 배치 순서대로 하나의 스트림으로 합친다.
+    전체 소요 시간은 노드별 시간의 합이 아니라 가장 느린 노드의 시간에 가까워진다.
+    limit에 도달하면 남은 노드 스캔을 취소하고 종료한다.
+    """
+    nodes = nodes if nodes is not None else rc.get_primaries()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=len(nodes) * QUEUE_BATCHES_PER_NODE)
+    tasks = [asyncio.create_task(_scan_node(rc, node, match, count, queue)) for node in nodes]
+
+    remaining = len(tasks)
+    seen = 0
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            if limit is not None and seen + len(item) >= limit:
+                yield item[: limit - seen]
+                return
+            seen += len(item)
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def scan_primaries(
+    rc: RedisCluster,
+    match: str,
+    count: Optional[int] = None,
+    limit: Optional[int] = None,
+    nodes: Optional[List[ClusterNode]] = None,
+) -> AsyncIterator[str]:
+    """scan_primaries_batches의 키 단위 버전."""
+    async with aclosing(scan_primaries_batches(rc, match, count=count, limit=limit, nodes=nodes)) as batches:
+        async for batch in batches:
+            for key in batch:
+                yield key
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.asyncio.cluster import ClusterNode, PipelineCommand, RedisCluster
+from redis.crc import key_slot
+from redis.exceptions import AskError, MovedError, TryAgainError
+
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE, DEFAULT_IN_FLIGHT, current_rss_mb
+
+# 리다이렉트(MOVED/ASK)를 따라가는 최대 횟수. redis-py의 RedisClusterRequestTTL과 같은 역할.
+MAX_REDIRECTS = 16
+# TRYAGAIN(슬롯 이동 중 멀티키 명령)을 받으면 이만큼 쉬었다가 다시 보낸다.
+TRYAGAIN_DELAY = 0.05
+
+
+class _NodeQueue:
+    """노드 하나로 가는 배치와 그 노드의 통계."""
+
+    def __init__(self, node: ClusterNode, in_flight: int):
+        self.node = node
+        self.pending: List[PipelineCommand] = []
+        self.slots = asyncio.Semaphore(in_flight)
+        self.commands = 0
+        self.batch_times: List[float] = []
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        times = sorted(self.batch_times)
+        busy = sum(times)
+        return {
+            "commands": self.commands,
+            "batches": len(times),
+            "ops_per_sec": round(self.commands / elapsed, 1) if elapsed else 0,
+            # 이 노드로 배치가 나가 있던 시간의 합. elapsed 대비 비율이 낮으면 그 노드는 놀고 있었다.
+            "busy": round(busy, 3),
+            "batch_p50": round(times[len(times) // 2], 4) if times else 0,
+            "batch_max": round(times[-1], 4) if times else 0,
+        }
+
+
+class ClusterWriter:
+    """
+    클러스터용 쓰기 전용 실행기. PipelineWriter와 같은 방식으로 쓰되, 명령을 키 슬롯의 노드별 배치로 나눠
+    노드마다 따로 chunk_size개씩 끊어 보낸다. 노드마다 in_flight개까지 동시에 나가 있으므로
+    한 노드가 느려도 다른 노드로 가는 배치는 기다리지 않는다.
+
+    redis-py ClusterPipeline은 한 번의 execute()가 모든 노드의 응답을 기다리고,
+    해시태그처럼 한 청크가 한 노드로만 가면 나머지 노드는 그동안 쉰다.
+
+    MOVED는 슬롯 표를 고친 뒤 새 노드로, ASK는 ASKING을 붙여 지정된 노드로 다시 보낸다.
+    그 외 에러는 PipelineWriter처럼 close()에서 첫 번째 것을 올려보낸다.
+
+        async with ClusterWriter(rc, chunk_size=10000) as writer:
+            for key in keys:
+                await writer.add("SET", key, 0)
+        writer.stats()
+    """
+
+    def __init__(
+        self,
+        rc: RedisCluster,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        in_flight: int = DEFAULT_IN_FLIGHT,
+        max_redirects: int = MAX_REDIRECTS,
+    ):
+        self.rc = rc
+        self.chunk_size = chunk_size
+        self.in_flight = in_flight
+        self.max_redirects = max_redirects
+
+        self.moved = 0
+        self.asked = 0
+        self.try_again = 0
+        self.peak_rss_mb = current_rss_mb()
+
+        self._queues: Dict[str, _NodeQueue] = {}
+        self._slot_nodes: Dict[int, ClusterNode] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._first_error: Optional[BaseException] = None
+        self._start = time.perf_counter()
+        self._elapsed = 0.0
+
+    async def __aenter__(self) -> "ClusterWriter":
+        await self.rc.initialize()
+        self._start = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+        else:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _queue(self, node: ClusterNode) -> _NodeQueue:
+        queue = self._queues.get(node.name)
+        if queue is None:
+            queue = self._queues[node.name] = _NodeQueue(node, self.in_flight)
+        return queue
+
+    def _node_of(self, slot: int) -> ClusterNode:
+        node = self._slot_nodes.get(slot)
+        if node is None:
+            node = self._slot_nodes[slot] = self.rc.nodes_manager.get_node_from_slot(slot)
+        return node
+
+    async def add(self, *args: Any):
+        """execute_command와 같은 인자. 두 번째 인자(첫 번째 키)로 슬롯을 정한다."""
+        slot = key_slot(self.rc.encoder.encode(args[1]))
+        queue = self._queue(self._node_of(slot))
+        queue.pending.append(PipelineCommand(len(queue.pending), *args))
+        if len(queue.pending) >= self.chunk_size:
+            await self._flush(queue)
+
+    async def flush(self):
+        for queue in list(self._queues.values()):
+            await self._flush(queue)
+
+    async def _flush(self, queue: _NodeQueue):
+        if not queue.pending:
+            return
+        commands, queue.pending = queue.pending, []
+        # 이 노드로 나가 있는 배치가 in_flight개면 하나가 끝날 때까지 기다린다. 다른 노드의 배치와는 무관하다.
+        await queue.slots.acquire()
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+        self._tasks = [task for task in self._tasks if not task.done()]
+        self._tasks.append(asyncio.create_task(self._execute(queue, commands)))
+
+    async def _execute(self, queue: _NodeQueue, commands: List[PipelineCommand]):
+        try:
+            t0 = time.perf_counter()
+            await self._send(queue.node, commands, asking=False, ttl=self.max_redirects)
+            queue.batch_times.append(time.perf_counter() - t0)
+            queue.commands += len(commands)
+        except Exception as e:
+            self._first_error = self._first_error or e
+        finally:
+            queue.slots.release()
+
+    async def _send(self, node: ClusterNode, commands: List[PipelineCommand], asking: bool, ttl: int):
+        if asking:
+            # ASK는 명령마다 바로 앞에 ASKING이 있어야 한다.
+            batch = []
+            for command in commands:
+                batch += (PipelineCommand(0, "ASKING"), command)
+        else:
+            batch = commands
+        for command in commands:
+            command.result = None
+        await node.execute_pipeline(batch)
+
+        redirects: Dict[Tuple[str, bool], Tuple[ClusterNode, List[PipelineCommand]]] = {}
+        for command in commands:
+            result = command.result
+            if not isinstance(result, Exception):
+                continue
+            # MovedError는 AskError의 하위 클래스라 먼저 본다.
+            if isinstance(result, MovedError):
+                self.moved += 1
+                # 슬롯 표를 고치고, 이후 add()도 새 노드로 가도록 캐시를 지운다.
+                self.rc.nodes_manager.update_moved_exception(result)
+                self._slot_nodes.pop(result.slot_id, None)
+                target, ask = self._node_of(result.slot_id), False
+            elif isinstance(result, AskError):
+                self.asked += 1
+                target, ask = self.rc.get_node(host=result.host, port=result.port), True
+            elif isinstance(result, TryAgainError):
+                self.try_again += 1
+                target, ask = node, asking
+            else:
+                self._first_error = self._first_error or result
+                continue
+            if target is None:
+                # ASK 대상이 아직 모르는 노드면 슬롯 정보를 다시 읽어 온다.
+                await self.rc.nodes_manager.initialize()
+                target = self.rc.get_node(host=result.host, port=result.port)
+            key = (target.name, ask)
+            if key not in redirects:
+                redirects[key] = (target, [])
+            redirects[key][1].append(command)
+
+        if not redirects:
+            return
+        if ttl <= 0:
+            _, batch = next(iter(redirects.values()))
+            raise batch[0].result
+        if any(command.result.__class__ is TryAgainError for _, batch in redirects.values() for command in batch):
+            await asyncio.sleep(TRYAGAIN_DELAY)
+        await asyncio.gather(
+            *(self._send(target, batch, ask, ttl - 1) for (_, ask), (target, batch) in redirects.items())
+        )
+
+    async def close(self):
+        await self.flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._elapsed = time.perf_counter() - self._start
+        if self._first_error is not None:
+            raise self._first_error
+
+    def stats(self) -> Dict[str, Any]:
+        commands = sum(queue.commands for queue in self._queues.values())
+        elapsed = self._elapsed
+        return {
+            "commands": commands,
+            "batches": sum(len(queue.batch_times) for queue in self._queues.values()),
+            "chunk_size": self.chunk_size,
+            "in_flight": self.in_flight,
+            "elapsed": round(elapsed, 3),
+            "ops_per_sec": round(commands / elapsed, 1) if elapsed else 0,
+            "moved": self.moved,
+            "asked": self.asked,
+            "try_again": self.try_again,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "nodes": {name: queue.stats(elapsed) for name, queue in self._queues.items()},
+        }
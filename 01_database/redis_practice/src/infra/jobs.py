@@ -0,0 +1,254 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Literal, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+
+from src.infra.tracing import RedisTrace, start_trace
+from src.utils.metrics import metrics
+
+'''
+오래 걸리는 작업(/clear, /query/add, /search/*/add 등)을 요청 밖의 백그라운드 태스크로 돌린다.
+제출하면 job_id를 바로 돌려주고, 진행률/처리량은 GET /jobs/{id}, 취소는 DELETE /jobs/{id}.
+
+작업은 일정 단위마다 job.tick(n)을 부르고, 여기서 속도 제한이 걸린다.
+옆에서 PING 지연을 주기적으로 재서 JOB_MAX_LATENCY_MS를 넘으면 허용 속도를 절반으로 줄이고,
+여유가 생기면 조금씩 다시 올린다. (AIMD 와 비슷하되 증가도 곱셈으로 해서 빨리 회복한다)
+'''
+
+JobStatus = Literal["pending", "running", "done", "failed", "cancelled"]
+Probe = Callable[[], Awaitable[float]]
+
+JOB_MAX_LATENCY_MS = float(os.getenv("JOB_MAX_LATENCY_MS", "5"))
+PROBE_INTERVAL = 0.1
+# 제한 속도를 올리는 조건: 지연이 목표의 절반 아래
+HEALTHY_RATIO = 0.5
+DECREASE = 0.5
+INCREASE = 1.25
+# 제한 속도가 실제 처리량의 이 배수를 넘으면 제한이 의미가 없으므로 푼다.
+UNLIMIT_RATIO = 2.0
+MIN_RATE = 100.0
+# 끝난 작업은 이만큼만 기억한다.
+MAX_FINISHED = 100
+
+
+class Throttle:
+    """허용 속도(단위/초)를 지키는 토큰 버킷. rate=None이면 제한 없음."""
+
+    def __init__(self, probe: Probe, max_latency_ms: float = JOB_MAX_LATENCY_MS):
+        self.probe = probe
+        self.max_latency = max_latency_ms / 1000
+        self.rate: Optional[float] = None
+        self.latency = 0.0
+        self.slowdowns = 0
+        self.waited = 0.0
+        self._tokens = 0.0
+        self._at = time.perf_counter()
+        self._done = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def _refill(self, now: float):
+        if self.rate is not None:
+            # 한 번에 몰아 쓸 수 있는 양은 측정 주기 하나만큼으로 제한한다.
+            self._tokens = min(self._tokens + (now - self._at) * self.rate, self.rate * PROBE_INTERVAL)
+        self._at = now
+
+    async def wait(self, n: int):
+        self._done += n
+        self._refill(time.perf_counter())
+        if self.rate is None:
+            return
+        self._tokens -= n
+        # 기다리는 동안 제한이 바뀌거나 풀릴 수 있으므로 조금씩 나눠 자면서 다시 확인한다.
+        while self.rate is not None and self._tokens < 0:
+            delay = min(-self._tokens / self.rate, PROBE_INTERVAL)
+            await asyncio.sleep(delay)
+            self.waited += delay
+            self._refill(time.perf_counter())
+
+    async def _watch(self):
+        last_done, last_at = self._done, time.perf_counter()
+        while True:
+            await asyncio.sleep(PROBE_INTERVAL)
+            try:
+                self.latency = await self.probe()
+            except Exception:
+                # PING도 실패할 만큼 바쁘면 가장 느린 경우로 본다.
+                self.latency = float("inf")
+            now = time.perf_counter()
+            throughput = (self._done - last_done) / (now - last_at)
+            last_done, last_at = self._done, now
+
+            if self.latency > self.max_latency:
+                self.slowdowns += 1
+                self.rate = max(MIN_RATE, DECREASE * (self.rate if self.rate is not None else throughput))
+            elif self.rate is not None and self.latency < self.max_latency * HEALTHY_RATIO:
+                self.rate *= INCREASE
+                if self.rate > throughput * UNLIMIT_RATIO and self.rate > MIN_RATE * UNLIMIT_RATIO:
+                    self.rate = None
+            self._refill(now)
+            if self.rate is None:
+                self._tokens = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limit": round(self.rate, 1) if self.rate is not None else None,
+            "latency_ms": round(self.latency * 1000, 3),
+            "max_latency_ms": self.max_latency * 1000,
+            "slowdowns": self.slowdowns,
+            "throttled_seconds": round(self.waited, 3),
+        }
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, params: Dict[str, Any], throttle: Optional[Throttle]):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.throttle = throttle
+        self.status: JobStatus = "pending"
+        self.done = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.trace: Optional[RedisTrace] = None
+
+    async def tick(self, n: int = 1):
+        """작업 단위 n개를 끝냈다. 진행률을 올리고 속도 제한에 걸리면 여기서 기다린다."""
+        self.done += n
+        if self.throttle is not None:
+            await self.throttle.wait(n)
+
+    async def track(self, items: Iterable, every: int = 1000) -> AsyncIterator:
+        """명령 이터러블을 흘려보내면서 every개마다 tick한다. (PipelineWriter/mass_insert 입력용)"""
+        n = 0
+        for item in items:
+            yield item
+            n += 1
+            if n >= every:
+                await self.tick(n)
+                n = 0
+        if n:
+            await self.tick(n)
+
+    def accepted(self) -> Dict[str, Any]:
+        """제출 직후 응답 본문. (HTTP 202)"""
+        return {"status": "accepted", "job_id": self.id, "job": f"/jobs/{self.id}"}
+
+    def cancel(self) -> bool:
+        if self.task is None or self.task.done():
+            return False
+        self.task.cancel()
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "done": self.done,
+            "elapsed": round(elapsed, 3),
+            "items_per_sec": round(self.done / elapsed, 1) if elapsed else 0,
+            **(self.throttle.stats() if self.throttle is not None else {}),
+            "redis": self.trace.to_dict() if self.trace is not None else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def submit(
+        self,
+        kind: str,
+        run: Callable[[Job], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None,
+        probe: Optional[Probe] = None,
+    ) -> Job:
+        job_id = f"{kind}-{int(time.time())}-{next(self._ids)}"
+        job = Job(job_id, kind, params or {}, Throttle(probe) if probe is not None else None)
+        self._jobs[job_id] = job
+        self._evict()
+        job.task = asyncio.create_task(self._run(job, run))
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[Any]]):
+        job.status = "running"
+        job.started = time.time()
+        # 태스크는 제출한 요청의 컨텍스트를 복사해 오므로, 작업 자신의 trace로 갈아끼워 요청 trace와 섞이지 않게 한다.
+        job.trace = start_trace()
+        if job.throttle is not None:
+            job.throttle.start()
+        try:
+            job.result = await run(job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            if job.throttle is not None:
+                await job.throttle.stop()
+            metrics.inc("jobs_total", kind=job.kind, status=job.status)
+            metrics.inc("job_items_total", job.done, kind=job.kind)
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return list(self._jobs.values())
+
+
+def ping_probe(r: redis.Redis) -> Probe:
+    async def probe() -> float:
+        t0 = time.perf_counter()
+        await r.ping()
+        return time.perf_counter() - t0
+    return probe
+
+
+def cluster_ping_probe(rc: RedisCluster) -> Probe:
+    """프라이머리마다 PING을 보내 가장 느린 노드의 지연을 쓴다. (작업은 보통 한 노드를 가장 세게 누른다)"""
+    async def ping(node) -> float:
+        t0 = time.perf_counter()
+        await rc.execute_command("PING", target_nodes=node)
+        return time.perf_counter() - t0
+
+    async def probe() -> float:
+        return max(await asyncio.gather(*(ping(node) for node in rc.get_primaries())))
+    return probe
+
+
+jobs = JobManager()
+
+
+def get_jobs() -> JobManager:
+    return jobs
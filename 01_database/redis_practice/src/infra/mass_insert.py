@@ -0,0 +1,404 @@
+import asyncio
+import time
+from typing import Any, AsyncIterable, Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+from redis.crc import key_slot
+
+from src.infra.tracing import current_trace
+
+'''
+redis-cli --pipe 방식의 대량 적재.
+redis-py 파이프라인은 명령마다 Command 객체를 만들고, 응답마다 파싱 + 콜백을 거친다.
+여기서는 RESP 바이트를 재사용하는 버퍼에 직접 써서 소켓으로 흘려보내고,
+응답은 파이썬 객체로 만들지 않고 개수와 에러만 센다.
+'''
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+# 응답을 아직 받지 못한 명령이 이만큼 쌓이면 쓰기를 잠깐 멈춘다. (서버 출력 버퍼가 끝없이 커지지 않게)
+DEFAULT_MAX_PENDING = 200000
+READ_SIZE = 1024 * 1024
+
+Command = Tuple[Any, ...]
+Commands = Union[Iterable[Command], AsyncIterable[Command]]
+# 적재 엔드포인트의 loader 인자: redis-py 파이프라인(PipelineWriter) 또는 이 모듈의 원시 RESP 적재
+Loader = Literal["pipeline", "resp"]
+
+
+def _to_bytes(arg: Any) -> bytes:
+    if isinstance(arg, bytes):
+        return arg
+    if isinstance(arg, str):
+        return arg.encode()
+    if isinstance(arg, int):
+        return b"%d" % arg
+    return repr(arg).encode() if isinstance(arg, float) else str(arg).encode()
+
+
+def _bulk(arg: Any) -> bytes:
+    data = _to_bytes(arg)
+    return b"$%d\r\n%b\r\n" % (len(data), data)
+
+
+class RespTemplate:
+    """
+    고정 인자는 미리 인코딩해 두고 None 자리만 채우는 명령 틀.
+    RespTemplate("SET", None, 0) 이면 (template, key) 만 넘기면 되고, 명령마다 포맷 한 번으로 인코딩된다.
+    """
+
+    def __init__(self, *args: Any):
+        self.args = args
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            parts.append(b"$%d\r\n%b\r\n" if arg is None else _bulk(arg).replace(b"%", b"%%"))
+        self._fmt = b"".join(parts)
+        # 클러스터 슬롯 계산용 키: 틀에 고정돼 있으면 그 값. 아니면 키 자리(args[1])가 첫 번째 빈칸이라 넘기는 값의 첫 번째가 키다.
+        self.key = None if args[1] is None else _to_bytes(args[1])
+
+    def encode(self, *values: Any) -> bytes:
+        if len(values) == 1:
+            data = values[0]
+            data = data.encode() if data.__class__ is str else _to_bytes(data)
+            return self._fmt % (len(data), data)
+        packed = []
+        for value in values:
+            data = _to_bytes(value)
+            packed += (len(data), data)
+        return self._fmt % tuple(packed)
+
+
+    def fill(self, *values: Any) -> Command:
+        """None 자리를 채운 일반 명령 인자. (redis-py execute_command 용)"""
+        values = iter(values)
+        return tuple(next(values) if arg is None else arg for arg in self.args)
+
+
+def command_args(command: Command) -> Command:
+    """RespTemplate 명령도 일반 인자 튜플로 바꿔, 같은 명령 스트림을 PipelineWriter로도 보낼 수 있게 한다."""
+    if command[0].__class__ is RespTemplate:
+        return command[0].fill(*command[1:])
+    return command
+
+
+def command_key(command: Command) -> bytes:
+    if isinstance(command[0], RespTemplate):
+        template = command[0]
+        return template.key if template.key is not None else _to_bytes(command[1])
+    return _to_bytes(command[1])
+
+
+class RespBuffer:
+    """명령을 RESP 배열로 인코딩해 모아두는 버퍼. 비운 뒤 같은 bytearray를 다시 쓴다."""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.count = 0
+        # 명령 이름처럼 반복되는 짧은 문자열 인자는 인코딩 결과를 재사용한다.
+        self._cache: Dict[Any, bytes] = {}
+
+    def add(self, *args: Any):
+        if args[0].__class__ is RespTemplate:
+            self.buf += args[0].encode(*args[1:])
+            self.count += 1
+            return
+        parts = [b"*%d\r\n" % len(args)]
+        cache = self._cache
+        for arg in args:
+            if arg.__class__ is not str:
+                parts.append(_bulk(arg))
+                continue
+            encoded = cache.get(arg)
+            if encoded is None:
+                encoded = _bulk(arg)
+                if len(cache) < 256 and len(encoded) < 24:
+                    cache[arg] = encoded
+            parts.append(encoded)
+        self.buf += b"".join(parts)
+        self.count += 1
+
+    def take(self) -> Tuple[bytes, int]:
+        data, count = bytes(self.buf), self.count
+        self.buf.clear()
+        self.count = 0
+        return data, count
+
+
+class ReplyCounter:
+    """RESP2 응답 스트림에서 최상위 응답 개수와 에러 응답만 센다."""
+
+    def __init__(self):
+        self.replies = 0
+        self.errors = 0
+        self.first_error: Optional[str] = None
+        self._tail = b""
+        # 읽고 있는 배열들의 남은 원소 수
+        self._stack: List[int] = []
+
+    def feed(self, data: bytes):
+        buf = self._tail + data if self._tail else data
+        end = buf.rfind(b"\r\n") + 2
+        # 대부분의 적재 명령(SET/INCRBY/ZADD/RPUSH)은 한 줄짜리 응답이라 줄 수만 세면 된다.
+        if end >= 2 and not self._stack and b"$" not in buf[:end] and b"*" not in buf[:end]:
+            lines = buf[:end]
+            self.replies += lines.count(b"\r\n")
+            if lines[:1] == b"-" or b"\r\n-" in lines:
+                self._count_errors(lines)
+            self._tail = buf[end:]
+            return
+        self._tail = self._scan(buf)
+
+    def _count_errors(self, lines: bytes):
+        for line in lines.split(b"\r\n"):
+            if line[:1] == b"-":
+                self.errors += 1
+                if self.first_error is None:
+                    self.first_error = line[1:].decode(errors="replace")
+
+    def _done(self):
+        while self._stack:
+            self._stack[-1] -= 1
+            if self._stack[-1] > 0:
+                return
+            self._stack.pop()
+        self.replies += 1
+
+    def _scan(self, buf: bytes) -> bytes:
+        pos = 0
+        n = len(buf)
+        while True:
+            end = buf.find(b"\r\n", pos)
+            if end < 0:
+                break
+            kind = buf[pos]
+            if kind == 0x24:  # $
+                length = int(buf[pos + 1:end])
+                after = end + 2 if length < 0 else end + 2 + length + 2
+                if after > n:
+                    break
+                pos = after
+            elif kind == 0x2A:  # *
+                count = int(buf[pos + 1:end])
+                pos = end + 2
+                if count > 0:
+                    self._stack.append(count)
+                    continue
+            else:
+                if kind == 0x2D and not self._stack:  # -
+                    self.errors += 1
+                    if self.first_error is None:
+                        self.first_error = buf[pos + 1:end].decode(errors="replace")
+                pos = end + 2
+            self._done()
+        return buf[pos:]
+
+
+async def _chunks(commands: Commands, chunk_bytes: int):
+    """명령을 chunk_bytes 크기의 RESP 덩어리로 묶는다. 동기 이터러블은 명령마다 이벤트 루프를 거치지 않는다."""
+    buf = RespBuffer()
+    if hasattr(commands, "__aiter__"):
+        async for command in commands:
+            buf.add(*command)
+            if len(buf.buf) >= chunk_bytes:
+                yield buf.take()
+    else:
+        for command in commands:
+            buf.add(*command)
+            if len(buf.buf) >= chunk_bytes:
+                yield buf.take()
+    if buf.count:
+        yield buf.take()
+
+
+async def _node_chunks(commands: Commands, chunk_bytes: int, node_of):
+    """클러스터용: 키 슬롯의 노드별 버퍼에 나눠 담고, 찬 버퍼부터 (노드, 덩어리)로 내보낸다."""
+    buffers: Dict[str, Tuple[ClusterNode, RespBuffer]] = {}
+
+    def add(command):
+        node = node_of(command_key(command))
+        if node.name not in buffers:
+            buffers[node.name] = (node, RespBuffer())
+        buf = buffers[node.name][1]
+        buf.add(*command)
+        return (node, buf) if len(buf.buf) >= chunk_bytes else None
+
+    if hasattr(commands, "__aiter__"):
+        async for command in commands:
+            full = add(command)
+            if full:
+                yield full[0], full[1].take()
+    else:
+        for command in commands:
+            full = add(command)
+            if full:
+                yield full[0], full[1].take()
+    for node, buf in buffers.values():
+        if buf.count:
+            yield node, buf.take()
+
+
+class _Stream:
+    """노드 하나로 가는 원시 연결. 쓰기와 응답 세기를 동시에 진행한다."""
+
+    def __init__(self, host: str, port: int, kwargs: Dict[str, Any], max_pending: int):
+        self.host = host
+        self.port = port
+        self.kwargs = kwargs
+        self.max_pending = max_pending
+        self.counter = ReplyCounter()
+        self.sent = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.batches = 0
+        self._progress = asyncio.Event()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._start = 0.0
+        self.elapsed = 0.0
+
+    async def open(self):
+        self._start = time.perf_counter()
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._read_task = asyncio.create_task(self._read())
+        # 연결 설정 명령(AUTH/SELECT)의 응답도 같이 세므로 에러가 나면 first_error에 남는다.
+        buf = RespBuffer()
+        if self.kwargs.get("password"):
+            username = self.kwargs.get("username")
+            buf.add("AUTH", *([username] if username else []), self.kwargs["password"])
+        if self.kwargs.get("db"):
+            buf.add("SELECT", self.kwargs["db"])
+        if buf.count:
+            await self.send(*buf.take())
+
+    async def _read(self):
+        while True:
+            data = await self._reader.read(READ_SIZE)
+            if not data:
+                return
+            self.bytes_received += len(data)
+            self.counter.feed(data)
+            self._progress.set()
+
+    async def send(self, data: bytes, count: int):
+        if self._read_task.done():
+            self._read_task.result()
+            raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+        self._writer.write(data)
+        await self._writer.drain()
+        self.sent += count
+        self.bytes_sent += len(data)
+        self.batches += 1
+        while self.sent - self.counter.replies > self.max_pending and not self._read_task.done():
+            self._progress.clear()
+            await self._progress.wait()
+
+    async def close(self):
+        if self._writer is None:
+            return
+        try:
+            while self.counter.replies < self.sent and not self._read_task.done():
+                self._progress.clear()
+                await self._progress.wait()
+        finally:
+            self._read_task.cancel()
+            self._writer.close()
+            self.elapsed = time.perf_counter() - self._start
+        if self.counter.replies < self.sent:
+            raise ConnectionError(f"{self.host}:{self.port} closed with {self.sent - self.counter.replies} replies missing")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "commands": self.sent,
+            "errors": self.counter.errors,
+            "first_error": self.counter.first_error,
+            "batches": self.batches,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "elapsed": round(self.elapsed, 3),
+            "ops_per_sec": round(self.sent / self.elapsed, 1) if self.elapsed else 0,
+        }
+
+
+def _trace(streams: List[_Stream]):
+    trace = current_trace()
+    if trace is not None:
+        trace.commands += sum(stream.sent for stream in streams)
+        trace.round_trips += sum(stream.batches for stream in streams)
+        trace.bytes_sent += sum(stream.bytes_sent for stream in streams)
+        trace.bytes_received += sum(stream.bytes_received for stream in streams)
+
+
+async def mass_insert(
+    r: redis.Redis,
+    commands: Commands,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    max_pending: int = DEFAULT_MAX_PENDING,
+) -> Dict[str, Any]:
+    """commands(이터러블 또는 async 이터러블)의 명령을 하나의 원시 연결로 흘려보낸다."""
+    kwargs = r.connection_pool.connection_kwargs
+    stream = _Stream(kwargs.get("host", "localhost"), kwargs.get("port", 6379), kwargs, max_pending)
+    await stream.open()
+    try:
+        async for data, count in _chunks(commands, chunk_bytes):
+            await stream.send(data, count)
+    finally:
+        await stream.close()
+        _trace([stream])
+    return stream.stats()
+
+
+async def cluster_mass_insert(
+    rc: RedisCluster,
+    commands: Commands,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    max_pending: int = DEFAULT_MAX_PENDING,
+) -> Dict[str, Any]:
+    """
+    명령의 첫 번째 인자(키)로 슬롯을 계산해 노드별 버퍼에 나눠 담고, 노드마다 원시 연결 하나로 동시에 보낸다.
+    적재 중에 슬롯이 옮겨지면 MOVED/ASK는 재시도하지 않고 에러로 센다.
+    """
+    await rc.initialize()
+    t0 = time.perf_counter()
+    streams: Dict[str, _Stream] = {}
+    sending: Dict[str, asyncio.Task] = {}
+    slot_nodes: Dict[int, ClusterNode] = {}
+
+    def node_of(key: bytes) -> ClusterNode:
+        slot = key_slot(key)
+        node = slot_nodes.get(slot)
+        if node is None:
+            node = slot_nodes[slot] = rc.nodes_manager.get_node_from_slot(slot)
+        return node
+
+    try:
+        async for node, (data, count) in _node_chunks(commands, chunk_bytes, node_of):
+            name = node.name
+            if name not in streams:
+                streams[name] = _Stream(node.host, node.port, rc.connection_kwargs, max_pending)
+                await streams[name].open()
+            # 노드마다 보내는 동안 다른 노드 버퍼는 계속 채운다. 같은 노드의 직전 전송은 끝난 뒤에 보낸다.
+            if name in sending:
+                await sending[name]
+            sending[name] = asyncio.create_task(streams[name].send(data, count))
+        await asyncio.gather(*sending.values())
+    finally:
+        for task in sending.values():
+            task.cancel()
+        results = await asyncio.gather(*(stream.close() for stream in streams.values()), return_exceptions=True)
+        _trace(list(streams.values()))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    elapsed = time.perf_counter() - t0
+    nodes = {name: stream.stats() for name, stream in streams.items()}
+    total = sum(node["commands"] for node in nodes.values())
+    return {
+        "commands": total,
+        "errors": sum(node["errors"] for node in nodes.values()),
+        "first_error": next((node["first_error"] for node in nodes.values() if node["first_error"]), None),
+        "elapsed": round(elapsed, 3),
+        "ops_per_sec": round(total / elapsed, 1) if elapsed else 0,
+        "nodes": nodes,
+    }
@@ -0,0 +1,249 @@
+import asyncio
+import math
+import time
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode, PipelineCommand, RedisCluster
+
+from src.infra.adaptive_scan import node_name, scan_call
+
+'''
+패턴에 맞는 키들이 메모리를 얼마나 쓰는지 표본으로 추정한다.
+키 전체에 MEMORY USAGE를 부르면 2,400만 키에서 수 분이 걸리므로 시간 예산(budget_ms) 안에서 표본만 잰다.
+
+1. 키 수: RANDOMKEY를 파이프라인으로 여러 번 불러 패턴에 맞는 비율 p를 보고 DBSIZE * p (Wilson 구간)
+   SCAN이 예산 안에 한 바퀴를 다 돌면 본 키 수가 곧 정확한 키 수다.
+2. 키당 바이트: RANDOMKEY로 걸린 키 + SCAN MATCH로 모은 키에 MEMORY USAGE / OBJECT ENCODING 을 파이프라인으로
+   SCAN 순서는 해시 테이블 순서라 키 이름과 무관하므로, 앞부분만 읽어도 표본으로 쓸 수 있다고 본다.
+3. 총 바이트 = 키 수 * 평균. 구간은 키 수 구간과 평균의 구간(정규 근사)을 곱한 보수적인 값이다.
+
+클러스터는 프라이머리마다 따로 추정하고(노드마다 같은 예산을 동시에 쓴다) 합친다.
+'''
+
+DEFAULT_BUDGET_MS = 2000
+DEFAULT_SAMPLE_SIZE = 2000
+DEFAULT_RANDOM_SAMPLES = 2000
+# 한 번의 파이프라인에 싣는 명령 수
+PIPELINE_SIZE = 500
+# RANDOMKEY 단계는 예산의 이 비율까지만 쓴다. 나머지는 SCAN과 MEMORY USAGE 몫이다.
+RANDOM_BUDGET_RATIO = 0.3
+# 95% 신뢰구간
+Z = 1.96
+
+Command = Tuple[Any, ...]
+
+
+class _Node:
+    """추정 대상 노드 하나. 단일 노드는 redis.Redis, 클러스터는 RedisCluster + ClusterNode."""
+
+    def __init__(self, r, node: Optional[ClusterNode] = None):
+        self.r = r
+        self.node = node
+        self.name = node.name if node is not None else node_name(r)
+
+    async def execute(self, commands: Sequence[Command]) -> List[Any]:
+        """파이프라인 한 번. 명령별 에러는 결과 자리에 예외로 남는다."""
+        if self.node is None:
+            pipe = self.r.pipeline(transaction=False)
+            for command in commands:
+                pipe.execute_command(*command)
+            return await pipe.execute(raise_on_error=False)
+        # 노드를 정해 보내므로 슬롯 라우팅(ClusterPipeline)을 거치지 않는다. (RANDOMKEY는 키가 없다)
+        batch = [PipelineCommand(i, *command) for i, command in enumerate(commands)]
+        await self.node.execute_pipeline(batch)
+        return [command.result for command in batch]
+
+    async def dbsize(self) -> int:
+        if self.node is None:
+            return await self.r.dbsize()
+        return await self.r.execute_command("DBSIZE", target_nodes=self.node)
+
+    async def scan(self, cursor: int, match: str) -> Tuple[int, List[str]]:
+        return await scan_call(self.r, cursor, match, node=self.node)
+
+
+def wilson(hits: int, n: int, z: float = Z) -> Tuple[float, float, float]:
+    """이항 비율의 Wilson 점수 구간. 비율이 0이나 1에 가까워도 구간이 [0, 1]을 벗어나지 않는다."""
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    p = hits / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return p, max(0.0, center - half), min(1.0, center + half)
+
+
+def _percentile(sorted_values: List[int], p: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+async def _random_keys(node: _Node, match: str, samples: int, deadline: float) -> Tuple[int, List[str]]:
+    """RANDOMKEY를 samples번까지 부르고 (부른 횟수, 패턴에 맞은 키)를 돌려준다."""
+    calls, hits = 0, []
+    while calls < samples and (calls == 0 or time.perf_counter() < deadline):
+        size = min(PIPELINE_SIZE, samples - calls)
+        for key in await node.execute([("RANDOMKEY",)] * size):
+            # 키가 하나도 없으면 None. 에러도 표본에서 뺀다.
+            if isinstance(key, str) and fnmatchcase(key, match):
+                hits.append(key)
+        calls += size
+    return calls, hits
+
+
+async def _scan_keys(node: _Node, match: str, want: int, deadline: float) -> Tuple[List[str], bool]:
+    """SCAN MATCH로 want개까지 모은다. 예산 안에 한 바퀴를 다 돌았으면 complete=True."""
+    seen: Dict[str, None] = {}
+    cursor = 0
+    while True:
+        cursor, batch = await node.scan(cursor, match)
+        # 리해싱 중에는 같은 키가 두 번 나올 수 있다.
+        seen.update(dict.fromkeys(batch))
+        if cursor == 0:
+            return list(seen), True
+        if len(seen) >= want or time.perf_counter() >= deadline:
+            return list(seen), False
+
+
+async def _measure(node: _Node, keys: List[str], deadline: float) -> Tuple[List[int], List[int], Dict[str, int]]:
+    sizes, key_bytes, encodings = [], [], {}
+    for i in range(0, len(keys), PIPELINE_SIZE):
+        if i and time.perf_counter() >= deadline:
+            break
+        chunk = keys[i : i + PIPELINE_SIZE]
+        commands: List[Command] = []
+        for key in chunk:
+            commands += [("MEMORY USAGE", key), ("OBJECT ENCODING", key)]
+        results = await node.execute(commands)
+        for key, usage, encoding in zip(chunk, results[::2], results[1::2]):
+            # 표본을 모은 뒤 지워진 키는 None
+            if not isinstance(usage, int):
+                continue
+            sizes.append(usage)
+            key_bytes.append(len(key.encode()))
+            if isinstance(encoding, str):
+                encodings[encoding] = encodings.get(encoding, 0) + 1
+    return sizes, key_bytes, encodings
+
+
+async def estimate_node(
+    node: _Node,
+    match: str,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_samples: int = DEFAULT_RANDOM_SAMPLES,
+    budget_ms: int = DEFAULT_BUDGET_MS,
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000
+    dbsize = await node.dbsize()
+
+    if match == "*" or dbsize == 0:
+        calls, random_hits = 0, []
+        ratio = (1.0, 1.0, 1.0)
+    else:
+        calls, random_hits = await _random_keys(node, match, random_samples, start + budget_ms / 1000 * RANDOM_BUDGET_RATIO)
+        ratio = wilson(len(random_hits), calls)
+
+    scanned, complete = await _scan_keys(node, match, sample_size, deadline) if dbsize else ([], True)
+    if complete:
+        keys_estimate = keys_low = keys_high = float(len(scanned))
+    else:
+        keys_estimate, keys_low, keys_high = (dbsize * p for p in ratio)
+        # SCAN/RANDOMKEY에서 실제로 본 키 수보다 적을 수는 없다.
+        seen = len(set(scanned) | set(random_hits))
+        keys_estimate, keys_low = max(keys_estimate, seen), max(keys_low, seen)
+        keys_high = max(keys_high, keys_low)
+
+    # RANDOMKEY로 걸린 키를 먼저 쓰고(균등 표본) 모자라는 만큼 SCAN 표본으로 채운다.
+    sample = list(dict.fromkeys(random_hits + scanned))[:sample_size]
+    sizes, key_bytes, encodings = await _measure(node, sample, deadline)
+
+    n = len(sizes)
+    mean = sum(sizes) / n if n else 0.0
+    sd = math.sqrt(sum((size - mean) ** 2 for size in sizes) / (n - 1)) if n > 1 else 0.0
+    # 전체를 다 쟀으면 오차가 없다. 모집단의 상당 부분을 쟀으면 유한 모집단 보정만큼 구간이 줄어든다.
+    exact = complete and n == keys_estimate
+    half = Z * sd / math.sqrt(n) if n else 0.0
+    if keys_estimate > 1:
+        half *= math.sqrt(max(0.0, keys_estimate - n) / (keys_estimate - 1))
+    mean_low, mean_high = max(0.0, mean - half), mean + half
+    sizes.sort()
+    return {
+        "node": node.name,
+        "dbsize": dbsize,
+        "exact": exact,
+        "keys": {
+            "estimate": round(keys_estimate),
+            "low": round(keys_low),
+            "high": round(keys_high),
+            "match_ratio": round(keys_estimate / dbsize, 6) if dbsize else 0,
+            "randomkey_calls": calls,
+            "scan_complete": complete,
+        },
+        "bytes": {
+            "estimate": round(keys_estimate * mean),
+            "low": round(keys_low * mean_low),
+            "high": round(keys_high * mean_high),
+        },
+        "per_key": {
+            "sampled": n,
+            "mean": round(mean, 1),
+            "mean_low": round(mean_low, 1),
+            "mean_high": round(mean_high, 1),
+            "stddev": round(sd, 1),
+            "p50": _percentile(sizes, 50),
+            "p90": _percentile(sizes, 90),
+            "p99": _percentile(sizes, 99),
+            "max": sizes[-1] if sizes else 0,
+            # 키 이름 자체의 바이트. MEMORY USAGE에 포함된다.
+            "key_name_mean": round(sum(key_bytes) / n, 1) if n else 0,
+        },
+        "encodings": encodings,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def _combine(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """노드별 추정을 더한다. 구간도 그대로 더하므로 (노드끼리 독립이라 보면) 실제보다 넓은 보수적인 구간이다."""
+    keys = {bound: sum(node["keys"][bound] for node in nodes) for bound in ("estimate", "low", "high")}
+    total = {bound: sum(node["bytes"][bound] for node in nodes) for bound in ("estimate", "low", "high")}
+    encodings: Dict[str, int] = {}
+    for node in nodes:
+        for encoding, count in node["encodings"].items():
+            encodings[encoding] = encodings.get(encoding, 0) + count
+    return {
+        "exact": all(node["exact"] for node in nodes),
+        "keys": keys,
+        "bytes": total,
+        "bytes_per_key": round(total["estimate"] / keys["estimate"], 1) if keys["estimate"] else 0,
+        "sampled": sum(node["per_key"]["sampled"] for node in nodes),
+        "encodings": encodings,
+    }
+
+
+async def estimate_memory(
+    r: redis.Redis,
+    match: str,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_samples: int = DEFAULT_RANDOM_SAMPLES,
+    budget_ms: int = DEFAULT_BUDGET_MS,
+) -> Dict[str, Any]:
+    node = await estimate_node(_Node(r), match, sample_size, random_samples, budget_ms)
+    return {"pattern": match, **_combine([node]), "nodes": {node["node"]: node}}
+
+
+async def cluster_estimate_memory(
+    rc: RedisCluster,
+    match: str,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_samples: int = DEFAULT_RANDOM_SAMPLES,
+    budget_ms: int = DEFAULT_BUDGET_MS,
+) -> Dict[str, Any]:
+    """프라이머리마다 동시에 추정한다. sample_size/random_samples/budget_ms는 노드마다 적용된다."""
+    nodes = await asyncio.gather(
+        *(estimate_node(_Node(rc, node), match, sample_size, random_samples, budget_ms) for node in rc.get_primaries())
+    )
+    return {"pattern": match, **_combine(nodes), "nodes": {node["node"]: node for node in nodes}}
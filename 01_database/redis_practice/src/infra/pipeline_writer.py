@@ -0,0 +1,123 @@
+import asyncio
+import resource
+import time
+from typing import Any, Dict, List
+
+# 한 파이프라인에 담을 명령 수 / 대략적인 인자 바이트 수 기본값
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+# 동시에 실행 중일 수 있는 파이프라인 수
+DEFAULT_IN_FLIGHT = 2
+
+
+def current_rss_mb() -> float:
+    """현재 프로세스 RSS(MB). /proc 가 없으면 최대 RSS로 대신한다."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PipelineWriter:
+    """
+    명령을 N개(또는 N바이트)마다 끊어 파이프라인으로 보내는 쓰기 전용 실행기.
+    전체 요청을 한 파이프라인에 쌓지 않으므로 클라이언트 메모리가 청크 크기로 제한되고,
+    첫 청크부터 바로 전송이 시작된다. in_flight > 1 이면 청크 간 순서는 보장되지 않는다.
+
+        async with PipelineWriter(r, chunk_size=10000) as writer:
+            for key in keys:
+                await writer.add("set", key, 0)
+        writer.stats()
+    """
+
+    def __init__(
+        self,
+        client,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        in_flight: int = DEFAULT_IN_FLIGHT,
+    ):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.chunk_bytes = chunk_bytes
+        self.in_flight = in_flight
+
+        self.commands = 0
+        self.batch_times: List[float] = []
+        self.peak_rss_mb = current_rss_mb()
+
+        self._pipe = client.pipeline()
+        self._pending = 0
+        self._pending_bytes = 0
+        self._slots = asyncio.Semaphore(in_flight)
+        self._tasks: List[asyncio.Task] = []
+        self._start = time.perf_counter()
+        self._elapsed = 0.0
+
+    async def __aenter__(self) -> "PipelineWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+        else:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def add(self, command: str, *args: Any, **kwargs: Any):
+        getattr(self._pipe, command)(*args, **kwargs)
+        self._pending += 1
+        self._pending_bytes += sum(len(str(arg)) for arg in args)
+        if self._pending >= self.chunk_size or self._pending_bytes >= self.chunk_bytes:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pipe, size = self._pipe, self._pending
+        self._pipe = self.client.pipeline()
+        self._pending = 0
+        self._pending_bytes = 0
+
+        # 실행 중인 파이프라인이 in_flight 개를 넘으면 하나가 끝날 때까지 다음 청크를 쌓지 않는다.
+        await self._slots.acquire()
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+        # 끝난 배치 중 실패한 것은 close()에서 올려보내도록 남겨둔다.
+        self._tasks = [task for task in self._tasks if not task.done() or task.exception()]
+        self._tasks.append(asyncio.create_task(self._execute(pipe, size)))
+
+    async def _execute(self, pipe, size: int):
+        try:
+            t0 = time.perf_counter()
+            await pipe.execute()
+            self.batch_times.append(time.perf_counter() - t0)
+            self.commands += size
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        await self.flush()
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 예외가 난 배치가 있으면 첫 번째 예외를 그대로 올려보낸다.
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        self._elapsed = time.perf_counter() - self._start
+
+    def stats(self) -> Dict[str, Any]:
+        times = sorted(self.batch_times)
+        return {
+            "commands": self.commands,
+            "batches": len(times),
+            "chunk_size": self.chunk_size,
+            "in_flight": self.in_flight,
+            "elapsed": round(self._elapsed, 3),
+            "ops_per_sec": round(self.commands / self._elapsed, 1) if self._elapsed else 0,
+            "batch_p50": round(times[len(times) // 2], 4) if times else 0,
+            "batch_max": round(times[-1], 4) if times else 0,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
@@ -1,8 +1,31 @@
+import os
+
 import redis
+import redis.asyncio as aioredis
+
+from src.infra.tracing import TracingConnection
+
+# docker-compose 기본값. 로컬 redis-server로 돌릴 때는 환경변수로 바꾼다. (src/benchmark 참고)
+REDIS_HOST = os.getenv("REDIS_HOST", "redis0")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 
-_redis = redis.Redis(host="redis0", port=6379, db=0, decode_responses=True)
+_redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
+_async_redis = aioredis.Redis(
+    connection_pool=aioredis.ConnectionPool(
+        connection_class=TracingConnection,
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=0,
+        decode_responses=True,
+    )
+)
 
 
 def get_redis() -> redis.Redis:
     """FastAPI Depends용 Redis 클라이언트."""
     return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """FastAPI Depends용 asyncio Redis 클라이언트."""
+    return _async_redis
@@ -1,13 +1,31 @@
-from redis.cluster import RedisCluster, ClusterNode
+import os
 
-_redis = RedisCluster(
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.asyncio.cluster import ClusterNode as AsyncClusterNode
+
+from src.infra.slot_skew import SlotTrackingConnection
+
+REDIS_CLUSTER_HOST = os.getenv("REDIS_CLUSTER_HOST", "redis1")
+REDIS_CLUSTER_PORT = int(os.getenv("REDIS_CLUSTER_PORT", "6379"))
+
+# 생성 시점에 연결하지 않고 첫 요청에서 슬롯 정보를 가져온다.
+# 그래서 클러스터 없이 단일 노드만 띄워도 앱이 뜬다. (클러스터 라우트만 실패한다)
+_async_redis = AsyncRedisCluster(
     startup_nodes=[
-        ClusterNode("redis1", 6379),
+        AsyncClusterNode(REDIS_CLUSTER_HOST, REDIS_CLUSTER_PORT),
     ],
     decode_responses=True,
     socket_timeout=2,
     socket_connect_timeout=2,
 )
+# asyncio RedisCluster는 connection_class 인자를 받지 않는다.
+# 이후 발견되는 노드도 같은 connection_kwargs로 만들어지므로 여기서 바꿔두면 모든 노드 연결에 적용된다.
+# SlotTrackingConnection은 TracingConnection에 슬롯별 요청 수 추적(기본 꺼짐)을 더한 것이다.
+_async_redis.connection_kwargs["connection_class"] = SlotTrackingConnection
+for _node in _async_redis.get_nodes():
+    _node.connection_class = SlotTrackingConnection
 
-def get_redis_cluster() -> RedisCluster:
-    return _redis
\ No newline at end of file
+async def get_async_redis_cluster() -> AsyncRedisCluster:
+    # get_primaries() 등 노드 정보를 바로 쓰려면 초기화가 끝나 있어야 한다. (이미 초기화됐다면 no-op)
+    await _async_redis.initialize()
+    return _async_redis
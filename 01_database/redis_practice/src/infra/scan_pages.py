@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import json
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+
+from src.infra.adaptive_scan import node_name, scan_call
+
+'''
+패턴 조회를 여러 HTTP 요청으로 나눠 이어 가는 페이지 단위 SCAN.
+한 요청은 시간(budget_ms) 또는 작업량(max_keys) 예산을 다 쓰면 멈추고, 다음 페이지를 위한 커서 토큰을 돌려준다.
+토큰에는 노드별 SCAN 커서가 들어 있어 클러스터에서도 노드마다 멈춘 자리부터 이어 간다.
+
+SCAN 보장과 같다: 조회 내내 있던 키는 적어도 한 번 나오고, 중간에 생기거나 지워진 키는 나올 수도 안 나올 수도 있으며,
+리해싱이 끼면 같은 키가 두 번 나올 수 있다.
+'''
+
+DEFAULT_BUDGET_MS = 200
+TOKEN_VERSION = 1
+
+ScanOnce = Callable[[int], Awaitable[Tuple[int, List[str]]]]
+
+
+class InvalidCursor(ValueError):
+    """토큰을 해석할 수 없거나, 다른 패턴/노드 구성에서 만들어진 토큰."""
+
+
+def _pattern_hash(match: str) -> int:
+    return zlib.crc32(match.encode())
+
+
+def encode_cursor(match: str, cursors: Dict[str, int]) -> Optional[str]:
+    """남은 노드별 커서를 불투명한 토큰으로 만든다. 모든 노드가 끝났으면 None."""
+    if not cursors:
+        return None
+    payload = json.dumps({"v": TOKEN_VERSION, "p": _pattern_hash(match), "c": cursors}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, match: str) -> Dict[str, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        version, pattern, cursors = payload["v"], payload["p"], payload["c"]
+        cursors = {str(name): int(cursor) for name, cursor in cursors.items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise InvalidCursor("malformed cursor token")
+    if version != TOKEN_VERSION:
+        raise InvalidCursor(f"unsupported cursor token version: {version}")
+    # 같은 커서를 다른 패턴으로 이어 가면 결과가 섞이므로 막는다.
+    if pattern != _pattern_hash(match):
+        raise InvalidCursor("cursor token was issued for a different pattern")
+    return cursors
+
+
+class _Budget:
+    """페이지 하나의 예산. 노드들이 같은 예산을 나눠 쓴다."""
+
+    def __init__(self, budget_ms: Optional[int], max_keys: Optional[int]):
+        self.deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        self.max_keys = max_keys
+        self.keys = 0
+        self.calls = 0
+
+    def exhausted(self) -> bool:
+        if self.max_keys is not None and self.keys >= self.max_keys:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+
+async def _scan_until(scan_once: ScanOnce, cursor: int, budget: _Budget, keys: Optional[List[str]]) -> int:
+    # 예산과 상관없이 한 번은 부르므로 페이지마다 반드시 앞으로 나아간다.
+    # 받은 배치는 자르지 않는다. 자르면 커서가 이미 지나간 키를 잃는다. (max_keys는 그만큼 넘칠 수 있다)
+    while True:
+        cursor, batch = await scan_once(cursor)
+        budget.calls += 1
+        budget.keys += len(batch)
+        if keys is not None:
+            keys.extend(batch)
+        if cursor == 0 or budget.exhausted():
+            return cursor
+
+
+def _page(match: str, cursors: Dict[str, int], budget: _Budget, keys: Optional[List[str]], start: float) -> Dict[str, Any]:
+    token = encode_cursor(match, cursors)
+    res = {
+        "count": budget.keys,
+        "cursor": token,
+        "done": token is None,
+        "calls": budget.calls,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+    if keys is not None:
+        res["keys"] = keys
+    return res
+
+
+async def scan_page(
+    r: redis.Redis,
+    match: str,
+    cursor: Optional[str] = None,
+    count: Optional[int] = None,
+    budget_ms: Optional[int] = DEFAULT_BUDGET_MS,
+    max_keys: Optional[int] = None,
+    with_keys: bool = False,
+) -> Dict[str, Any]:
+    """단일 노드 SCAN을 예산만큼만 돌리고 다음 페이지 토큰을 돌려준다. cursor=None이면 처음부터."""
+    start = time.perf_counter()
+    name = node_name(r)
+    if cursor is None:
+        cursors = {name: 0}
+    else:
+        cursors = decode_cursor(cursor, match)
+        if set(cursors) != {name}:
+            raise InvalidCursor("cursor token was issued for a different server")
+
+    async def scan_once(c: int) -> Tuple[int, List[str]]:
+        return await scan_call(r, c, match, count)
+
+    budget = _Budget(budget_ms, max_keys)
+    keys: Optional[List[str]] = [] if with_keys else None
+    next_cursor = await _scan_until(scan_once, cursors[name], budget, keys)
+    return _page(match, {name: next_cursor} if next_cursor else {}, budget, keys, start)
+
+
+async def cluster_scan_page(
+    rc: RedisCluster,
+    match: str,
+    cursor: Optional[str] = None,
+    count: Optional[int] = None,
+    budget_ms: Optional[int] = DEFAULT_BUDGET_MS,
+    max_keys: Optional[int] = None,
+    with_keys: bool = False,
+    nodes: Optional[List[ClusterNode]] = None,
+) -> Dict[str, Any]:
+    """
+    프라이머리마다 SCAN을 동시에 돌리되 페이지 예산은 함께 쓴다.
+    토큰에는 아직 끝나지 않은 노드의 커서만 남는다. 토큰을 만든 뒤 노드 구성이 바뀌면 이어 갈 수 없다.
+    """
+    start = time.perf_counter()
+    if cursor is None:
+        nodes = nodes if nodes is not None else rc.get_primaries()
+        cursors = {node.name: 0 for node in nodes}
+    else:
+        cursors = decode_cursor(cursor, match)
+        primaries = {node.name: node for node in rc.get_primaries()}
+        # 커서는 노드의 해시 테이블 위치라 다른 노드(페일오버된 레플리카 포함)에서는 의미가 없다.
+        missing = [name for name in cursors if name not in primaries]
+        if missing:
+            raise InvalidCursor(f"cluster topology changed: {', '.join(missing)} no longer primary")
+        nodes = [primaries[name] for name in cursors]
+
+    budget = _Budget(budget_ms, max_keys)
+    keys: Optional[List[str]] = [] if with_keys else None
+
+    def scanner(node: ClusterNode) -> ScanOnce:
+        async def scan_once(c: int) -> Tuple[int, List[str]]:
+            return await scan_call(rc, c, match, count, node=node)
+        return scan_once
+
+    results = await asyncio.gather(*(_scan_until(scanner(node), cursors[node.name], budget, keys) for node in nodes))
+    remaining = {node.name: c for node, c in zip(nodes, results) if c}
+    return _page(match, remaining, budget, keys, start)
@@ -0,0 +1,287 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+
+from src.infra.adaptive_scan import node_name
+
+'''
+서버 쪽 통계를 한 번에 떠 두고(스냅샷) 두 시점의 차이를 계산한다.
+노드마다 INFO commandstats/memory/stats, LATENCY LATEST, LATENCY HISTOGRAM 을 동시에 읽고, 클러스터는 모든 프라이머리를 동시에 읽는다.
+CONFIG RESETSTAT 없이 "이 구간에서 어떤 명령이 서버 시간을 얼마나 썼는지"를 노드별/클러스터 합계로 본다.
+
+- commandstats, INFO stats 카운터, LATENCY HISTOGRAM 버킷은 누적값이라 차이를 낸다. (중간에 초기화됐으면 이후 값만)
+- INFO memory 는 전후 값과 변화량
+- LATENCY LATEST 는 구간 안에 기록된 이벤트만 (latency-monitor-threshold 가 0이면 비어 있다)
+'''
+
+Snapshot = Dict[str, Any]
+
+COMMAND_FIELDS = ("calls", "usec", "rejected_calls", "failed_calls")
+STATS_FIELDS = (
+    "total_commands_processed",
+    "total_connections_received",
+    "rejected_connections",
+    "total_net_input_bytes",
+    "total_net_output_bytes",
+    "keyspace_hits",
+    "keyspace_misses",
+    "expired_keys",
+    "evicted_keys",
+    "total_error_replies",
+    "total_reads_processed",
+    "total_writes_processed",
+    "expire_cycle_cpu_milliseconds",
+)
+MEMORY_FIELDS = ("used_memory", "used_memory_rss", "used_memory_peak", "used_memory_dataset", "mem_fragmentation_ratio")
+# 스냅샷을 뜨는 명령 자신은 구간 차이에서 뺀다.
+SELF_COMMANDS = ("info", "latency|latest", "latency|histogram")
+PERCENTILES = (50, 99, 99.9)
+# 이름 붙인 구간은 이만큼만 기억한다.
+MAX_RUNS = 100
+
+
+def _pairs(value: Any) -> Dict:
+    # RESP2는 [k1, v1, k2, v2, ...] 평탄한 배열, RESP3는 map으로 온다.
+    if isinstance(value, dict):
+        return value
+    return dict(zip(value[::2], value[1::2]))
+
+
+def parse_node(info: Dict[str, Any], latest: Optional[List], histogram: Any) -> Dict[str, Any]:
+    """노드 하나에서 읽은 INFO / LATENCY LATEST / LATENCY HISTOGRAM 응답을 스냅샷 한 칸으로."""
+    commands = {}
+    for name, stat in info.items():
+        if name.startswith("cmdstat_") and isinstance(stat, dict):
+            commands[name[len("cmdstat_"):]] = {field: int(stat.get(field, 0)) for field in COMMAND_FIELDS}
+
+    events = {}
+    for event, at, latest_ms, max_ms, *_ in latest or []:
+        events[event] = {"at": int(at), "latest_ms": int(latest_ms), "max_ms": int(max_ms)}
+
+    histograms = {}
+    for name, body in _pairs(histogram or []).items():
+        body = _pairs(body)
+        # 버킷은 2의 거듭제곱 usec 상한 -> 그 이하로 끝난 호출 수(누적)
+        buckets = {int(upper): int(count) for upper, count in _pairs(body.get("histogram_usec") or []).items()}
+        histograms[name] = {"calls": int(body.get("calls", 0)), "buckets": buckets}
+
+    return {
+        "at": time.time(),
+        "commands": commands,
+        "stats": {field: int(info.get(field, 0)) for field in STATS_FIELDS},
+        "memory": {field: info.get(field, 0) for field in MEMORY_FIELDS},
+        "events": events,
+        "histograms": histograms,
+    }
+
+
+async def _read_node(r: redis.Redis) -> Dict[str, Any]:
+    info, latest, histogram = await asyncio.gather(
+        r.info("commandstats", "memory", "stats"),
+        r.execute_command("LATENCY LATEST"),
+        r.execute_command("LATENCY HISTOGRAM"),
+    )
+    return parse_node(info, latest, histogram)
+
+
+async def _read_cluster_node(rc: RedisCluster, node: ClusterNode) -> Dict[str, Any]:
+    info, latest, histogram = await asyncio.gather(
+        rc.info("commandstats", "memory", "stats", target_nodes=node),
+        rc.execute_command("LATENCY LATEST", target_nodes=node),
+        rc.execute_command("LATENCY HISTOGRAM", target_nodes=node),
+    )
+    return parse_node(info, latest, histogram)
+
+
+async def snapshot(r: redis.Redis) -> Snapshot:
+    return {"at": time.time(), "nodes": {node_name(r): await _read_node(r)}}
+
+
+async def cluster_snapshot(rc: RedisCluster, nodes: Optional[List[ClusterNode]] = None) -> Snapshot:
+    """프라이머리 전체를 동시에 읽는다. 가장 느린 노드 하나의 시간이면 끝난다."""
+    nodes = nodes if nodes is not None else rc.get_primaries()
+    started = time.time()
+    results = await asyncio.gather(*(_read_cluster_node(rc, node) for node in nodes))
+    return {"at": started, "nodes": {node.name: result for node, result in zip(nodes, results)}}
+
+
+def _counter(after: int, before: int) -> int:
+    # 누적값이 줄었으면 중간에 CONFIG RESETSTAT이 있었던 것. 초기화 이후 값만 센다.
+    return after - before if after >= before else after
+
+
+def _at_or_below(buckets: Dict[int, int], upper: int) -> int:
+    """누적 버킷에서 upper usec 이하로 끝난 호출 수."""
+    return max((count for bound, count in buckets.items() if bound <= upper), default=0)
+
+
+def _node_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    commands = {}
+    for name, stat in after["commands"].items():
+        if name in SELF_COMMANDS:
+            continue
+        prev = before["commands"].get(name, {})
+        delta = {field: _counter(stat[field], prev.get(field, 0)) for field in COMMAND_FIELDS}
+        if delta["calls"] > 0:
+            commands[name] = delta
+
+    histograms = {}
+    for name, hist in after["histograms"].items():
+        if name in SELF_COMMANDS:
+            continue
+        prev = before["histograms"].get(name, {"calls": 0, "buckets": {}})
+        if hist["calls"] < prev["calls"]:
+            prev = {"calls": 0, "buckets": {}}
+        if hist["calls"] == prev["calls"]:
+            continue
+        # 누적 버킷의 차이를 버킷별 개수로 바꿔 둔다. 노드마다 버킷 범위가 달라도 그대로 더할 수 있다.
+        counts, below = {}, 0
+        for upper, count in sorted(hist["buckets"].items()):
+            cumulative = count - _at_or_below(prev["buckets"], upper)
+            counts[upper] = cumulative - below
+            below = cumulative
+        histograms[name] = counts
+
+    # LATENCY LATEST의 시각은 서버 시계(초)라 앱과 시계가 어긋나 있으면 경계 근처 이벤트는 빠지거나 섞일 수 있다.
+    events = {event: value for event, value in after["events"].items() if value["at"] >= int(before["at"])}
+
+    return {
+        "seconds": after["at"] - before["at"],
+        "commands": commands,
+        "histograms": histograms,
+        "stats": {field: _counter(after["stats"][field], before["stats"].get(field, 0)) for field in STATS_FIELDS},
+        "memory": {field: (before["memory"].get(field, 0), after["memory"][field]) for field in MEMORY_FIELDS},
+        "events": events,
+    }
+
+
+def _merge(deltas: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """노드별 차이를 클러스터 합계로. 누적값/버킷/메모리는 더하고, 지연 이벤트는 가장 나쁜 노드 값을 쓴다."""
+    total: Dict[str, Any] = {"seconds": 0.0, "commands": {}, "histograms": {}, "stats": {}, "memory": {}, "events": {}}
+    for delta in deltas:
+        total["seconds"] = max(total["seconds"], delta["seconds"])
+        for name, stat in delta["commands"].items():
+            agg = total["commands"].setdefault(name, dict.fromkeys(COMMAND_FIELDS, 0))
+            for field in COMMAND_FIELDS:
+                agg[field] += stat[field]
+        for name, buckets in delta["histograms"].items():
+            agg = total["histograms"].setdefault(name, {})
+            for upper, count in buckets.items():
+                agg[upper] = agg.get(upper, 0) + count
+        for field, value in delta["stats"].items():
+            total["stats"][field] = total["stats"].get(field, 0) + value
+        for field, (before, after) in delta["memory"].items():
+            prev = total["memory"].get(field, (0, 0))
+            total["memory"][field] = (prev[0] + before, prev[1] + after)
+        for event, value in delta["events"].items():
+            if event not in total["events"] or value["latest_ms"] > total["events"][event]["latest_ms"]:
+                total["events"][event] = value
+    # 단편화 비율은 더하면 의미가 없으므로 합계에서는 뺀다.
+    total["memory"].pop("mem_fragmentation_ratio", None)
+    return total
+
+
+def _percentile(counts: Dict[int, int], p: float) -> int:
+    """버킷별 개수에서 p 백분위가 들어 있는 버킷의 상한(usec). 2배 간격이라 실제 값은 그 절반~상한 사이."""
+    total = sum(counts.values())
+    if total <= 0:
+        return 0
+    rank, seen = p / 100 * total, 0
+    for upper, count in sorted(counts.items()):
+        seen += count
+        if seen >= rank:
+            return upper
+    return max(counts)
+
+
+def _summary(delta: Dict[str, Any]) -> Dict[str, Any]:
+    seconds = delta["seconds"]
+    server_usec = sum(stat["usec"] for stat in delta["commands"].values())
+    commands = {}
+    for name, stat in sorted(delta["commands"].items(), key=lambda item: item[1]["usec"], reverse=True):
+        row = {
+            **stat,
+            "usec_per_call": round(stat["usec"] / stat["calls"], 2),
+            # 구간 전체 명령 실행 시간 중 이 명령이 쓴 비율
+            "usec_share": round(stat["usec"] / server_usec, 4) if server_usec else 0,
+        }
+        buckets = delta["histograms"].get(name)
+        if buckets:
+            for p in PERCENTILES:
+                row[f"p{p:g}_usec".replace(".", "")] = _percentile(buckets, p)
+        commands[name] = row
+    return {
+        "seconds": round(seconds, 3),
+        "server_usec": server_usec,
+        # 명령 실행에 쓴 시간 / 구간 길이. 메인 스레드가 명령 실행으로 바빴던 비율이다. (클러스터 합계는 노드 수만큼 넘을 수 있다)
+        "busy_ratio": round(server_usec / (seconds * 1e6), 4) if seconds else 0,
+        "commands": commands,
+        "stats": delta["stats"],
+        "memory": {field: {"before": before, "after": after, "change": round(after - before, 2)} for field, (before, after) in delta["memory"].items()},
+        "latency_events": delta["events"],
+    }
+
+
+def diff(before: Snapshot, after: Snapshot) -> Dict[str, Any]:
+    """두 스냅샷의 차이. 한쪽에만 있는 노드(페일오버/리샤딩)는 비교하지 않고 missing에 남긴다."""
+    names = [name for name in after["nodes"] if name in before["nodes"]]
+    deltas = {name: _node_delta(before["nodes"][name], after["nodes"][name]) for name in names}
+    return {
+        "total": _summary(_merge(deltas.values())),
+        "nodes": {name: _summary(delta) for name, delta in deltas.items()},
+        "missing": sorted(set(before["nodes"]) ^ set(after["nodes"])),
+    }
+
+
+class StatsRun:
+    def __init__(self, name: str, before: Snapshot):
+        self.name = name
+        self.before = before
+        self.after: Optional[Snapshot] = None
+        self.delta: Optional[Dict[str, Any]] = None
+
+    def finish(self, after: Snapshot) -> Dict[str, Any]:
+        self.after = after
+        self.delta = diff(self.before, after)
+        return self.delta
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "run": self.name,
+            "running": self.after is None,
+            "started_at": self.before["at"],
+            "ended_at": self.after["at"] if self.after is not None else None,
+            "nodes": list(self.before["nodes"]),
+        }
+
+
+class StatsRuns:
+    """
+    이름 붙인 측정 구간. 시작할 때 스냅샷을 떠 두고, 끝낼 때 스냅샷을 한 번 더 떠서 차이를 남긴다.
+    구간이 겹쳐도 서로 영향이 없다. (전역 통계를 초기화하지 않으므로)
+    """
+
+    def __init__(self):
+        self._runs: "OrderedDict[str, StatsRun]" = OrderedDict()
+
+    def begin(self, name: str, before: Snapshot) -> StatsRun:
+        # 같은 이름으로 다시 시작하면 이전 구간을 버린다.
+        self._runs.pop(name, None)
+        run = self._runs[name] = StatsRun(name, before)
+        while len(self._runs) > MAX_RUNS:
+            self._runs.popitem(last=False)
+        return run
+
+    def get(self, name: str) -> Optional[StatsRun]:
+        return self._runs.get(name)
+
+    def list(self) -> List[StatsRun]:
+        return list(self._runs.values())
+
+
+stats_runs = StatsRuns()
+cluster_stats_runs = StatsRuns()
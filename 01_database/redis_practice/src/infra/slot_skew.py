@@ -0,0 +1,281 @@
+import asyncio
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from redis.asyncio.cluster import ClusterNode, PipelineCommand, RedisCluster
+from redis.crc import key_slot
+
+from src.infra.tracing import TracingConnection
+from src.utils.metrics import metrics
+
+'''
+클러스터 슬롯/키 쏠림 분석.
+해시태그({user_id})는 한 유저의 키를 한 슬롯에 모으므로 멀티키 연산이 되는 대신, 큰 유저가 있으면 그 슬롯의 노드만 무거워진다.
+
+- 키 쏠림: 프라이머리마다 자기 슬롯의 CLUSTER COUNTKEYSINSLOT을 파이프라인으로 (노드들은 동시에) 읽어
+  노드별 키 수와 불균형(최대/평균, 변동계수), 가장 무거운 슬롯을 본다.
+- 무거운 해시태그: 무거운 슬롯마다 CLUSTER GETKEYSINSLOT으로 키 일부를 받아 태그별 비율 * 슬롯 키 수로 추정한다.
+  (GETKEYSINSLOT은 무작위가 아니라 슬롯 안 순서대로 주므로 한 슬롯에 태그가 여럿이면 치우칠 수 있다)
+- 요청 쏠림: 추적을 켜면 앱이 클러스터로 보내는 명령마다 첫 키의 슬롯을 세어 메트릭(redis_slot_requests_total)에 남긴다.
+  키가 적어도 요청이 몰리는 핫키는 여기서만 보인다.
+'''
+
+SLOT_COUNT = 16384
+PIPELINE_SIZE = 1000
+DEFAULT_TOP = 20
+DEFAULT_SAMPLE_PER_SLOT = 100
+
+# 키가 없는 명령. 첫 인자를 키로 보면 엉뚱한 슬롯이 세어진다.
+KEYLESS = frozenset({
+    "ASKING", "AUTH", "CLIENT", "CLUSTER", "COMMAND", "CONFIG", "DBSIZE", "ECHO", "FLUSHALL", "FLUSHDB",
+    "FUNCTION", "HELLO", "INFO", "LATENCY", "PING", "RANDOMKEY", "READONLY", "READWRITE", "SCAN", "SCRIPT",
+    "SELECT", "SLOWLOG", "TIME",
+})
+# numkeys 뒤에 키가 오는 명령
+SCRIPT_COMMANDS = frozenset({"EVAL", "EVALSHA", "EVAL_RO", "EVALSHA_RO", "FCALL", "FCALL_RO"})
+# 하위 명령 뒤에 키가 오는 명령 (MEMORY USAGE key, OBJECT ENCODING key)
+SUBCOMMAND_KEYED = frozenset({"MEMORY", "OBJECT"})
+
+
+def hash_tag(key: str) -> Optional[str]:
+    """레디스 규칙의 해시태그. 첫 '{' 뒤 첫 '}' 까지가 비어 있지 않을 때만 태그다."""
+    start = key.find("{")
+    if start < 0:
+        return None
+    end = key.find("}", start + 1)
+    if end <= start + 1:
+        return None
+    return key[start + 1 : end]
+
+
+def _first_key(args: Sequence[Any]) -> Optional[Any]:
+    name = args[0].decode() if isinstance(args[0], bytes) else str(args[0])
+    words = name.upper().split()
+    rest = list(args[1:])
+    if words[0] in KEYLESS:
+        return None
+    if words[0] in SCRIPT_COMMANDS:
+        # EVAL script numkeys key ...
+        if len(rest) < 3 or int(rest[1]) == 0:
+            return None
+        return rest[2]
+    if words[0] in SUBCOMMAND_KEYED and len(words) == 1:
+        rest = rest[1:]
+    return rest[0] if rest else None
+
+
+def command_slot(args: Sequence[Any]) -> Optional[int]:
+    key = _first_key(args)
+    if key is None:
+        return None
+    if not isinstance(key, (bytes, memoryview)):
+        key = str(key).encode()
+    return key_slot(bytes(key))
+
+
+class SlotTracker:
+    """노드/슬롯별 요청 수. 꺼져 있으면 명령마다 불리는 비용은 플래그 확인 하나뿐이다."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, int], int] = {}
+
+    def enable(self, reset: bool = True):
+        if reset:
+            self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+    def record(self, node: str, args: Sequence[Any]):
+        slot = command_slot(args)
+        if slot is None:
+            return
+        key = (node, slot)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+        metrics.inc("redis_slot_requests_total", node=node, slot=str(slot))
+
+    def summary(self, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        per_node: Dict[str, int] = {}
+        for (node, _), count in counts.items():
+            per_node[node] = per_node.get(node, 0) + count
+        heavy = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            "enabled": self.enabled,
+            "requests": total,
+            "nodes": {node: {"requests": count, "share": _share(count, total)} for node, count in sorted(per_node.items())},
+            "imbalance": imbalance(per_node),
+            "slots": {
+                "active": len(counts),
+                "top": [
+                    {"slot": slot, "node": node, "requests": count, "share": _share(count, total)}
+                    for (node, slot), count in heavy
+                ],
+            },
+        }
+
+
+slot_tracker = SlotTracker()
+
+
+class SlotTrackingConnection(TracingConnection):
+    """클러스터 노드 연결. 추적이 켜져 있으면 보내는 명령의 슬롯을 센다. (파이프라인도 명령마다 pack_command를 거친다)"""
+
+    def pack_command(self, *args):
+        if slot_tracker.enabled:
+            slot_tracker.record(f"{self.host}:{self.port}", args)
+        return super().pack_command(*args)
+
+
+def _share(part: float, total: float) -> float:
+    return round(part / total, 4) if total else 0
+
+
+def imbalance(values: Dict[str, int]) -> Dict[str, Any]:
+    """노드별 값의 불균형. max_over_mean이 1이면 완전히 고르고, 노드 수와 같으면 한 노드에 다 몰린 것."""
+    if not values:
+        return {"max_over_mean": 0, "cv": 0, "max_node": None}
+    mean = sum(values.values()) / len(values)
+    sd = math.sqrt(sum((v - mean) ** 2 for v in values.values()) / len(values))
+    max_node = max(values, key=values.get)
+    return {
+        "max_over_mean": round(values[max_node] / mean, 3) if mean else 0,
+        "cv": round(sd / mean, 3) if mean else 0,
+        "max_node": max_node,
+    }
+
+
+async def _pipeline(node: ClusterNode, commands: List[Tuple[Any, ...]]) -> List[Any]:
+    batch = [PipelineCommand(i, *command) for i, command in enumerate(commands)]
+    await node.execute_pipeline(batch)
+    return [command.result for command in batch]
+
+
+def owned_slots(rc: RedisCluster) -> Dict[str, List[int]]:
+    """프라이머리별 담당 슬롯. 클라이언트가 들고 있는 슬롯 표 기준이다."""
+    owned: Dict[str, List[int]] = {node.name: [] for node in rc.get_primaries()}
+    for slot, nodes in rc.nodes_manager.slots_cache.items():
+        if nodes and nodes[0].name in owned:
+            owned[nodes[0].name].append(slot)
+    return owned
+
+
+async def _node_slot_counts(node: ClusterNode, slots: List[int]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for i in range(0, len(slots), PIPELINE_SIZE):
+        chunk = slots[i : i + PIPELINE_SIZE]
+        results = await _pipeline(node, [("CLUSTER COUNTKEYSINSLOT", slot) for slot in chunk])
+        for slot, count in zip(chunk, results):
+            if isinstance(count, Exception):
+                raise count
+            counts[slot] = int(count)
+    return counts
+
+
+async def slot_counts(rc: RedisCluster) -> Dict[str, Dict[int, int]]:
+    """{node: {slot: 키 수}}. 노드마다 슬롯 5천여 개를 파이프라인 몇 번에 나눠 읽고, 노드들은 동시에 읽는다."""
+    owned = owned_slots(rc)
+    nodes = rc.get_primaries()
+    results = await asyncio.gather(*(_node_slot_counts(node, owned[node.name]) for node in nodes))
+    return {node.name: counts for node, counts in zip(nodes, results)}
+
+
+def key_skew(counts: Dict[str, Dict[int, int]], top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    per_node = {node: sum(slots.values()) for node, slots in counts.items()}
+    total = sum(per_node.values())
+    all_slots = [(node, slot, count) for node, slots in counts.items() for slot, count in slots.items()]
+    nonempty = [count for _, _, count in all_slots if count]
+    slot_mean = total / len(all_slots) if all_slots else 0
+    heavy = sorted(all_slots, key=lambda item: item[2], reverse=True)[:top]
+    return {
+        "keys": total,
+        "nodes": {
+            node: {"keys": keys, "slots": len(counts[node]), "share": _share(keys, total)}
+            for node, keys in sorted(per_node.items())
+        },
+        "imbalance": imbalance(per_node),
+        "slots": {
+            "owned": len(all_slots),
+            "nonempty": len(nonempty),
+            "mean": round(slot_mean, 2),
+            "max": heavy[0][2] if heavy else 0,
+            # 가장 무거운 슬롯이 평균 슬롯의 몇 배인지. 해시태그로 몰린 슬롯이 있으면 크게 튄다.
+            "max_over_mean": round(heavy[0][2] / slot_mean, 1) if heavy and slot_mean else 0,
+            "top": [
+                {"slot": slot, "node": node, "keys": count, "share": _share(count, total)}
+                for node, slot, count in heavy if count
+            ],
+        },
+    }
+
+
+async def heavy_tags(
+    rc: RedisCluster,
+    counts: Dict[str, Dict[int, int]],
+    top: int = DEFAULT_TOP,
+    sample_per_slot: int = DEFAULT_SAMPLE_PER_SLOT,
+) -> List[Dict[str, Any]]:
+    """무거운 슬롯 top개에서 키를 sample_per_slot개씩 받아 태그별 키 수를 추정한다."""
+    per_node = {node: sum(slots.values()) for node, slots in counts.items()}
+    total = sum(per_node.values())
+    heavy = sorted(
+        ((node, slot, count) for node, slots in counts.items() for slot, count in slots.items() if count),
+        key=lambda item: item[2],
+        reverse=True,
+    )[:top]
+
+    by_node: Dict[str, List[Tuple[int, int]]] = {}
+    for node, slot, count in heavy:
+        by_node.setdefault(node, []).append((slot, count))
+    primaries = {node.name: node for node in rc.get_primaries()}
+
+    async def sample(name: str, slots: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        results = await _pipeline(primaries[name], [("CLUSTER GETKEYSINSLOT", slot, sample_per_slot) for slot, _ in slots])
+        rows = []
+        for (slot, count), keys in zip(slots, results):
+            if isinstance(keys, Exception) or not keys:
+                continue
+            tags: Dict[Optional[str], int] = {}
+            for key in keys:
+                tag = hash_tag(key)
+                tags[tag] = tags.get(tag, 0) + 1
+            for tag, hits in tags.items():
+                estimate = round(count * hits / len(keys))
+                rows.append({
+                    "tag": tag,
+                    "slot": slot,
+                    "node": name,
+                    "sampled": hits,
+                    "estimated_keys": estimate,
+                    "share_of_node": _share(estimate, per_node[name]),
+                    "share_of_cluster": _share(estimate, total),
+                })
+        return rows
+
+    results = await asyncio.gather(*(sample(name, slots) for name, slots in by_node.items()))
+    rows = [row for node_rows in results for row in node_rows]
+    return sorted(rows, key=lambda row: row["estimated_keys"], reverse=True)[:top]
+
+
+async def cluster_skew(
+    rc: RedisCluster,
+    top: int = DEFAULT_TOP,
+    sample_per_slot: int = DEFAULT_SAMPLE_PER_SLOT,
+    tags: bool = True,
+) -> Dict[str, Any]:
+    counts = await slot_counts(rc)
+    res = key_skew(counts, top)
+    if tags:
+        res["tags"] = await heavy_tags(rc, counts, top, sample_per_slot)
+    return res
@@ -0,0 +1,120 @@
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from redis.asyncio.connection import Connection
+
+
+@dataclass
+class RedisTrace:
+    """요청 하나가 Redis에 만든 부하 요약."""
+
+    commands: int = 0
+    round_trips: int = 0
+    pipelines: int = 0
+    max_pipeline: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    # 명령을 보낸 시점부터 마지막 응답을 읽은 시점까지의 합 (네트워크 + 서버 처리 + 대기)
+    redis_time: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Redis-Commands": str(self.commands),
+            "X-Redis-Round-Trips": str(self.round_trips),
+            "X-Redis-Pipelines": str(self.pipelines),
+            "X-Redis-Max-Pipeline": str(self.max_pipeline),
+            "X-Redis-Bytes-Sent": str(self.bytes_sent),
+            "X-Redis-Bytes-Received": str(self.bytes_received),
+            "X-Redis-Time-Ms": f"{self.redis_time * 1000:.3f}",
+        }
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+# asyncio.create_task는 생성 시점의 컨텍스트를 복사하므로, 요청 안에서 띄운 팬아웃 태스크도 같은 trace에 쌓인다.
+_current: ContextVar[Optional[RedisTrace]] = ContextVar("redis_trace", default=None)
+
+
+def start_trace() -> RedisTrace:
+    trace = RedisTrace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RedisTrace]:
+    return _current.get()
+
+
+class _CountingReader:
+    """파서가 소켓에서 읽는 바이트 수를 세는 StreamReader 프록시."""
+
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    @staticmethod
+    def _count(data: bytes) -> bytes:
+        trace = _current.get()
+        if trace is not None:
+            trace.bytes_received += len(data)
+        return data
+
+    async def read(self, n: int = -1) -> bytes:
+        return self._count(await self._reader.read(n))
+
+    async def readline(self) -> bytes:
+        return self._count(await self._reader.readline())
+
+    async def readexactly(self, n: int) -> bytes:
+        return self._count(await self._reader.readexactly(n))
+
+
+class TracingConnection(Connection):
+    """보낸 명령 수/파이프라인 크기/송수신 바이트/왕복 시간을 현재 요청의 RedisTrace에 기록한다."""
+
+    _mark: float = 0.0
+
+    async def _connect(self):
+        await super()._connect()
+        self._reader = _CountingReader(self._reader)
+
+    def pack_command(self, *args):
+        trace = _current.get()
+        if trace is not None:
+            trace.commands += 1
+        return super().pack_command(*args)
+
+    def pack_commands(self, commands):
+        commands = list(commands)
+        trace = _current.get()
+        if trace is not None:
+            trace.pipelines += 1
+            trace.max_pipeline = max(trace.max_pipeline, len(commands))
+        return super().pack_commands(commands)
+
+    async def send_packed_command(self, command, check_health: bool = True):
+        trace = _current.get()
+        if trace is not None:
+            if isinstance(command, str):
+                command = command.encode()
+            if not isinstance(command, bytes):
+                command = list(command)
+            trace.bytes_sent += len(command) if isinstance(command, bytes) else sum(map(len, command))
+            trace.round_trips += 1
+            self._mark = time.perf_counter()
+        await super().send_packed_command(command, check_health)
+
+    async def read_response(self, *args, **kwargs):
+        response = await super().read_response(*args, **kwargs)
+        trace = _current.get()
+        if trace is not None and self._mark:
+            # 파이프라인은 응답을 여러 번 읽으므로 직전 표시부터의 시간만 더해 왕복 전체 시간이 된다.
+            now = time.perf_counter()
+            trace.redis_time += now - self._mark
+            self._mark = now
+        return response
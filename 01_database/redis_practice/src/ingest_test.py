@@ -0,0 +1,108 @@
+"""
+조건:
+서버가 8000포트에서 실행중입니다.
+peak_rss_mb는 프로세스 전체 RSS라 방식마다 서버를 새로 띄우고 측정하는 것이 정확합니다.
+"""
+
+import time
+from datetime import datetime
+
+import requests
+
+from utils.datagen import hourly_timestamps, queue_ndjson, timescale_ndjson
+from utils.tests import BASE_URL, TIMEOUT, call, get_random_users
+
+HOURS = 24
+RETENTION_DAYS = 7
+
+
+def test_json(struct_type: str, users):
+    call("clear test data", "delete", "/clear?mode=server", debug=False)
+    t0 = time.perf_counter()
+    for i in range(HOURS):
+        users_with_time = [(user, datetime(2025, 1, 1, i, 0, 0).isoformat()) for user in users]
+        resp = requests.post(f"{BASE_URL}/time-scale/{struct_type}?rollup=false", json=users_with_time, timeout=TIMEOUT)
+    dt = time.perf_counter() - t0
+    print(f"{struct_type} json: {HOURS * len(users) / dt:.0f} items/s, peak_rss={resp.json()['pipeline']['peak_rss_mb']:.1f}MB")
+    return dt
+
+
+def test_ingest(struct_type: str, users):
+    call("clear test data", "delete", "/clear?mode=server", debug=False)
+    t0 = time.perf_counter()
+    resp = requests.post(
+        f"{BASE_URL}/time-scale/{struct_type}/ingest?rollup=false",
+        data=timescale_ndjson(users, hourly_timestamps(datetime(2025, 1, 1), HOURS)),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=TIMEOUT,
+    )
+    dt = time.perf_counter() - t0
+    body = resp.json()
+    print(
+        f"{struct_type} ingest: {body['processed'] / dt:.0f} items/s (server {body['items_per_sec']:.0f}), "
+        f"peak_rss={body['peak_rss_mb']:.1f}MB"
+    )
+    return dt
+
+
+def test_bad_line(struct_type: str):
+    # 타입이 틀린 줄은 500이 아니라 줄 번호가 담긴 400으로 거절한다.
+    body = b'["user_a","2025-01-01T00:00:00"]\n["user_b","2025-01-01T01:00:00"]\n["user_c",1]\n'
+    resp = requests.post(
+        f"{BASE_URL}/time-scale/{struct_type}/ingest", data=body, headers={"Content-Type": "application/x-ndjson"}, timeout=TIMEOUT
+    )
+    assert resp.status_code == 400 and resp.json()["detail"].startswith("line 3:"), resp.text
+
+
+def test_retention(struct_type: str, users):
+    # 만료 시각이 과거면 키가 바로 지워지므로 오늘 날짜로 적재한다. 청크를 잘게 나눠 EXPIREAT이 여러 파이프라인에 걸치게 한다.
+    call("clear test data", "delete", "/clear?mode=server", debug=False)
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    resp = requests.post(
+        f"{BASE_URL}/time-scale/{struct_type}/ingest?retention_days={RETENTION_DAYS}&chunk_size=100",
+        data=timescale_ndjson(users, hourly_timestamps(day, HOURS)),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=TIMEOUT,
+    )
+    assert resp.json()["processed"] == len(users) * HOURS, resp.json()
+    end = day.replace(hour=HOURS - 1).isoformat()
+    for user in users:
+        body = requests.get(
+            f"{BASE_URL}/time-scale/{struct_type}/ttl?user_id={user}&from={day.isoformat()}&to={end}", timeout=TIMEOUT
+        ).json()
+        assert body["missing"] == 0 and body["no_ttl"] == 0, body
+    print(f"{struct_type} retention: {len(users)} users x {HOURS}h, every hourly key has a TTL")
+
+
+def test_queue_ingest(users):
+    for struct_type in ("list", "zset"):
+        call("clear test data", "delete", "/clear?mode=server", debug=False)
+        resp = requests.post(
+            f"{BASE_URL}/queue/{struct_type}/ingest",
+            data=queue_ndjson(users),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=TIMEOUT,
+        )
+        body = resp.json()
+        print(f"{struct_type} ingest: {body['items_per_sec']:.0f} items/s, enqueued={body['enqueued']}, peak_rss={body['peak_rss_mb']:.1f}MB")
+
+
+if __name__ == "__main__":
+    users = get_random_users(1000000, seed=0)
+    for struct_type in ("hset", "string", "bitfield"):
+        json_time = test_json(struct_type, users)
+        ingest_time = test_ingest(struct_type, users)
+        assert ingest_time < json_time
+    test_queue_ingest(users)
+    for struct_type in ("hset", "string", "bitfield"):
+        test_bad_line(struct_type)
+        test_retention(struct_type, get_random_users(1000, seed=1))
+
+'''
+테스트 시나리오
+- 100만 명 x 24시간 기록을 JSON 배열 엔드포인트(/time-scale/{type})와 NDJSON 스트리밍 엔드포인트(/time-scale/{type}/ingest)로 각각 적재한다.
+- items/s 와 서버 peak RSS 를 비교한다. JSON 쪽은 요청마다 100만 개 튜플을 pydantic 으로 검증하고 본문 전체를 메모리에 올린다.
+- 큐는 /queue/{list,zset}/ingest 로 100만 개를 스트리밍 적재한다.
+- 세 번째 줄의 타임스탬프가 문자열이 아닌 본문은 "line 3:"으로 시작하는 400으로 거절된다.
+- retention_days를 주고 1000명 x 24시간을 chunk_size=100으로 적재한 뒤, /time-scale/{type}/ttl 로 모든 시간 버킷 키에 TTL이 걸렸는지 확인한다.
+'''
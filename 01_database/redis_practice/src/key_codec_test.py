@@ -0,0 +1,90 @@
+"""
+조건:
+서버가 8000포트에서 실행중입니다.
+키 형식은 앱을 띄울 때의 KEY_CODEC으로 정해집니다. 같은 스크립트를 두 번 돌려 비교합니다.
+KEY_CODEC=verbose python app.py  → python key_codec_test.py
+KEY_CODEC=compact python app.py  → python key_codec_test.py
+"""
+
+import time
+from datetime import datetime
+
+import requests
+
+from utils.datagen import hourly_timestamps, timescale_ndjson
+from utils.tests import BASE_URL, TIMEOUT, call, get_random_users
+
+COUNT = 1000000
+USERS = 100000
+HOURS = 24
+
+
+def memory(pattern: str):
+    stats = requests.get(f"{BASE_URL}/stats/memory", timeout=TIMEOUT).json()
+    sampled = requests.get(f"{BASE_URL}/memory?pattern={pattern}", timeout=TIMEOUT).json()
+    return stats, sampled
+
+
+def report(name: str, codec: str, items: int, dt: float, pattern: str):
+    stats, sampled = memory(pattern)
+    per_key = sampled["per_key"]
+    print(
+        f"[{codec}] {name}: {items / dt:.0f} items/s, keys={stats['keys']}, bytes_per_key={stats['bytes_per_key']}, "
+        f"memory_usage_mean={per_key['mean']}, key_name_mean={per_key['key_name_mean']}"
+    )
+
+
+def test_keys_scan(codec: str):
+    call("clear test data", "delete", "/clear?pattern=test:*&mode=server", debug=False)
+    t0 = time.perf_counter()
+    requests.post(f"{BASE_URL}/query/add?count={COUNT}", timeout=TIMEOUT)
+    report("keys_scan", codec, COUNT, time.perf_counter() - t0, "test:keys_scan:*")
+    # 패턴도 코덱을 따라가므로 형식과 상관없이 같은 개수가 나와야 한다.
+    count = requests.get(f"{BASE_URL}/count?pattern=test:keys_scan:*", timeout=TIMEOUT).json()["count"]
+    assert count == COUNT, count
+
+
+def test_timescale(codec: str, struct_type: str, users):
+    call("clear test data", "delete", "/clear?pattern=test:*&mode=server", debug=False)
+    t0 = time.perf_counter()
+    resp = requests.post(
+        f"{BASE_URL}/time-scale/{struct_type}/ingest?rollup=false",
+        data=timescale_ndjson(users, hourly_timestamps(datetime(2025, 1, 1), HOURS)),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=TIMEOUT,
+    )
+    processed = resp.json()["processed"]
+    report(f"timescale.{struct_type}", codec, processed, time.perf_counter() - t0, "test:timescale:*")
+    # 조회 경로도 같은 형식의 키를 만들어 읽는다.
+    body = requests.get(
+        f"{BASE_URL}/time-scale/{struct_type}/range?user_id={users[0]}&from=2025-01-01T00:00:00&to=2025-01-01T23:00:00",
+        timeout=TIMEOUT,
+    ).json()
+    assert body["total"] == HOURS, body
+
+
+if __name__ == "__main__":
+    codec = requests.get(f"{BASE_URL}/stats/memory", timeout=TIMEOUT).json()["key_codec"]
+    test_keys_scan(codec)
+    users = get_random_users(USERS, seed=0)
+    for struct_type in ("hset", "string", "bitfield"):
+        test_timescale(codec, struct_type, users)
+
+'''
+테스트 시나리오
+- 같은 데이터(keys_scan 100만 키, 10만 명 x 24시간 타임스케일)를 KEY_CODEC=verbose / compact 앱에 각각 적재하고
+  적재 처리량(items/s), 키당 바이트(used_memory / dbsize), 표본 MEMORY USAGE 평균, 키 이름 평균 길이를 비교한다.
+- 외부 패턴(test:keys_scan:* 등)은 앱이 코덱에 맞게 바꾸므로 /count, /clear, /memory 결과가 형식과 상관없이 같아야 한다.
+
+키 이름 길이 (같은 값을 두 형식으로 만든 것, 바이트)
+keys_scan   39 test:keys_scan:1760000000.123456:123456            → 17 t:k:83lmn8xsm:W7E
+hset        44 test:timescale:user_a1b2c3d4e5:hset:20250101       → 21 t:ts:a1b2c3d4e5:h:5E1
+string      48 test:timescale:user_a1b2c3d4e5:string:2025010105   → 22 t:ts:a1b2c3d4e5:s:21QT
+bitfield    46 test:timescale:user_a1b2c3d4e5:bitfield:202501     → 20 t:ts:a1b2c3d4e5:b:Ae
+rollup      53 test:timescale:user_a1b2c3d4e5:rollup:hset:day:202501 → 24 t:ts:a1b2c3d4e5:r:h:d:Ae
+hash-tag    32 test:user:{42}:1760000000.123456                   → 18 t:u:{.g}:83lmn8xsm
+hierachy    30 test:user:42:1760000000.123456                     → 16 t:u:.g:83lmn8xsm
+- 키 이름은 sds(헤더 + 문자열 + 끝의 NUL)로 jemalloc 크기 등급에 맞춰 할당되므로 실제 절감은 등급 경계를 넘는 만큼이다.
+  keys_scan은 43바이트(48 등급) → 21바이트(24 등급)로 키당 24바이트 정도 줄어든다.
+  값이 작은 키(keys_scan의 SET 0, STRING 카운터)일수록 키 이름 비중이 커서 비율로 많이 줄어든다.
+'''
@@ -1,28 +1,74 @@
 import time
+from typing import Optional
 
-import redis
-from fastapi import APIRouter, Depends
+import redis.asyncio as redis
+from fastapi import APIRouter, Depends, Response
 
 from src.utils.decorators import measure_time
-from src.infra.redis_client import get_redis
+from src.utils.key_codec import key_codec
+from src.utils.streaming import ndjson_response
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE, PipelineWriter
+from src.infra.mass_insert import Loader, RespTemplate, mass_insert
+from src.infra.redis_client import get_async_redis
+from src.infra.scan_pages import DEFAULT_BUDGET_MS, scan_page
+from src.infra.adaptive_scan import scan_batches
+from src.infra.jobs import Job, JobManager, get_jobs, ping_probe
 
 QueryRouter = APIRouter(prefix="/query")
 
+QUERY_KEY = key_codec.ns("test", "keys_scan")
+QUERY_PATTERN = key_codec.key(QUERY_KEY, "*")
+
+SET_TEMPLATE = RespTemplate("SET", None, 0)
+
+async def _bulk_add(r: redis.Redis, count: int, chunk_size: int, loader: Loader, job: Optional[Job] = None):
+    # 같은 요청에서 만드는 키는 앞부분이 같으므로 한 번만 인코딩한다.
+    prefix = key_codec.key(QUERY_KEY, key_codec.stamp(time.time()))
+    if loader == "resp":
+        # redis-cli --pipe 처럼 RESP 바이트를 바로 쓰고 응답은 개수/에러만 센다.
+        commands = ((SET_TEMPLATE, f"{prefix}:{key_codec.seq(i)}") for i in range(count))
+        if job is not None:
+            commands = job.track(commands, every=chunk_size)
+        res = await mass_insert(r, commands)
+        return {"status": "created", "mass_insert": res}
+
+    async with PipelineWriter(r, chunk_size=chunk_size) as writer:
+        for i in range(count):
+            key = f"{prefix}:{key_codec.seq(i)}"
+            await writer.add("set", key, 0)
+            # 백그라운드 작업이면 청크마다 진행률을 올리고, Redis가 느려졌으면 여기서 쉬어 간다.
+            if job is not None and (i + 1) % chunk_size == 0:
+                await job.tick(chunk_size)
+    if job is not None and count % chunk_size:
+        await job.tick(count % chunk_size)
+    return {"status": "created", "pipeline": writer.stats()}
+
 @QueryRouter.post("/add")
 @measure_time
-def bulk_add_data(r: redis.Redis = Depends(get_redis)):
-    pipe = r.pipeline()
-    now = time.time()
-    for i in range(1000000):
-        key = f"test:keys_scan:{now}:{i}"
-        pipe.set(key, 0)
-    pipe.execute()
-    return {"status": "created"}
+async def bulk_add_data(
+    response: Response,
+    count: int = 1000000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    loader: Loader = "pipeline",
+    background: bool = False,
+    r: redis.Redis = Depends(get_async_redis),
+    jobs: JobManager = Depends(get_jobs),
+):
+    if background:
+        job = jobs.submit(
+            "query_add",
+            lambda job: _bulk_add(r, count, chunk_size, loader, job),
+            {"count": count, "chunk_size": chunk_size, "loader": loader},
+            ping_probe(r),
+        )
+        response.status_code = 202
+        return job.accepted()
+    return await _bulk_add(r, count, chunk_size, loader)
 
 @QueryRouter.get("/keys")
 @measure_time
-def get_all_data_with_keys(r: redis.Redis = Depends(get_redis)):
-    data = r.keys("test:keys_scan:*")
+async def get_all_data_with_keys(r: redis.Redis = Depends(get_async_redis)):
+    data = await r.keys(QUERY_PATTERN)
     return {
         "status": "ok",
         "length": len(data),
@@ -30,13 +76,10 @@ def get_all_data_with_keys(r: redis.Redis = Depends(get_redis)):
 
 @QueryRouter.get("/scan")
 @measure_time
-def get_all_data_with_scan(r: redis.Redis = Depends(get_redis)):
-    cursor = 0
+async def get_all_data_with_scan(count: Optional[int] = None, r: redis.Redis = Depends(get_async_redis)):
     data = []
-    while True:
-        cursor, batch = r.scan(cursor=cursor, match="test:keys_scan:*", count=10000)
+    async for batch in scan_batches(r, QUERY_PATTERN, count):
         data.extend(batch)
-        if cursor == 0: break
     return {
         "status": "ok",
         "length": len(data),
@@ -45,3 +88,53 @@ def get_all_data_with_scan(r: redis.Redis = Depends(get_redis)):
     # SCAN은 커서 기반이라 한 호출이 COUNT 힌트만큼만 훑고 끝나 KEYS처럼 전체를 오래 블로킹하지 않는다.
     # COUNT 기본값은 10이고 크게 줘도 내부에서 여러 호출로 쪼개주지 않으며, 값이 커질수록 한 호출 지연은 늘고 왕복 횟수는 줄어든다.
     # 여러 클라이언트가 SCAN을 돌리면 호출 단위로 번갈아 처리되어 짧은 요청이 끼어들 틈은 생기지만 CPU를 정확히 나누는 것은 아니다.    
+    # 그래서 count를 주지 않으면 고정값 대신 한 호출이 SCAN_TARGET_MS 안에 끝나는 COUNT를 찾아 쓴다. (src/infra/adaptive_scan.py)
+
+@QueryRouter.get("/scan/page")
+@measure_time
+async def get_data_page_with_scan(
+    cursor: str | None = None,
+    count: int | None = None,
+    budget_ms: int | None = DEFAULT_BUDGET_MS,
+    max_keys: int | None = None,
+    with_keys: bool = False,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    # /query/scan을 여러 요청으로 나눈다. 요청 하나는 예산(시간/키 수)만큼만 걸리고, 끊겨도 마지막 cursor부터 이어 간다.
+    res = await scan_page(r, QUERY_PATTERN, cursor, count=count, budget_ms=budget_ms, max_keys=max_keys, with_keys=with_keys)
+    return {"status": "ok", **res}
+
+async def _stream_keys(r: redis.Redis):
+    # KEYS는 응답이 한 번에 오므로 Redis/클라이언트 쪽 메모리는 줄일 수 없고, 직렬화만 나눠서 흘려보낸다.
+    data = await r.keys(QUERY_PATTERN)
+    for i in range(0, len(data), 10000):
+        yield {"keys": data[i:i + 10000]}
+    yield {"status": "ok", "length": len(data)}
+
+async def _stream_scan(r: redis.Redis, count: Optional[int]):
+    length = 0
+    async for batch in scan_batches(r, QUERY_PATTERN, count):
+        length += len(batch)
+        # 배치를 쌓지 않고 받은 즉시 내보내므로 매칭 키 수와 상관없이 메모리가 일정하다.
+        yield {"keys": batch}
+    yield {"status": "ok", "length": length}
+
+@QueryRouter.get("/keys/stream")
+async def stream_all_data_with_keys(r: redis.Redis = Depends(get_async_redis)):
+    return ndjson_response(_stream_keys(r))
+
+@QueryRouter.get("/scan/stream")
+async def stream_all_data_with_scan(count: Optional[int] = None, r: redis.Redis = Depends(get_async_redis)):
+    return ndjson_response(_stream_scan(r, count))
+
+@QueryRouter.get("/scan/count")
+@measure_time
+async def count_all_data_with_scan(count: Optional[int] = None, r: redis.Redis = Depends(get_async_redis)):
+    length = 0
+    async for batch in scan_batches(r, QUERY_PATTERN, count):
+        # 키 문자열은 세기만 하고 바로 버린다.
+        length += len(batch)
+    return {
+        "status": "ok",
+        "length": length,
+    }
@@ -3,6 +3,7 @@
 서버가 8000포트에서 실행중이고, 'POST /add' 를 통해 1000만개의 데이터를 생성했습니다.
 """
 
+import json
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
@@ -43,8 +44,50 @@ def test_query():
     assert scan_result["scan-query"] >= keys_result["keys-query"]
     assert scan_result["scan-ping"] < keys_result["keys-ping"]
 
+def call_stream(name: str, path: str):
+    t0 = time.perf_counter()
+    first = None
+    length = 0
+    with requests.get(f"{BASE_URL}{path}", timeout=TIMEOUT, stream=True) as resp:
+        for line in resp.iter_lines():
+            if first is None:
+                first = time.perf_counter() - t0
+            length += len(json.loads(line).get("keys", []))
+    dt = time.perf_counter() - t0
+    print(f"{name}: {resp.status_code}, first={first:.3f}s, total={dt:.3f}s, length={length}")
+    return dt
+
+def test_stream():
+    print("\n=== stream ===")
+    call_stream("scan-stream", "/query/scan/stream")
+    call_stream("keys-stream", "/query/keys/stream")
+    call("scan-count", "/query/scan/count")
+
+def test_pages(budget_ms: int = 200):
+    print("\n=== pages ===")
+    cursor = None
+    length = 0
+    pages = []
+    t0 = time.perf_counter()
+    while True:
+        params = {"budget_ms": budget_ms, **({"cursor": cursor} if cursor else {})}
+        t1 = time.perf_counter()
+        body = requests.get(f"{BASE_URL}/query/scan/page", params=params, timeout=TIMEOUT).json()
+        pages.append(time.perf_counter() - t1)
+        length += body["count"]
+        cursor = body["cursor"]
+        if body["done"]:
+            break
+    dt = time.perf_counter() - t0
+    print(f"scan-pages: pages={len(pages)}, max_page={max(pages):.3f}s, total={dt:.3f}s, length={length}")
+
+    # 기대: 페이지 하나는 예산 근처에서 끝나고, 합친 결과는 /query/scan과 같은 키 수다.
+    assert max(pages) < budget_ms / 1000 + 1
+
 if __name__ == "__main__":
     test_query()
+    test_stream()
+    test_pages()
 
 '''
 === scan ===
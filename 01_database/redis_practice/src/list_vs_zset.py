@@ -1,13 +1,19 @@
+import json
 import time
 import random
 import string
-from typing import List
+from typing import Callable, List
 
-import redis
-from fastapi import APIRouter, Body, Depends, HTTPException
+import redis.asyncio as redis
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
 
-from src.infra.redis_client import get_redis
+from src.infra.redis_client import get_async_redis
+from src.infra.client_cache import ClientCache, get_client_cache
 from src.utils.decorators import measure_time
+from src.utils.key_codec import key_codec
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE, DEFAULT_IN_FLIGHT, PipelineWriter, current_rss_mb
+from src.infra.mass_insert import Loader, RespTemplate, command_args, mass_insert
+from src.utils.streaming import iter_lines
 
 
 QueueRouter = APIRouter(prefix="/queue")
@@ -15,37 +21,106 @@ QueueRouter = APIRouter(prefix="/queue")
 ListRouter = APIRouter(prefix="/list")
 ZSetRouter = APIRouter(prefix="/zset")
 
-LIST_KEY = "test:list"
-ZSET_KEY = "test:zset"
+LIST_KEY = key_codec.ns("test", "list")
+ZSET_KEY = key_codec.ns("test", "zset")
+
+RPUSH_TEMPLATE = RespTemplate("RPUSH", LIST_KEY, None)
+ZADD_TEMPLATE = RespTemplate("ZADD", ZSET_KEY, None, None)
 
 def random_user_id():
     return "user_" + "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
 
+def _parse_user_id(line: bytes) -> str:
+    # NDJSON 한 줄 = "user_id". 이스케이프가 없으면 따옴표만 떼어낸다.
+    line = line.strip()
+    if line[:1] == b'"' and line[-1:] == b'"' and b"\\" not in line:
+        return line[1:-1].decode()
+    user_id = json.loads(line)
+    if not isinstance(user_id, str):
+        raise ValueError("user id must be a JSON string")
+    return user_id
+
+async def _ingest(
+    request: Request,
+    r: redis.Redis,
+    command: Callable[[str], tuple],
+    chunk_size: int,
+    in_flight: int,
+    loader: Loader,
+) -> dict:
+    start = time.perf_counter()
+    counts = {"enqueued": 0, "rejected": 0, "first_error": None}
+
+    async def commands():
+        async for line in iter_lines(request):
+            try:
+                user_id = _parse_user_id(line)
+            except ValueError as e:
+                counts["rejected"] += 1
+                counts["first_error"] = counts["first_error"] or f"{line[:100]!r}: {e}"
+                continue
+            counts["enqueued"] += 1
+            yield command(user_id)
+
+    if loader == "resp":
+        # 연결 하나로 순서대로 흘려보내므로 LIST 순서도 유지된다.
+        stats = {"mass_insert": await mass_insert(r, commands())}
+        peak_rss_mb = round(current_rss_mb(), 1)
+    else:
+        async with PipelineWriter(r, chunk_size=chunk_size, in_flight=in_flight) as writer:
+            async for args in commands():
+                await writer.add("execute_command", *command_args(args))
+        stats = {"pipeline": writer.stats()}
+        peak_rss_mb = stats["pipeline"]["peak_rss_mb"]
+
+    elapsed = time.perf_counter() - start
+    return {
+        "status": "created",
+        **counts,
+        "elapsed": round(elapsed, 3),
+        "items_per_sec": round(counts["enqueued"] / elapsed, 1) if elapsed else 0,
+        "peak_rss_mb": peak_rss_mb,
+        **stats,
+    }
 @ListRouter.post("/enqueue")
 @measure_time
-def list_enqueue(
+async def list_enqueue(
     ids: List[str] = Body(..., embed=False, description='JSON 배열로 보낼 것. 예: ["u1","u2"]'),
-    r: redis.Redis = Depends(get_redis),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    r: redis.Redis = Depends(get_async_redis),
 ):
     if not ids:
         raise HTTPException(status_code=400, detail="ids list is empty")
 
-    pipe = r.pipeline()
-    for user_id in ids:
-        pipe.rpush(LIST_KEY, user_id)
-    pipe.execute()
+    # 큐 순서가 중요하므로 청크를 하나씩 순서대로 보낸다.
+    async with PipelineWriter(r, chunk_size=chunk_size, in_flight=1) as writer:
+        for user_id in ids:
+            await writer.add("rpush", LIST_KEY, user_id)
 
     return {
         "status": "created", 
         "type": "list", 
-        "enqueued": len(ids)
+        "enqueued": len(ids),
+        "pipeline": writer.stats(),
     }
 
+@ListRouter.post("/ingest")
+@measure_time
+async def list_ingest(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    loader: Loader = "pipeline",
+    r: redis.Redis = Depends(get_async_redis),
+):
+    # NDJSON 본문을 받는 대로 적재한다. 순서 보장을 위해 in_flight=1.
+    result = await _ingest(request, r, lambda user_id: (RPUSH_TEMPLATE, user_id), chunk_size, 1, loader)
+    return {**result, "type": "list"}
+
 @ListRouter.get("/position")
 @measure_time
-def list_position(user_id: str, r: redis.Redis = Depends(get_redis)):
-    total = r.llen(LIST_KEY)
-    pos = r.lpos(LIST_KEY, user_id) +1
+async def list_position(user_id: str, r: redis.Redis = Depends(get_async_redis)):
+    total = await r.llen(LIST_KEY)
+    pos = await r.lpos(LIST_KEY, user_id) +1
     return {
         "status": "ok",
         "type": "list",
@@ -55,9 +130,9 @@ def list_position(user_id: str, r: redis.Redis = Depends(get_redis)):
 
 @ListRouter.get("/top100")
 @measure_time
-def list_top100(r: redis.Redis = Depends(get_redis)):
-    total = r.llen(LIST_KEY)
-    users = r.lrange(LIST_KEY, 0, 100-1)
+async def list_top100(cache: ClientCache = Depends(get_client_cache)):
+    total = await cache.get("llen", LIST_KEY)
+    users = await cache.get("lrange", LIST_KEY, 0, 100-1)
     return {
         "status": "ok",
         "total": total,
@@ -66,10 +141,10 @@ def list_top100(r: redis.Redis = Depends(get_redis)):
 
 @ListRouter.get("/bottom100")
 @measure_time
-def list_bottom100(r: redis.Redis = Depends(get_redis)):
-    total = r.llen(LIST_KEY)
+async def list_bottom100(r: redis.Redis = Depends(get_async_redis)):
+    total = await r.llen(LIST_KEY)
     start = max(0, total-100)
-    users = r.lrange(LIST_KEY, start, total-1)
+    users = await r.lrange(LIST_KEY, start, total-1)
     return {
         "status": "ok",
         "total": total,
@@ -82,9 +157,9 @@ def list_bottom100(r: redis.Redis = Depends(get_redis)):
 
 @ZSetRouter.get("/position")
 @measure_time
-def zset_position(user_id: str, r: redis.Redis = Depends(get_redis)):
-    total = r.zcard(ZSET_KEY)
-    pos = r.zrank(ZSET_KEY, user_id) + 1
+async def zset_position(user_id: str, cache: ClientCache = Depends(get_client_cache)):
+    total = await cache.get("zcard", ZSET_KEY)
+    pos = await cache.get("zrank", ZSET_KEY, user_id) + 1
     return {
         "status": "ok",
         "type": "zset",
@@ -94,28 +169,42 @@ def zset_position(user_id: str, r: redis.Redis = Depends(get_redis)):
 
 @ZSetRouter.post("/enqueue")
 @measure_time
-def zset_enqueue(
+async def zset_enqueue(
     ids: List[str] = Body(..., embed=False, description='JSON 배열로 보낼 것. 예: ["u1","u2"]'),
-    r: redis.Redis = Depends(get_redis),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    r: redis.Redis = Depends(get_async_redis),
 ):
     if not ids:
         raise HTTPException(status_code=400, detail="ids list is empty")
 
-    pipe = r.pipeline()
-    for user_id in ids:
-        pipe.zadd(ZSET_KEY, {user_id: time.time()})
-    pipe.execute()
+    # score를 넣는 시점에 정하므로 청크가 동시에 실행돼도 순서가 유지된다.
+    async with PipelineWriter(r, chunk_size=chunk_size) as writer:
+        for user_id in ids:
+            await writer.add("zadd", ZSET_KEY, {user_id: time.time()})
 
     return {
         "status": "created", 
         "type": "list", 
-        "enqueued": len(ids)
+        "enqueued": len(ids),
+        "pipeline": writer.stats(),
     }
 
+@ZSetRouter.post("/ingest")
+@measure_time
+async def zset_ingest(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    loader: Loader = "pipeline",
+    r: redis.Redis = Depends(get_async_redis),
+):
+    result = await _ingest(request, r, lambda user_id: (ZADD_TEMPLATE, time.time(), user_id), chunk_size, DEFAULT_IN_FLIGHT, loader)
+    return {**result, "type": "zset"}
+
 @ZSetRouter.get("/top100")
-def zset_top100(r: redis.Redis = Depends(get_redis)):
-    total = r.zcard(ZSET_KEY)
-    users = r.zrange(ZSET_KEY, 0, 100-1)
+@measure_time
+async def zset_top100(cache: ClientCache = Depends(get_client_cache)):
+    total = await cache.get("zcard", ZSET_KEY)
+    users = await cache.get("zrange", ZSET_KEY, 0, 100-1)
     return {
         "status": "ok",
         "total": total,
@@ -123,9 +212,10 @@ def zset_top100(r: redis.Redis = Depends(get_redis)):
     }
 
 @ZSetRouter.get("/bottom100")
-def zset_bottom100(r: redis.Redis = Depends(get_redis)):
-    total = r.zcard(ZSET_KEY)
-    users = r.zrevrange(ZSET_KEY, 0, 100-1)
+@measure_time
+async def zset_bottom100(r: redis.Redis = Depends(get_async_redis)):
+    total = await r.zcard(ZSET_KEY)
+    users = await r.zrevrange(ZSET_KEY, 0, 100-1)
     return {
         "status": "ok",
         "total": total,
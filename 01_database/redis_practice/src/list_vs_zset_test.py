@@ -39,6 +39,8 @@ def test_queue(struct_type: str) -> Tuple[int, int]:
             print(f"=== {struct_type} 테스트 데이터 생성 중 === {i+1}/100")
     call("create_last_uesr", "post", f"/queue/{struct_type}/enqueue", ["user_last"], debug=False)
     print("=== 테스트 데이터 생성 완료 ===")
+    # 키 하나짜리라 표본이 아니라 정확한 값이 나온다. (MEMORY USAGE 기본 SAMPLES 5로 원소 크기는 추정)
+    call("get_memory", "get", f"/memory?pattern=test:{struct_type}", debug=True)
 
     call("get_top100", "get", f"/queue/{struct_type}/top100", debug=True)
     call("get_bottom100", "get", f"/queue/{struct_type}/bottom100", debug=True)
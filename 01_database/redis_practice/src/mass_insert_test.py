@@ -0,0 +1,66 @@
+"""
+조건:
+서버가 8000포트에서 실행중입니다.
+/search/* 는 클러스터(redis1)가 떠 있어야 합니다.
+"""
+
+import time
+
+import requests
+
+from utils.tests import BASE_URL, TIMEOUT, call
+
+COUNT = 1000000
+USERS = list(range(100))
+PER_USER = 10000
+# resp 로더는 pipeline보다 느리지 않아야 한다. 실행마다의 흔들림만큼은 봐준다.
+TOLERANCE = 0.9
+
+
+def test_query_add(loader: str):
+    call("clear test data", "delete", "/clear?pattern=test:keys_scan:*&mode=server", debug=False)
+    t0 = time.perf_counter()
+    resp = requests.post(f"{BASE_URL}/query/add?count={COUNT}&loader={loader}", timeout=TIMEOUT)
+    dt = time.perf_counter() - t0
+    print(f"/query/add loader={loader}: {COUNT / dt:.0f} keys/s, elapsed={dt:.3f}s")
+    return COUNT / dt, resp.json()
+
+
+def test_search_add(layout: str, loader: str):
+    call("clear test data", "delete", "/cluster/clear?mode=server", debug=False)
+    t0 = time.perf_counter()
+    resp = requests.post(f"{BASE_URL}/search/{layout}/add?per_user={PER_USER}&loader={loader}", json=USERS, timeout=TIMEOUT)
+    dt = time.perf_counter() - t0
+    print(f"/search/{layout}/add loader={loader}: {len(USERS) * PER_USER / dt:.0f} keys/s, elapsed={dt:.3f}s")
+    body = resp.json()
+    stats = body["mass_insert"] if loader == "resp" else body["pipeline"]
+    # 노드별 처리량이 비슷하면 세 노드에 동시에 쓰고 있다는 뜻이다.
+    for name, node in stats["nodes"].items():
+        print(f"  {name}: {node['ops_per_sec']:.0f} ops/s, commands={node['commands']}")
+    return len(USERS) * PER_USER / dt, body
+
+
+def compare(name: str, pipeline_rate: float, resp_rate: float, body):
+    assert body["mass_insert"]["errors"] == 0, body["mass_insert"]
+    assert resp_rate >= pipeline_rate * TOLERANCE, f"{name}: resp {resp_rate:.0f} < pipeline {pipeline_rate:.0f} keys/s"
+    print(f"{name}: resp/pipeline = {resp_rate / pipeline_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    pipeline_rate, _ = test_query_add("pipeline")
+    resp_rate, body = test_query_add("resp")
+    compare("/query/add", pipeline_rate, resp_rate, body)
+
+    for layout in ("hash-tag", "hierachy"):
+        pipeline_rate, _ = test_search_add(layout, "pipeline")
+        resp_rate, body = test_search_add(layout, "resp")
+        compare(f"/search/{layout}/add", pipeline_rate, resp_rate, body)
+
+'''
+테스트 시나리오
+- 같은 데이터를 loader=pipeline(redis-py 파이프라인)과 loader=resp(RESP 바이트를 직접 쓰는 mass insert)로 적재해 keys/s를 비교한다.
+  resp는 에러 없이 pipeline의 90% 이상(TOLERANCE) 처리량이 나와야 한다.
+- resp 로더는 명령 객체/응답 객체를 만들지 않고 응답은 개수와 에러만 센다. 클러스터는 슬롯으로 노드를 나눠 노드마다 연결 하나씩 흘려보낸다.
+- 클러스터의 pipeline 로더는 ClusterWriter로 노드별 배치를 따로 끊어 동시에 보낸다. (MOVED/ASK는 따라간다)
+  hash-tag 레이아웃도 유저를 번갈아 만들어 세 노드의 ops/s가 비슷하게 나와야 한다.
+'''
@@ -0,0 +1,38 @@
+"""
+조건:
+서버가 8000포트에서 실행중입니다.
+peak_rss_mb는 프로세스 전체 RSS라 이전 요청이 잡아둔 메모리가 섞이지 않도록 청크 크기마다 서버를 새로 띄우고 측정하는 것이 정확합니다.
+"""
+
+import requests
+
+from utils.tests import call
+
+BASE_URL = "http://127.0.0.1:8000"
+TIMEOUT = 600
+
+CHUNK_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def test_chunk(chunk_size: int):
+    call("clear test data", "delete", "/clear?pattern=test:keys_scan:*&mode=server", debug=False)
+    resp = requests.post(f"{BASE_URL}/query/add?chunk_size={chunk_size}", timeout=TIMEOUT)
+    stats = resp.json()["pipeline"]
+    print(
+        f"chunk_size={chunk_size}: {stats['ops_per_sec']:.0f} ops/s, "
+        f"elapsed={stats['elapsed']:.3f}s, batches={stats['batches']}, "
+        f"batch_max={stats['batch_max']:.3f}s, peak_rss={stats['peak_rss_mb']:.1f}MB"
+    )
+    return stats
+
+if __name__ == "__main__":
+    results = {chunk_size: test_chunk(chunk_size) for chunk_size in CHUNK_SIZES}
+
+    # 기대: 100만개를 한 파이프라인에 담는 경우(기존 방식)가 RSS가 가장 크다.
+    assert results[1000]["peak_rss_mb"] <= results[1000000]["peak_rss_mb"]
+
+'''
+테스트 시나리오
+- POST /query/add 로 SET 100만개를 chunk_size 별로 나눠 보내고, 처리량과 최대 RSS를 비교한다.
+- chunk_size=1000000 은 청크를 나누지 않는 기존 방식과 같다.
+'''
@@ -1,57 +1,292 @@
-import redis
-from datetime import datetime
-from typing import List, Tuple
+import json
+import struct
+import time
 
-from fastapi import APIRouter, Body, Depends
+import redis.asyncio as redis
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
 
-from src.infra.redis_client import get_redis
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from redis.client import NEVER_DECODE
+
+from src.infra.redis_client import get_async_redis
+from src.infra.client_cache import ClientCache, get_client_cache
+from src.infra.adaptive_scan import scan_batches
 from src.utils.decorators import measure_time
+from src.utils.streaming import iter_lines
+from src.infra.pipeline_writer import DEFAULT_CHUNK_SIZE, DEFAULT_IN_FLIGHT, PipelineWriter
+from src.utils.key_codec import key_codec
+from src.utils.timescale import Resolution, aggregate, check_range, floor_day, floor_hour, hours, next_month, plan_range, rollup_fields
 
 TimeScaleRouter = APIRouter(prefix="/time-scale")
 
 HSetRouter = APIRouter(prefix="/hset")
 StringRouter = APIRouter(prefix="/string")
+BitFieldRouter = APIRouter(prefix="/bitfield")
+
+TIMESCALE_KEY = key_codec.ns("test", "timescale")
+
+# STRING 범위 조회 시 MGET 한 번에 담는 키 수
+MGET_BATCH = 1000
+
+# BITFIELD 백엔드: 유저-월 하나를 문자열 하나에 두고, (일-1)*24+시 번째 u32 카운터로 쓴다. (최대 31*24*4 = 2976 bytes)
+BITFIELD_TYPE = "u32"
+BITFIELD_WIDTH = 4
+BITFIELD_SLOTS = 31 * 24
+
+Backend = Literal["hset", "string", "bitfield"]
+
+def _bucket(backend: Backend, hour: datetime) -> Tuple[str, Optional[str]]:
+    """키 끝에 붙는 버킷 토큰과 (해시 필드 또는 BITFIELD 슬롯). STRING은 필드가 없다."""
+    if backend == "hset":
+        return key_codec.day(hour), hour.strftime("%H")
+    if backend == "bitfield":
+        return key_codec.month(hour), str((hour.day - 1) * 24 + hour.hour)
+    return key_codec.hour(hour), None
+
+def _timescale_key(user_id: str, backend: Backend, token: str) -> str:
+    return key_codec.key(TIMESCALE_KEY, key_codec.user(user_id), key_codec.word(backend), token)
+
+def hour_key(user_id: str, backend: Backend, hour: datetime) -> Tuple[str, Optional[str]]:
+    """시간 버킷이 저장된 (키, 해시 필드 또는 BITFIELD 슬롯)."""
+    token, field = _bucket(backend, hour)
+    return _timescale_key(user_id, backend, token), field
+
+def increment_command(backend: Backend, key: str, field: Optional[str]) -> Tuple:
+    """시간 버킷 카운터 +1 명령. ingest와 벤치마크 직접 적재가 같은 명령을 쓰도록 여기 둔다."""
+    if backend == "hset":
+        return ("HINCRBY", key, field, 1)
+    if backend == "bitfield":
+        return ("BITFIELD", key, "OVERFLOW", "SAT", "INCRBY", BITFIELD_TYPE, f"#{field}", 1)
+    return ("INCRBY", key, 1)
+
+def _bucket_end(backend: Backend, ts: datetime) -> datetime:
+    if backend == "hset":
+        return floor_day(ts) + timedelta(days=1)
+    if backend == "bitfield":
+        return next_month(ts)
+    return floor_hour(ts) + timedelta(hours=1)
+
+def _decode_bitfield(data: Optional[bytes]) -> Tuple[int, ...]:
+    """BITFIELD u32 #n 슬롯은 빅엔디안 4바이트 정수가 이어진 것과 같다. 쓰지 않은 뒤쪽 슬롯은 0으로 채운다."""
+    data = (data or b"").ljust(BITFIELD_SLOTS * BITFIELD_WIDTH, b"\0")
+    return struct.unpack(f">{BITFIELD_SLOTS}I", data[:BITFIELD_SLOTS * BITFIELD_WIDTH])
+
+def _rollup_base(user_id: str, backend: Backend) -> str:
+    # `{user}:hset:*` / `{user}:string:*` SCAN 패턴에 걸리지 않도록 rollup을 앞에 둔다.
+    return key_codec.key(TIMESCALE_KEY, key_codec.user(user_id), key_codec.word("rollup"), key_codec.word(backend))
+
+def _unrolled_key(backend: Backend) -> str:
+    return key_codec.key(TIMESCALE_KEY, key_codec.word("unrolled"), key_codec.word(backend))
+
+def _periods(ts: datetime) -> Tuple[str, str]:
+    """ts가 속한 일/월. 롤업 없이 적재한 구간 표시(SET 멤버)로 쓴다."""
+    return key_codec.key(key_codec.word("day"), key_codec.day(ts)), key_codec.key(key_codec.word("month"), key_codec.month(ts))
+
+def unrolled_command(backend: Backend, hours: Iterable[datetime]) -> Tuple:
+    """
+    롤업 없이(rollup=false) 적재한 일/월을 백엔드별 SET 하나에 표시하는 명령.
+    범위 조회는 표시된 일/월만 시간 버킷으로 다시 읽고, 표시가 없는 일/월은 롤업 필드가 없으면 0으로 본다.
+    """
+    members = {period for hour in set(hours) for period in _periods(hour)}
+    return ("SADD", _unrolled_key(backend), *sorted(members))
+
+async def _write_rollups(
+    writer: PipelineWriter,
+    backend: Backend,
+    data,
+    retention_days: Optional[int],
+    rollup: bool = True,
+):
+    """
+    같은 요청 안에서 일/월 롤업을 함께 올린다. 같은 (키, 필드)는 요청 안에서 먼저 합쳐 명령 수를 줄인다.
+    rollup=False면 롤업 대신 그 일/월을 롤업 없이 적재했다고 표시한다. (unrolled_command)
+    retention_days가 주어지면 시간 버킷 키가 버킷 종료 후 N일 뒤 만료되도록 EXPIREAT을 건다.
+    EXPIREAT은 키를 만든 명령 뒤에 실행돼야 하므로 writer는 _in_flight(retention_days)로 만든다.
+    """
+    rollups: Counter = Counter()
+    expire_at: Dict[str, int] = {}
+    for uid, ts in data:
+        if rollup:
+            rollups.update(rollup_fields(_rollup_base(uid, backend), ts))
+        if retention_days is not None:
+            key, _ = hour_key(uid, backend, ts)
+            expire_at[key] = int((_bucket_end(backend, ts) + timedelta(days=retention_days)).timestamp())
+    for (key, field), count in rollups.items():
+        await writer.add("hincrby", key, field, count)
+    if not rollup and data:
+        await writer.add("execute_command", *unrolled_command(backend, (ts for _, ts in data)))
+    for key, at in expire_at.items():
+        await writer.add("expireat", key, at)
+
+def _in_flight(retention_days: Optional[int]) -> int:
+    # in_flight > 1 이면 EXPIREAT 청크가 키를 만드는 청크보다 먼저 실행돼 만료가 걸리지 않을 수 있다.
+    return 1 if retention_days is not None else DEFAULT_IN_FLIGHT
+
+async def _read_buckets(
+    r: redis.Redis,
+    user_id: str,
+    backend: Backend,
+    months: List[datetime],
+    days: List[datetime],
+    hourly: List[datetime],
+) -> Tuple[Dict[datetime, int], List[datetime], int]:
+    """버킷 시작 시각별 값, 롤업 없이 적재돼 시간 버킷으로 다시 읽어야 할 일/월의 시작 시각, 읽은 키 수."""
+    base = _rollup_base(user_id, backend)
+    periods = [_periods(month)[1] for month in months] + [_periods(day)[0] for day in days]
+
+    # (키, 필드) 목록을 키별로 묶어 HMGET 한 번씩, STRING 시간 버킷은 MGET으로 읽는다.
+    rollup_reads: Dict[str, List[Tuple[datetime, str]]] = {}
+    hash_reads: Dict[str, List[Tuple[datetime, str]]] = {}
+    bitfield_reads: Dict[str, List[Tuple[datetime, str]]] = {}
+    string_reads: List[Tuple[datetime, str]] = []
+    for month in months:
+        _, (key, field) = rollup_fields(base, month)
+        rollup_reads.setdefault(key, []).append((month, field))
+    for day in days:
+        (key, field), _ = rollup_fields(base, day)
+        rollup_reads.setdefault(key, []).append((day, field))
+    for hour in hourly:
+        key, field = hour_key(user_id, backend, hour)
+        if field is None:
+            string_reads.append((hour, key))
+        elif backend == "bitfield":
+            bitfield_reads.setdefault(key, []).append((hour, field))
+        else:
+            hash_reads.setdefault(key, []).append((hour, field))
+
+    pipe = r.pipeline()
+    if periods:
+        pipe.smismember(_unrolled_key(backend), periods)
+    for key, fields in [*rollup_reads.items(), *hash_reads.items()]:
+        pipe.hmget(key, [field for _, field in fields])
+    for key in bitfield_reads:
+        # 바이너리 값이라 decode_responses를 무시하고 bytes로 받는다.
+        pipe.execute_command("GET", key, **{NEVER_DECODE: True})
+    for i in range(0, len(string_reads), MGET_BATCH):
+        pipe.mget([key for _, key in string_reads[i:i + MGET_BATCH]])
+    results = await pipe.execute()
+
+    unrolled = set()
+    if periods:
+        unrolled = {ts for ts, flag in zip([*months, *days], results[0]) if flag}
+        results = results[1:]
+
+    buckets: Dict[datetime, int] = {}
+    for fields, values in zip(rollup_reads.values(), results):
+        for (ts, _), count in zip(fields, values):
+            # 롤업 없이 적재한 데이터가 섞인 일/월은 롤업 값이 있어도 모자라므로 시간 버킷으로 다시 읽는다.
+            if count is not None and ts not in unrolled:
+                buckets[ts] = int(count)
+    offset = len(rollup_reads)
+    for fields, values in zip(hash_reads.values(), results[offset:offset + len(hash_reads)]):
+        for (ts, _), count in zip(fields, values):
+            if count is not None:
+                buckets[ts] = int(count)
+    offset += len(hash_reads)
+    for slots, data in zip(bitfield_reads.values(), results[offset:offset + len(bitfield_reads)]):
+        counters = _decode_bitfield(data)
+        for ts, slot in slots:
+            if counters[int(slot)]:
+                buckets[ts] = counters[int(slot)]
+    offset += len(bitfield_reads)
+    string_values = [value for batch in results[offset:] for value in batch]
+    for (ts, _), count in zip(string_reads, string_values):
+        if count is not None:
+            buckets[ts] = int(count)
+
+    keys = len(rollup_reads) + len(hash_reads) + len(bitfield_reads) + len(string_reads) + bool(periods)
+    return buckets, sorted(unrolled), keys
+
+async def _range_query(
+    r: redis.Redis,
+    user_id: str,
+    backend: Backend,
+    start: datetime,
+    end: datetime,
+    resolution: Resolution,
+) -> Dict:
+    check_range(start, end)
+    # 키 이름이 user_id와 시간으로 정해지므로 SCAN 없이 키를 바로 만들고, 롤업으로 덮을 수 있는 구간은 롤업을 읽는다.
+    months, days, hourly = plan_range(start, end, resolution)
+    buckets, unrolled, keys = await _read_buckets(r, user_id, backend, months, days, hourly)
 
-TIMESCALE_KEY = "test:timescale"
+    # rollup=false로 적재했다고 표시된 일/월만 시간 버킷으로 다시 읽는다. 표시가 없으면 롤업 필드가 없는 것은 기록이 없는 것이다.
+    fallback: List[datetime] = []
+    for ts in unrolled:
+        period_end = next_month(ts) if ts in months else ts + timedelta(days=1)
+        fallback += hours(ts, period_end - timedelta(hours=1))
+    if fallback:
+        more, _, more_keys = await _read_buckets(r, user_id, backend, [], [], fallback)
+        buckets.update(more)
+        keys += more_keys
+
+    return {
+        "status": "ok",
+        "user_id": user_id,
+        "resolution": resolution,
+        "plan": {"months": len(months), "days": len(days), "hours": len(hourly), "fallback_hours": len(fallback)},
+        "keys": keys,
+        "total": sum(buckets.values()),
+        "series": aggregate(buckets, resolution),
+    }
+
+async def _ttl_query(r: redis.Redis, user_id: str, backend: Backend, start: datetime, end: datetime) -> Dict:
+    """[start, end] 시간 버킷 키들의 TTL. retention_days로 적재한 키에 만료가 모두 걸렸는지 확인하는 용도."""
+    check_range(start, end)
+    keys = list(dict.fromkeys(hour_key(user_id, backend, hour)[0] for hour in hours(start, end)))
+    pipe = r.pipeline()
+    for key in keys:
+        pipe.ttl(key)
+    ttls = await pipe.execute()
+    return {
+        "status": "ok",
+        "user_id": user_id,
+        "keys": len(keys),
+        # TTL -2: 키 없음, -1: 만료 없음
+        "missing": ttls.count(-2),
+        "no_ttl": ttls.count(-1),
+        "min_ttl": min((ttl for ttl in ttls if ttl >= 0), default=None),
+    }
 
 @HSetRouter.post("")
 @measure_time
-def hset_add(
+async def hset_add(
     data: List[Tuple[str, datetime]] = Body(
         ..., embed=False, description='JSON 배열 예시: [["user1","2024-01-01T05:00:00"]]'
     ),
-    r: redis.Redis = Depends(get_redis),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
 ):
-    pipe = r.pipeline()
-    for user_id, ts in data:
-        day_key = f"{TIMESCALE_KEY}:{user_id}:hset:{ts.strftime('%Y%m%d')}"
-        hour_field = ts.strftime("%H")
-        pipe.hincrby(day_key, hour_field, 1)
-    pipe.execute()
-    return {"status": "ok", "processed": len(data)}
+    async with PipelineWriter(r, chunk_size=chunk_size, in_flight=_in_flight(retention_days)) as writer:
+        for user_id, ts in data:
+            day_key, hour_field = hour_key(user_id, "hset", ts)
+            await writer.add("hincrby", day_key, hour_field, 1)
+        await _write_rollups(writer, "hset", data, retention_days, rollup)
+    return {"status": "ok", "processed": len(data), "pipeline": writer.stats()}
 
 @HSetRouter.get("")
 @measure_time
-def hset_find(
+async def hset_find(
     user_id: str, 
-    r: redis.Redis = Depends(get_redis)
+    count: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
+    cache: ClientCache = Depends(get_client_cache),
     ):
-    pattern = f"{TIMESCALE_KEY}:{user_id}:hset:*"
-    cursor = 0
+    pattern = _timescale_key(user_id, "hset", "*")
     keys = []
 
-    while True:
-        cursor, batch = r.scan(cursor=cursor, match=pattern, count=1000)
+    # count를 주지 않으면 SCAN COUNT를 호출 지연 목표에 맞춰 조절한다.
+    async for batch in scan_batches(r, pattern, count):
         keys.extend(batch)
-        if cursor == 0:
-            break
     
     keys.sort()
 
-    pipe = r.pipeline()
-    for key in keys:
-        pipe.hgetall(key)
-    results = pipe.execute() if keys else []
+    results = await cache.get_many("hgetall", keys) if keys else []
 
     data = {
         key: {hour: int(count) for hour, count in hours.items()}
@@ -65,40 +300,64 @@ def hset_find(
         # "data": data,
     }
 
+@HSetRouter.get("/range")
+@measure_time
+async def hset_range(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    resolution: Resolution = "hour",
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _range_query(r, user_id, "hset", start, end, resolution)
+
+@HSetRouter.get("/ttl")
+@measure_time
+async def hset_ttl(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ttl_query(r, user_id, "hset", start, end)
+
 @StringRouter.post("")
 @measure_time
-def string_add(
+async def string_add(
     data: List[Tuple[str, datetime]] = Body(
         ..., embed=False, description='JSON 배열 예시: [["user1","2024-01-01T05:00:00"]]'
     ),
-    r: redis.Redis = Depends(get_redis),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
 ):
-    pipe = r.pipeline()
-    for user_id, ts in data:
-        day_key = f"{TIMESCALE_KEY}:{user_id}:string:{ts.strftime('%Y%m%d%H')}"
-        pipe.incrby(day_key, 1)
-    pipe.execute()
-    return {"status": "ok", "processed": len(data)}
+    async with PipelineWriter(r, chunk_size=chunk_size, in_flight=_in_flight(retention_days)) as writer:
+        for user_id, ts in data:
+            key, _ = hour_key(user_id, "string", ts)
+            await writer.add("incrby", key, 1)
+        await _write_rollups(writer, "string", data, retention_days, rollup)
+    return {"status": "ok", "processed": len(data), "pipeline": writer.stats()}
 
 @StringRouter.get("")
 @measure_time
-def string_find(
+async def string_find(
     user_id: str,
-    r: redis.Redis = Depends(get_redis)
+    count: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis)
 ):
-    pattern = f"{TIMESCALE_KEY}:{user_id}:string:*"
-    keys = sorted(list(r.scan_iter(match=pattern, count=10000)))
+    pattern = _timescale_key(user_id, "string", "*")
+    keys = sorted([key async for batch in scan_batches(r, pattern, count) for key in batch])
 
-    values = r.mget(keys) if keys else []
+    values = await r.mget(keys) if keys else []
 
     data = {}
     for key, count in zip(keys, values):
         if count is None:
             continue
-        ts_token = key.rsplit(":", 1)[-1]
-        day_token, hour = ts_token[:-2], ts_token[-2:]
-        day_key = f"{TIMESCALE_KEY}:{user_id}:string:{day_token}"
-        data.setdefault(day_key, {})[hour] = int(count)
+        hour = key_codec.parse_hour(key.rsplit(":", 1)[-1])
+        day_key = _timescale_key(user_id, "string", key_codec.day(hour))
+        data.setdefault(day_key, {})[hour.strftime("%H")] = int(count)
 
     return {
         "status": "ok",
@@ -107,5 +366,209 @@ def string_find(
         # "data": data,
     }
 
+@StringRouter.get("/range")
+@measure_time
+async def string_range(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    resolution: Resolution = "hour",
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _range_query(r, user_id, "string", start, end, resolution)
+
+@StringRouter.get("/ttl")
+@measure_time
+async def string_ttl(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ttl_query(r, user_id, "string", start, end)
+
+'''
+=== BITFIELD ===
+'''
+
+@BitFieldRouter.post("")
+@measure_time
+async def bitfield_add(
+    data: List[Tuple[str, datetime]] = Body(
+        ..., embed=False, description='JSON 배열 예시: [["user1","2024-01-01T05:00:00"]]'
+    ),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    async with PipelineWriter(r, chunk_size=chunk_size, in_flight=_in_flight(retention_days)) as writer:
+        for user_id, ts in data:
+            month_key, slot = hour_key(user_id, "bitfield", ts)
+            await writer.add(
+                "execute_command",
+                "BITFIELD", month_key, "OVERFLOW", "SAT", "INCRBY", BITFIELD_TYPE, f"#{slot}", 1,
+            )
+        await _write_rollups(writer, "bitfield", data, retention_days, rollup)
+    return {"status": "ok", "processed": len(data), "pipeline": writer.stats()}
+
+@BitFieldRouter.get("")
+@measure_time
+async def bitfield_find(
+    user_id: str,
+    count: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis)
+):
+    # hset/string 과 같은 조건으로 비교하기 위해 SCAN으로 유저의 월 키를 찾는다.
+    pattern = _timescale_key(user_id, "bitfield", "*")
+    keys = sorted([key async for batch in scan_batches(r, pattern, count) for key in batch])
+
+    pipe = r.pipeline()
+    for key in keys:
+        pipe.execute_command("GET", key, **{NEVER_DECODE: True})
+    results = await pipe.execute() if keys else []
+
+    data = {}
+    for key, value in zip(keys, results):
+        month_token = key_codec.parse_month(key.rsplit(":", 1)[-1]).strftime("%Y%m")
+        for slot, count in enumerate(_decode_bitfield(value)):
+            if count:
+                day, hour = divmod(slot, 24)
+                data.setdefault(f"{month_token}{day + 1:02d}", {})[f"{hour:02d}"] = count
+
+    return {
+        "status": "ok",
+        "user_id": user_id,
+        # "keys": len(keys),
+        # "data": data,
+    }
+
+@BitFieldRouter.get("/range")
+@measure_time
+async def bitfield_range(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    resolution: Resolution = "hour",
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _range_query(r, user_id, "bitfield", start, end, resolution)
+
+@BitFieldRouter.get("/ttl")
+@measure_time
+async def bitfield_ttl(
+    user_id: str,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ttl_query(r, user_id, "bitfield", start, end)
+
+'''
+=== INGEST ===
+대량 적재용 경로. 본문을 NDJSON(한 줄에 ["user1","2024-01-01T05:00:00"])으로 받아 줄 단위로 바로 파이프라인에 흘려보낸다.
+pydantic으로 백만 개의 튜플을 한 번에 검증하지 않고, 같은 타임스탬프 문자열은 한 번만 해석한다.
+'''
+
+@lru_cache(maxsize=65536)
+def _parse_bucket(backend: Backend, ts: str) -> Tuple[datetime, str, Optional[str]]:
+    hour = datetime.fromisoformat(ts)
+    return (hour, *_bucket(backend, hour))
+
+def _parse_line(line: bytes) -> Tuple[str, str]:
+    # 이스케이프가 없는 ["user","ts"] 는 따옴표로 잘라 json 파싱을 건너뛴다.
+    if b"\\" not in line:
+        parts = line.strip().split(b'"')
+        if len(parts) == 5 and parts[0] == b"[" and parts[2].strip() == b"," and parts[4] == b"]":
+            return parts[1].decode(), parts[3].decode()
+    user_id, ts = json.loads(line)
+    if not isinstance(user_id, str) or not isinstance(ts, str):
+        raise ValueError("line must be a JSON array of two strings")
+    return user_id, ts
+
+async def _ingest(
+    request: Request,
+    backend: Backend,
+    r: redis.Redis,
+    chunk_size: int,
+    rollup: bool,
+    retention_days: Optional[int],
+) -> Dict:
+    start = time.perf_counter()
+    processed = 0
+    line_no = 0
+    error = None
+    chunk: List[Tuple[str, datetime]] = []
+
+    async with PipelineWriter(r, chunk_size=chunk_size, in_flight=_in_flight(retention_days)) as writer:
+        async for line in iter_lines(request):
+            line_no += 1  # 빈 줄은 세지 않는다.
+            try:
+                user_id, ts = _parse_line(line)
+                hour, token, field = _parse_bucket(backend, ts)
+            except (ValueError, TypeError) as e:
+                # 앞 줄들은 이미 나간 청크가 있으므로 여기까지 적재를 마치고 나서 거절한다.
+                error = f"line {line_no}: {line[:100]!r}: {e}"
+                break
+
+            key = _timescale_key(user_id, backend, token)
+            await writer.add("execute_command", *increment_command(backend, key, field))
+            processed += 1
+
+            # 롤업은 청크 단위로 합쳐 올려 메모리가 본문 크기에 비례하지 않게 한다.
+            chunk.append((user_id, hour))
+            if len(chunk) >= chunk_size:
+                await _write_rollups(writer, backend, chunk, retention_days, rollup)
+                chunk = []
+        if chunk:
+            await _write_rollups(writer, backend, chunk, retention_days, rollup)
+
+    if error is not None:
+        raise HTTPException(status_code=400, detail=f"{error} ({processed} earlier lines were written)")
+    elapsed = time.perf_counter() - start
+    stats = writer.stats()
+    return {
+        "status": "ok",
+        "processed": processed,
+        "elapsed": round(elapsed, 3),
+        "items_per_sec": round(processed / elapsed, 1) if elapsed else 0,
+        "peak_rss_mb": stats["peak_rss_mb"],
+        "pipeline": stats,
+    }
+
+@HSetRouter.post("/ingest")
+@measure_time
+async def hset_ingest(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ingest(request, "hset", r, chunk_size, rollup, retention_days)
+
+@StringRouter.post("/ingest")
+@measure_time
+async def string_ingest(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ingest(request, "string", r, chunk_size, rollup, retention_days)
+
+@BitFieldRouter.post("/ingest")
+@measure_time
+async def bitfield_ingest(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rollup: bool = True,
+    retention_days: Optional[int] = None,
+    r: redis.Redis = Depends(get_async_redis),
+):
+    return await _ingest(request, "bitfield", r, chunk_size, rollup, retention_days)
+
 TimeScaleRouter.include_router(HSetRouter)
 TimeScaleRouter.include_router(StringRouter)
+TimeScaleRouter.include_router(BitFieldRouter)
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from utils.tests import call, get_random_users
+from utils.datagen import hourly_timestamps, timescale_ndjson, upload
+from utils.tests import BASE_URL, call, get_random_users
 
 
 target_user = [
@@ -12,22 +13,47 @@ def test_timescale(struct_type: str):
     call("clear test data", "delete", "/clear", debug=False)
     print("=== 데이터 정리 완료 ===") 
 
-    users = get_random_users(1000000)
-    for i in range(24):
-        if (i+1) % 3 == 0:
-            print(f"=== {struct_type} 테스트 데이터 생성 중 === {i+1}/24")
-        users_with_time = [(user, datetime(2025, 1, 1, i, 0, 0).isoformat()) for user in users]
-        call(name="create_sample_data", method="post", path=f"/time-scale/{struct_type}", body=users_with_time, debug=False)
+    users = get_random_users(1000000, seed=0)
+    # 24 x 100만 줄을 한 번에 만들지 않고 10만 줄씩 NDJSON으로 만들어 4개씩 동시에 올린다.
+    # 자료구조 자체의 메모리/키 수를 비교하기 위해 샘플 데이터는 롤업 없이 적재한다.
+    print(f"=== {struct_type} 테스트 데이터 생성 중 ===")
+    chunks = timescale_ndjson(users, hourly_timestamps(datetime(2025, 1, 1)))
+    res = upload(BASE_URL, f"/time-scale/{struct_type}/ingest?rollup=false", chunks, parallel=4)
 
     call(name="create_target_data", method="post", path=f"/time-scale/{struct_type}", body=target_user, debug=False)
     print(f"=== {struct_type} 테스트 데이터 생성 완료 ===")
+    print(f"write throughput: {res['items_per_sec']:.0f} items/s ({res['requests']} requests, {res['elapsed']:.1f}s)")
+    call(name="get_memory", method="get", path="/stats/memory")
+    # 구조별 키만 따로 표본 추정 (2,400만 키여도 2초 예산 안에서 끝난다)
+    call(name="get_memory_sampled", method="get", path="/memory?pattern=test:timescale:*")
     call(name="get_key_count", method="get", path=f"/count?pattern=test:*")
     return call(name="get_user_data", method="get", path=f"/time-scale/{struct_type}?user_id=user_target")
 
 
+def test_range(struct_type: str):
+    # test_timescale 로 적재된 데이터를 그대로 사용한다. 범위 조회는 키스페이스 크기와 무관하게 버킷 수만큼만 읽는다.
+    scan_time = call(name="get_user_data_scan", method="get", path=f"/time-scale/{struct_type}?user_id=user_target")
+    range_time = call(
+        name="get_user_data_range",
+        method="get",
+        path=f"/time-scale/{struct_type}/range?user_id=user_target&from=2025-12-01T00:00:00&to=2025-12-31T23:00:00",
+    )
+    assert range_time < scan_time
+
+    # 롤업: 전체 월은 월 롤업 필드 하나, 나머지 온전한 날은 일 롤업으로 읽어 읽는 키 수가 크게 줄어든다.
+    call(
+        name="get_user_data_rollup",
+        method="get",
+        path=f"/time-scale/{struct_type}/range?user_id=user_target&from=2025-01-01T00:00:00&to=2025-12-31T23:00:00&resolution=month",
+    )
+
 if __name__ == "__main__":
     test_timescale("hset")
+    test_range("hset")
     test_timescale("string")
+    test_range("string")
+    test_timescale("bitfield")
+    test_range("bitfield")
 
 '''
 === HSET ===
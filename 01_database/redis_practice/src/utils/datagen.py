@@ -0,0 +1,102 @@
+import json
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import requests
+
+'''
+테스트 데이터 생성/업로드.
+random.choices를 ID마다 부르지 않고, 시드로 한 번에 뽑은 바이트를 문자표로 바꾼 뒤 잘라 쓴다.
+같은 시드/크기면 항상 같은 ID가 나온다.
+'''
+
+ALPHABET = string.ascii_lowercase + string.digits
+# 0~255 바이트를 ALPHABET 문자로 바꾸는 표 (256 % 36 만큼 앞 글자가 조금 더 자주 나오지만 테스트 데이터로는 충분하다)
+_TABLE = bytes(ord(ALPHABET[i % len(ALPHABET)]) for i in range(256))
+
+NDJSON_HEADERS = {"Content-Type": "application/x-ndjson"}
+DEFAULT_CHUNK_LINES = 100000
+TIMEOUT = 600
+
+
+def user_ids(size: int, seed: int | str = 0, length: int = 10, prefix: str = "user_") -> List[str]:
+    raw = random.Random(seed).randbytes(size * length).translate(_TABLE).decode("ascii")
+    return [prefix + raw[i:i + length] for i in range(0, size * length, length)]
+
+
+def hourly_timestamps(day: datetime, hours: int = 24) -> List[str]:
+    return [(day + timedelta(hours=i)).isoformat() for i in range(hours)]
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def timescale_ndjson(users: Sequence[str], timestamps: Sequence[str], chunk_lines: int = DEFAULT_CHUNK_LINES) -> Iterator[bytes]:
+    """/time-scale/*/ingest 본문. 유저 x 시간 줄을 chunk_lines 줄씩 bytes로 만든다."""
+    encoded = [user.encode() for user in users]
+    for ts in timestamps:
+        sep = f'","{ts}"]\n["'.encode()
+        tail = f'","{ts}"]\n'.encode()
+        for chunk in _chunks(encoded, chunk_lines):
+            # join 한 번으로 줄 전체를 만든다. (줄마다 f-string/json.dumps 를 부르지 않는다)
+            yield b'["' + sep.join(chunk) + tail
+
+
+def queue_ndjson(users: Sequence[str], chunk_lines: int = DEFAULT_CHUNK_LINES) -> Iterator[bytes]:
+    """/queue/*/ingest 본문. 한 줄에 "user_id" 하나."""
+    encoded = [json.dumps(user).encode() for user in users]
+    for chunk in _chunks(encoded, chunk_lines):
+        yield b"\n".join(chunk) + b"\n"
+
+
+def upload(
+    base_url: str,
+    path: str,
+    chunks: Iterable[bytes],
+    parallel: int = 4,
+) -> Dict:
+    """
+    청크마다 요청 하나로 보내되 parallel개까지 동시에 보낸다.
+    아직 보내지 않은 청크는 parallel개까지만 미리 만들어 두므로 메모리는 청크 크기 x parallel x 2 정도로 묶인다.
+    순서가 중요한 적재(LIST)는 parallel=1로 보낸다.
+    """
+    local = threading.local()
+    slots = threading.BoundedSemaphore(parallel * 2)
+
+    def send(body: bytes) -> Dict:
+        try:
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            resp = local.session.post(f"{base_url}{path}", data=body, headers=NDJSON_HEADERS, timeout=TIMEOUT)
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            slots.release()
+
+    t0 = time.perf_counter()
+    sent = 0
+    futures = []
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for body in chunks:
+            slots.acquire()
+            futures.append(pool.submit(send, body))
+            sent += len(body)
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - t0
+
+    items = sum(result.get("processed", result.get("enqueued", 0)) for result in results)
+    return {
+        "requests": len(results),
+        "items": items,
+        "rejected": sum(result.get("rejected", 0) for result in results),
+        "bytes": sent,
+        "elapsed": round(elapsed, 3),
+        "items_per_sec": round(items / elapsed, 1) if elapsed else 0,
+    }
@@ -0,0 +1,194 @@
+import os
+import string
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+'''
+키 이름 형식. 모든 라우터는 키를 여기서 만들고, 형식은 KEY_CODEC 환경변수로 고른다.
+키가 수천만 개면 키 이름도 메모리의 큰 몫이다. (MEMORY USAGE에는 키 이름 + dictEntry + 값이 모두 들어간다)
+
+- verbose (기본): 지금까지의 키 그대로. test:timescale:user_ab12:hset:20250101
+- compact: 이름공간은 약어, 숫자/시각은 base62. t:ts:ab12:h:5E1
+
+바이너리 대신 base62를 쓴다. 클라이언트가 decode_responses=True라 키가 문자열로 오가야 하고,
+base62 글자에는 glob 특수문자(*?[]\)와 해시태그 괄호가 없어 SCAN 패턴과 {태그}를 그대로 만들 수 있다.
+시각 토큰은 고정 폭이고 알파벳이 ASCII 순서(0-9A-Za-z)라 키를 문자열로 정렬하면 시간 순서다.
+해시태그는 두 형식 모두 {인코딩된 값}이라 같은 값이면 같은 슬롯에 모인다.
+'''
+
+ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+_INDEX = {c: i for i, c in enumerate(ALPHABET)}
+EPOCH = datetime(1970, 1, 1)
+
+# 고정 단어(이름공간, 백엔드, 레이아웃)의 compact 약어. 없는 단어는 그대로 쓴다.
+WORDS: Dict[str, str] = {
+    "test": "t",
+    "keys_scan": "k",
+    "list": "l",
+    "zset": "z",
+    "timescale": "ts",
+    "user": "u",
+    "user_idx": "ui",
+    "hset": "h",
+    "string": "s",
+    "bitfield": "b",
+    "rollup": "r",
+    "unrolled": "ur",
+    "day": "d",
+    "month": "m",
+    "hash-tag": "ht",
+    "hierachy": "hi",
+}
+# 외부 패턴(/clear?pattern=test:keys_scan:* 등)에서 바꿔 주는 이름공간. test 바로 뒤 자리만 본다.
+NAMESPACES = ("keys_scan", "list", "zset", "timescale", "user", "user_idx")
+
+
+def b62(n: int, width: int = 0) -> str:
+    if n < 0:
+        raise ValueError(f"negative value: {n}")
+    digits = []
+    while n:
+        n, d = divmod(n, 62)
+        digits.append(ALPHABET[d])
+    return "".join(reversed(digits)).rjust(width, "0") or "0"
+
+
+def from_b62(token: str) -> int:
+    n = 0
+    for c in token:
+        n = n * 62 + _INDEX[c]
+    return n
+
+
+class KeyCodec:
+    """지금까지의 키 형식. 다른 코덱은 이 메서드들을 덮어쓴다."""
+
+    name = "verbose"
+
+    def word(self, word: str) -> str:
+        return word
+
+    def key(self, *parts: str) -> str:
+        return ":".join(parts)
+
+    def ns(self, *words: str) -> str:
+        """고정 단어로만 된 prefix. ns("test", "timescale") → test:timescale"""
+        return self.key(*(self.word(w) for w in words))
+
+    def user(self, user_id) -> str:
+        return str(user_id)
+
+    def tag(self, value: str) -> str:
+        return f"{{{value}}}"
+
+    def seq(self, i: int) -> str:
+        return str(i)
+
+    def stamp(self, seconds: float) -> str:
+        return f"{seconds}"
+
+    def parse_stamp(self, token: str) -> float:
+        return float(token)
+
+    def hour(self, ts: datetime) -> str:
+        return ts.strftime("%Y%m%d%H")
+
+    def day(self, ts: datetime) -> str:
+        return ts.strftime("%Y%m%d")
+
+    def month(self, ts: datetime) -> str:
+        return ts.strftime("%Y%m")
+
+    def year(self, ts: datetime) -> str:
+        return ts.strftime("%Y")
+
+    def parse_hour(self, token: str) -> datetime:
+        return datetime.strptime(token, "%Y%m%d%H")
+
+    def parse_month(self, token: str) -> datetime:
+        return datetime.strptime(token, "%Y%m")
+
+    def pattern(self, pattern: str) -> str:
+        """외부에서 받은 verbose 패턴을 이 코덱의 패턴으로 바꾼다."""
+        return pattern
+
+
+class CompactKeyCodec(KeyCodec):
+    """
+    짧은 키 형식.
+    - 유저 ID: user_xxx → xxx, 정수 → "." + base62, 그 밖의 값 → "=" + 원래 값. (서로 겹치지 않는다)
+    - 시각: 1970년부터의 시간/일/월/연 수를 고정 폭 base62로 (시간 4자, 일 3자, 월/연 2자)
+    - 타임스탬프: 마이크로초 base62 9자, 순번: base62
+    """
+
+    name = "compact"
+
+    def word(self, word: str) -> str:
+        return WORDS.get(word, word)
+
+    def user(self, user_id) -> str:
+        if isinstance(user_id, int):
+            return "." + b62(user_id)
+        s = str(user_id)
+        if s.isascii() and s.isdigit() and str(int(s)) == s:
+            # /search 는 본문에서는 int, 쿼리에서는 str로 같은 유저를 받는다.
+            return "." + b62(int(s))
+        rest = s[5:]
+        if s.startswith("user_") and rest.isascii() and rest.isalnum():
+            return rest
+        return "=" + s
+
+    def seq(self, i: int) -> str:
+        return b62(i)
+
+    def stamp(self, seconds: float) -> str:
+        return b62(round(seconds * 1_000_000), 9)
+
+    def parse_stamp(self, token: str) -> float:
+        return from_b62(token) / 1_000_000
+
+    def hour(self, ts: datetime) -> str:
+        return b62((ts.replace(tzinfo=None) - EPOCH) // timedelta(hours=1), 4)
+
+    def day(self, ts: datetime) -> str:
+        return b62((ts.replace(tzinfo=None) - EPOCH).days, 3)
+
+    def month(self, ts: datetime) -> str:
+        return b62((ts.year - 1970) * 12 + ts.month - 1, 2)
+
+    def year(self, ts: datetime) -> str:
+        return b62(ts.year - 1970, 2)
+
+    def parse_hour(self, token: str) -> datetime:
+        return EPOCH + timedelta(hours=from_b62(token))
+
+    def parse_month(self, token: str) -> datetime:
+        year, month = divmod(from_b62(token), 12)
+        return datetime(1970 + year, month + 1, 1)
+
+    def pattern(self, pattern: str) -> str:
+        """
+        앞쪽 고정 단어만 바꾼다. test:* → t:*, test:keys_scan:* → t:k:*
+        유저 ID나 시각이 들어간 패턴은 라우터가 코덱으로 직접 만든다.
+        """
+        parts = pattern.split(":")
+        if parts[0] != "test":
+            return pattern
+        parts[0] = self.word("test")
+        if len(parts) > 1 and parts[1] in NAMESPACES:
+            parts[1] = self.word(parts[1])
+        return ":".join(parts)
+
+
+CODECS = {codec.name: codec for codec in (KeyCodec, CompactKeyCodec)}
+
+
+def get_key_codec(name: Optional[str] = None) -> KeyCodec:
+    name = name or os.getenv("KEY_CODEC", "verbose")
+    if name not in CODECS:
+        raise ValueError(f"unknown KEY_CODEC: {name} (choose from {', '.join(CODECS)})")
+    return CODECS[name]()
+
+
+# 프로세스 안에서는 하나의 형식만 쓴다. 형식을 바꾸면 기존 키는 새 패턴에 걸리지 않으므로 데이터를 지우고 다시 적재한다.
+key_codec = get_key_codec()
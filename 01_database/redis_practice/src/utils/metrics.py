@@ -0,0 +1,188 @@
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# HDR 스타일 로그-선형 버킷. 2의 거듭제곱 구간마다 SUB_BUCKETS 개로 나눠 상대 오차를 ~1/SUB_BUCKETS 로 유지한다.
+# 값은 마이크로초 단위 정수로 기록하며, 2^(MAX_SHIFT + 5) us(약 1시간)까지 표현한다.
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_SHIFT = 27
+BUCKET_COUNT = (MAX_SHIFT + 2) * SUB_BUCKETS
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _bucket_index(value: int) -> int:
+    shift = max(0, value.bit_length() - (SUB_BUCKET_BITS + 1))
+    shift = min(shift, MAX_SHIFT)
+    return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+
+def _bucket_value(index: int) -> int:
+    shift = max(0, index // SUB_BUCKETS - 1)
+    return (index - shift * SUB_BUCKETS) << shift
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, usec: int):
+        self.counts[_bucket_index(usec)] += 1
+        self.count += 1
+        self.total += usec
+        if usec > self.max:
+            self.max = usec
+
+    def merge(self, other: "Histogram"):
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(_bucket_value(i), self.max)
+        return self.max
+
+
+class _Shard:
+    """스레드 하나가 독점하는 저장소. 기록 경로에서 락을 잡지 않는다."""
+
+    __slots__ = ("generation", "histograms", "counters")
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+
+class MetricsRegistry:
+    """
+    스레드별 샤드에 히스토그램/카운터를 기록하고, 조회 시점에만 합친다.
+    이벤트 루프(async 핸들러)는 한 스레드라 샤드 하나를 쓰고, 스레드풀(sync 핸들러)은 워커마다 샤드가 생긴다.
+    reset은 세대 번호만 올려 각 스레드가 다음 기록 때 새 샤드로 갈아타게 한다.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        self._generation = 0
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None or shard.generation != self._generation:
+            shard = _Shard(self._generation)
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        histograms = self._shard().histograms
+        hist = histograms.get(key)
+        if hist is None:
+            hist = histograms[key] = Histogram()
+        hist.record(int(seconds * 1_000_000))
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        counters = self._shard().counters
+        counters[key] = counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self._shards = []
+            self._gauges = {}
+
+    def _merged(self) -> Tuple[Dict[Tuple[str, Labels], Histogram], Dict[Tuple[str, Labels], float]]:
+        with self._lock:
+            shards = [s for s in self._shards if s.generation == self._generation]
+        histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        counters: Dict[Tuple[str, Labels], float] = {}
+        for shard in shards:
+            for key, hist in list(shard.histograms.items()):
+                histograms.setdefault(key, Histogram()).merge(hist)
+            for key, value in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    def snapshot(self) -> Dict:
+        histograms, counters = self._merged()
+        return {
+            "histograms": {
+                _series(name, labels): {
+                    "count": hist.count,
+                    "sum_sec": hist.total / 1_000_000,
+                    "max_sec": hist.max / 1_000_000,
+                    **{f"p{_q(q)}_sec": hist.quantile(q) / 1_000_000 for q in QUANTILES},
+                }
+                for (name, labels), hist in sorted(histograms.items())
+            },
+            "counters": {_series(name, labels): value for (name, labels), value in sorted(counters.items())},
+            "gauges": {_series(name, labels): value for (name, labels), value in sorted(self._gauges.items())},
+        }
+
+    def prometheus(self) -> str:
+        histograms, counters = self._merged()
+        lines: List[str] = []
+        for name, series in _group(histograms.items()):
+            lines.append(f"# TYPE {name} summary")
+            for labels, hist in series:
+                for q in QUANTILES:
+                    lines.append(f"{name}{_fmt(labels + (('quantile', str(q)),))} {hist.quantile(q) / 1_000_000}")
+                lines.append(f"{name}_sum{_fmt(labels)} {hist.total / 1_000_000}")
+                lines.append(f"{name}_count{_fmt(labels)} {hist.count}")
+        for name, series in _group(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{_fmt(labels)} {value}" for labels, value in series)
+        for name, series in _group(self._gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{_fmt(labels)} {value}" for labels, value in series)
+        return "\n".join(lines) + "\n"
+
+
+def _q(q: float) -> str:
+    return f"{q * 100:g}".replace(".", "")
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _series(name: str, labels: Labels) -> str:
+    return f"{name}{_fmt(labels)}"
+
+
+def _group(items: Iterable) -> Iterable:
+    grouped: Dict[str, list] = {}
+    for (name, labels), value in sorted(items, key=lambda item: item[0]):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped.items()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,30 @@
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _encode(items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    async for item in items:
+        yield (json.dumps(item, ensure_ascii=False) + "\n").encode()
+
+
+def ndjson_response(items: AsyncIterator[Any]) -> StreamingResponse:
+    """객체를 만들어지는 즉시 한 줄씩 흘려보내는 NDJSON 응답."""
+    return StreamingResponse(_encode(items), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """요청 본문을 받는 대로 줄 단위로 잘라 돌려준다. 본문 전체를 메모리에 올리지 않는다."""
+    rest = b""
+    async for chunk in request.stream():
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if rest.strip():
+        yield rest
@@ -1,16 +1,18 @@
 import random
-import string
 import threading
 import time
 from typing import Any, List
 
 import requests
 
+from utils.datagen import user_ids
+
 BASE_URL = "http://127.0.0.1:8000"
 TIMEOUT = 600
 
-def get_random_users(size: int) -> List[str]:
-    return [f"user_{''.join(random.choices(string.ascii_lowercase + string.digits, k=10))}" for _ in range(size)]
+def get_random_users(size: int, seed: int | None = None) -> List[str]:
+    # seed를 주면 같은 유저 목록이 재현된다. 주지 않으면 호출마다 다르게 뽑는다.
+    return user_ids(size, random.getrandbits(64) if seed is None else seed)
 
 def call(
         name: str, 
@@ -35,4 +37,8 @@ def call(
     dt = time.perf_counter() - t0
     if debug:
         print(f"{name}: {resp.status_code}, {dt:.3f}s, body={resp.json()}")
+        # 서버가 붙여준 요청별 Redis 부하 요약 (명령 수, 왕복, 바이트, 시간)
+        trace = {k[len("x-redis-"):]: v for k, v in resp.headers.items() if k.lower().startswith("x-redis-")}
+        if trace:
+            print(f"{name}: redis={trace}")
     return dt
\ No newline at end of file
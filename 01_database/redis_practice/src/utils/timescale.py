@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Literal, Tuple
+
+from fastapi import HTTPException
+
+from src.utils.key_codec import key_codec
+
+Resolution = Literal["hour", "day", "month"]
+RESOLUTION_FORMATS = {"hour": "%Y%m%d%H", "day": "%Y%m%d", "month": "%Y%m"}
+# 범위 조회 한 번에 허용하는 최대 시간 버킷 수 (약 10년)
+MAX_RANGE_HOURS = 24 * 366 * 10
+
+
+def floor_hour(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+def floor_day(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def next_month(ts: datetime) -> datetime:
+    return (floor_day(ts).replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def hours(start: datetime, end: datetime) -> Iterator[datetime]:
+    hour = floor_hour(start)
+    while hour <= end:
+        yield hour
+        hour += timedelta(hours=1)
+
+def check_range(start: datetime, end: datetime):
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be earlier than 'from'")
+    if (end - start) > timedelta(hours=MAX_RANGE_HOURS):
+        raise HTTPException(status_code=400, detail=f"range is limited to {MAX_RANGE_HOURS} hours")
+
+def plan_range(
+    start: datetime, end: datetime, resolution: Resolution
+) -> Tuple[List[datetime], List[datetime], List[datetime]]:
+    """
+    [start, end] 를 읽어야 할 버킷으로 나눈다. (월 롤업, 일 롤업, 시간 버킷)
+    요청한 해상도를 넘지 않는 선에서 범위를 온전히 덮는 가장 굵은 버킷을 고른다.
+    예) resolution=month, 1/15 10시 ~ 3/31 23시 → 1/15 10~23시(시간) + 1/16~1/31(일) + 2월, 3월(월)
+    """
+    months: List[datetime] = []
+    days: List[datetime] = []
+    hourly: List[datetime] = []
+    end_hour = floor_hour(end)
+    cur = floor_hour(start)
+    while cur <= end_hour:
+        is_day_start = cur.hour == 0
+        if resolution == "month" and is_day_start and cur.day == 1 and next_month(cur) - timedelta(hours=1) <= end_hour:
+            months.append(cur)
+            cur = next_month(cur)
+        elif resolution != "hour" and is_day_start and cur + timedelta(hours=23) <= end_hour:
+            days.append(cur)
+            cur += timedelta(days=1)
+        else:
+            hourly.append(cur)
+            cur += timedelta(hours=1)
+    return months, days, hourly
+
+def aggregate(buckets: Dict[datetime, int], resolution: Resolution) -> List[Dict]:
+    """버킷 시작 시각별 값을 요청한 해상도로 합친다."""
+    fmt = RESOLUTION_FORMATS[resolution]
+    series: Dict[str, int] = {}
+    for ts, count in sorted(buckets.items()):
+        bucket = ts.strftime(fmt)
+        series[bucket] = series.get(bucket, 0) + count
+    return [{"ts": ts, "count": count} for ts, count in series.items()]
+
+def rollup_fields(base: str, ts: datetime) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    """
+    롤업 (키, 필드) 쌍. 일 롤업은 월 단위 해시에 일(DD) 필드, 월 롤업은 연 단위 해시에 월(MM) 필드로 둔다.
+    """
+    return (
+        (key_codec.key(base, key_codec.word("day"), key_codec.month(ts)), ts.strftime("%d")),
+        (key_codec.key(base, key_codec.word("month"), key_codec.year(ts)), ts.strftime("%m")),
+    )